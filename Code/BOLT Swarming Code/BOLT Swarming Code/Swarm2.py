@@ -1,3 +1,5 @@
+import os
+import sys
 import time
 import math
 import random
@@ -5,21 +7,52 @@ from spherov2 import scanner
 from spherov2.toy.bolt import BOLT
 from spherov2.sphero_edu import EventType, SpheroEduAPI
 from spherov2.types import Color
-from threading import Thread
+from threading import Thread, Lock
+
+# shared neighbourhood helpers live in the Boid Swarm folder
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Boid Swarm'))
+from neighbourhood import make_neighbour_index, get_neighbourhood_masks
+from swarm_snapshot import SwarmSnapshot
+from sensor_stream import SensorStream
+from command_coalescer import CommandCoalescer
+# the RVR log index, its assets folder is on the path through neighbourhood
+from Log_Index import LogIndexWriter
 
 class Swarm2:
 
-    def __init__(self, names):
-        self.toys = scanner.find_toys(toy_names=names)
+    # the boids loop every 0.15 s, the snapshot is read again once it is older than that
+    SNAPSHOT_MAX_AGE = 0.15
+
+    # toys are scanned for by name unless given, e.g. already found or simulated ones
+    def __init__(self, names, toys=None):
+        self.toys = scanner.find_toys(toy_names=names) if toys is None else toys
         print('found ' + str(len(self.toys)) + ' toys.')
         self.boids = []
         self.nextToy = 0
-        self.log = open("swarm_log_RandNew4.txt", 'w')
+        # '\n' line ends on every platform, the index counts the bytes of each line
+        self.log = open("swarm_log_RandNew4.txt", 'w', newline='\n')
+        self.log_index = LogIndexWriter("swarm_log_RandNew4.txt")
+        self.log_lock = Lock()
+        self.snapshot = SwarmSnapshot(make_neighbour_index(), Swarm2.SNAPSHOT_MAX_AGE)
 
     # add to a list of active boids
     def add_boid(self, boid):
         self.boids.append(boid)
 
+    # read every boid once per tick into the shared snapshot, whichever boid gets there first
+    def update_snapshot(self):
+        boids = list(self.boids)
+        self.snapshot.refresh_if_stale(boids, [boid.sensors for boid in boids])
+
+    # read every boid into the snapshot now, used when one loop drives all the boids on a common tick
+    def refresh_snapshot(self):
+        boids = list(self.boids)
+        self.snapshot.refresh(boids, [boid.sensors for boid in boids])
+
+    # return (boid, x, y, heading, speed) from the snapshot for the boids within the given radius of given position
+    def get_candidates(self, x, y, radius):
+        return self.snapshot.get_candidates(x, y, radius)
+
 
     # dole out toys for assingment to new boids
     def get_next_toy(self):
@@ -27,56 +60,62 @@ class Swarm2:
         self.nextToy = self.nextToy+1
         return toy
 
+    # return the (boid, x, y, heading, speed) candidates inside the cohesion, separation and alignment neighbourhoods in one call
+    def get_neighbourhood_lists(self, x, y, rad_c, rad_s, rad_a, vision_theta):
+        candidates = self.get_candidates(x, y, max(rad_c, rad_s, rad_a))
+        masks = get_neighbourhood_masks(x, y, [[candidate[1], candidate[2]] for candidate in candidates], rad_c, rad_s, rad_a, vision_theta)
+        return [[candidate for candidate, inside in zip(candidates, mask) if inside] for mask in masks]
+
+    # return cohesion centre of mass, separation centre of mass and average velocity of the boids
+    # within the three radii of given position, each one an empty list if no such boids exist
+    def get_neighbourhoods(self, x, y, rad_c, rad_s, rad_a, vision_theta):
+        cohesion, separation, alignment = self.get_neighbourhood_lists(x, y, rad_c, rad_s, rad_a, vision_theta)
+        return Swarm2.centre_of_mass(cohesion), Swarm2.centre_of_mass(separation), Swarm2.average_velocity(alignment)
+
     # return average velocity of boids with the given radius of given position
     def get_neighbourhood_align(self, x, y, radius, vision_theta):
+        return Swarm2.average_velocity(self.get_neighbourhood_lists(x, y, radius, radius, radius, vision_theta)[2])
+
+    # return centre of mass of boids within the given radius of given position
+    # return an empty list if no such boids exist
+    def get_neighbourhood_com(self, x, y, radius, vision_theta):
+        return Swarm2.centre_of_mass(self.get_neighbourhood_lists(x, y, radius, radius, radius, vision_theta)[0])
+
+    # return average velocity of the given (boid, x, y, heading, speed) neighbours
+    @staticmethod
+    def average_velocity(neighbours):
         vec_x = 0
         vec_y = 0
-        num_boids = 0
-        for boid in self.boids:
-            xb = boid.get_location()['x']
-            yb = boid.get_location()['y']
-            dist = Swarm2.get_distance(x, y, xb, yb)
-            dir = 180*math.atan2(x-xb, y-yb)/math.pi
-            if dist < radius and dir < vision_theta/2 and dir > -(vision_theta/2):
-                thetab = boid.get_heading()
-                speedb = boid.get_speed()
-                vec_x = vec_x + speedb*math.sin(math.radians(thetab))
-                vec_y = vec_y + speedb*math.cos(math.radians(thetab))
-                num_boids = num_boids + 1
+        for _, _, _, thetab, speedb in neighbours:
+            vec_x = vec_x + speedb*math.sin(math.radians(thetab))
+            vec_y = vec_y + speedb*math.cos(math.radians(thetab))
+        num_boids = len(neighbours)
         if num_boids > 1: # only return a value if there are boids nearby other than me
-            vec_x = vec_x/num_boids
-            vec_y = vec_y/num_boids
-            return [vec_x, vec_y, num_boids-1]
+            return [vec_x/num_boids, vec_y/num_boids, num_boids-1]
         else:
             return []
 
-    # return centre of mass of boids within the given radius of given position
-    # return an empty list if no such boids exist
-    def get_neighbourhood_com(self, x, y, radius, vision_theta):
-        x_com = 0
-        y_com = 0
-        num_boids = 0
-        for boid in self.boids:
-            xb = boid.get_location()['x']
-            yb = boid.get_location()['y']
-            dist = Swarm2.get_distance(x, y, xb, yb)
-            dir = 180*math.atan2(x-xb, y-yb)/math.pi
-            if dist < radius and dir < vision_theta/2 and dir > -(vision_theta/2):
-                x_com = x_com + xb
-                y_com = y_com + yb
-                num_boids = num_boids + 1
+    # return centre of mass of the given (boid, x, y, heading, speed) neighbours
+    @staticmethod
+    def centre_of_mass(neighbours):
+        num_boids = len(neighbours)
         if num_boids > 1: # only return a value if there are boids nearby other than me
-            x_com = x_com/num_boids
-            y_com = y_com/num_boids
-            return [x_com, y_com, num_boids-1]
+            x_com = sum(neighbour[1] for neighbour in neighbours)
+            y_com = sum(neighbour[2] for neighbour in neighbours)
+            return [x_com/num_boids, y_com/num_boids, num_boids-1]
         else:
             return []
 
+    # data is one log line, starting with its timestamp and robot name
     def log_data(self, data):
-        self.log.write(data)
+        t, name = data.split(', ', 2)[:2]
+        with self.log_lock:
+            self.log.write(data)
+            self.log_index.add(int(t), name, len(data.encode()))
 
     def finalise(self):
         self.log.close()
+        self.log_index.close()
 
     @staticmethod
     def get_distance(x1, y1, x2, y2):
@@ -109,108 +148,132 @@ class Boid:
         self.Vmin = 70
         self.Vmax = 80
        
+    # connect-time setup once the api is open: start the sensor stream and join the swarm
+    def attach(self, api):
+        self.api = api
+        self.commands = CommandCoalescer(api, self.toy)
+        self.sensors = SensorStream(self.toy, api, self.commands)
+        self.sensors.start()
+        self.swarm.add_boid(self)
+
+    # start rolling at a random heading and speed, return the speed
+    def launch(self):
+        theta = random.randint(-45, 45)
+        speed = random.randint(self.Vmin, self.Vmax)
+        self.commands.set_heading(theta)
+        self.commands.set_speed(speed)
+        self.commands.flush()
+        return speed
+
+    # one control iteration: flocking forces, new heading and speed, wall reflection, sent as one roll command
+    def step(self):
+        # current position and orientation of robot 480
+        location = self.sensors.get_location()
+        x = location['x']
+        y = location['y']
+        speed = self.commands.get_speed()
+        theta = self.commands.get_heading()
+        data = str(time.time_ns()) + ", " + self.toy.name + ", " + str(x) + ", " + str(y) + ", " + str(speed) + ", " + str(theta) + ", "
+       
+        # modify target according to cohesion and alignment rules
+        self.swarm.update_snapshot()
+        c_com, s_com, align = self.swarm.get_neighbourhoods(x, y, self.Rc, self.Rs, self.Ra, self.vision_theta)
+        forces = [[speed*math.sin(math.radians(theta)), speed*math.cos(math.radians(theta))]]
+        # print('speed ' + str(speed) + ' ' + str(theta))
+        weights = [1]
+        print("Align")
+        print(len(align))
+        if len(align) > 0:
+            forces.append([align[0], align[1]])
+            weights.append(self.Wa)
+            data = data + str(self.Wa*align[0]) + ", " + str(self.Wa*align[1]) + ", "
+        else:
+            data = data + "0, 0, "
+        print("coh")
+        print(len(c_com))
+        if len(c_com) > 0:                      
+            forces.append([c_com[0]-x, c_com[1]-y])
+            weights.append(self.Wc)
+            data = data + str(self.Wc*(c_com[0]-x)) + ", " + str(self.Wc*(c_com[1]-y)) + ", "
+        else:
+            data = data + "0, 0, "
+        print("Sep")
+        print(len(s_com))
+        if len(s_com) > 0:                
+            forces.append([x-s_com[0], y-s_com[1]])
+            weights.append(self.Ws)
+            data = data + str(self.Ws*(x-s_com[0])) + ", " + str(self.Ws*(y-s_com[1])) + ", "
+        else:
+            data = data + "0, 0, "
+        if len(align) > 0:
+            data = data + str(align[2]) + ", "
+        else:
+            data = data + "0, "
+        if len(c_com) > 0:
+            data = data + str(c_com[2]) + ", "
+        else:
+            data = data + "0, "
+        if len(s_com) > 0:
+            data = data + str(s_com[2]) + "\n"
+        else:
+            data = data + "0\n"  
+        self.swarm.log_data(data)
+     
+        combined_vel = Swarm2.weighted_sum_forces(forces, weights)
+        # print('vx vy ' + str(combined_vel[0]) + ', ' + str(combined_vel[1]))
+        combined_speed = math.sqrt(combined_vel[0]*combined_vel[0] + combined_vel[1]*combined_vel[1])
+        combined_head = math.degrees(math.atan2(combined_vel[0], combined_vel[1]))
+        # print('comb speed ' + str(combined_speed) + ' ' + str(combined_head))                
+        self.commands.set_heading(int(combined_head))
+        theta = combined_head
+
+        if combined_speed > self.Vmin and combined_speed < self.Vmax:
+            self.commands.set_speed(int(combined_speed))
+        elif combined_speed < self.Vmin:
+            self.commands.set_speed(self.Vmin)
+        else:
+            self.commands.set_speed(self.Vmax)
+                       
+        # calculate a predicted target 50cm in front of self
+        location = self.sensors.get_location()
+        x = location['x']
+        y = location['y']
+        theta = self.commands.get_heading()                  
+        target_x = x + self.WAYPOINT_RANGE*math.sin(math.radians(theta))
+        target_y = y + self.WAYPOINT_RANGE*math.cos(math.radians(theta))
+       
+        # wall reflection if target will be 'out of bounds'
+        if target_x > 100 or target_x < -100:
+            self.commands.set_heading(-theta)
+            theta = -theta
+            target_x = x + self.WAYPOINT_RANGE*math.sin(math.radians(theta))
+            target_y = y + self.WAYPOINT_RANGE*math.cos(math.radians(theta))    
+
+        if target_y > 100 or target_y < 0:
+            self.commands.set_heading(180-theta)
+            theta = 180-theta
+
+        self.commands.flush()
+
     def run_boid(self, delay):
         with SpheroEduAPI(self.toy) as boid:
             time.sleep(5)
-            self.swarm.add_boid(boid)
-            theta = random.randint(-45, 45)
-            speed = random.randint(self.Vmin, self.Vmax)
-            boid.set_heading(theta)
-            boid.set_speed(speed)
+            self.attach(boid)
+            speed = self.launch()
             time.sleep(1)
-            boid.set_speed(0)
+            self.commands.set_speed(0)
+            self.commands.flush()
             time.sleep(delay)
-            boid.set_speed(speed)
+            self.commands.set_speed(speed)
+            self.commands.flush()
             try:
                 for count in range(0, 240):
-                    # current position and orientation of robot 480
-                    x = boid.get_location()['x']
-                    y = boid.get_location()['y']
-                    speed = boid.get_speed()
-                    theta = boid.get_heading()
-                    data = str(time.time_ns()) + ", " + self.toy.name + ", " + str(x) + ", " + str(y) + ", " + str(speed) + ", " + str(theta) + ", "
-                   
-                    # modify target according to cohesion and alignment rules
-                    c_com = self.swarm.get_neighbourhood_com(x, y, self.Rc, self.vision_theta)
-                    s_com = self.swarm.get_neighbourhood_com(x, y, self.Rs, self.vision_theta)
-                    align = self.swarm.get_neighbourhood_align(x, y, self.Ra, self.vision_theta)
-                    forces = [[speed*math.sin(math.radians(theta)), speed*math.cos(math.radians(theta))]]
-                    # print('speed ' + str(speed) + ' ' + str(theta))
-                    weights = [1]
-                    print("Align")
-                    print(len(align))
-                    if len(align) > 0:
-                        forces.append([align[0], align[1]])
-                        weights.append(self.Wa)
-                        data = data + str(self.Wa*align[0]) + ", " + str(self.Wa*align[1]) + ", "
-                    else:
-                        data = data + "0, 0, "
-                    print("coh")
-                    print(len(c_com))
-                    if len(c_com) > 0:                      
-                        forces.append([c_com[0]-x, c_com[1]-y])
-                        weights.append(self.Wc)
-                        data = data + str(self.Wc*(c_com[0]-x)) + ", " + str(self.Wc*(c_com[1]-y)) + ", "
-                    else:
-                        data = data + "0, 0, "
-                    print("Sep")
-                    print(len(s_com))
-                    if len(s_com) > 0:                
-                        forces.append([x-s_com[0], y-s_com[1]])
-                        weights.append(self.Ws)
-                        data = data + str(self.Ws*(x-s_com[0])) + ", " + str(self.Ws*(y-s_com[1])) + ", "
-                    else:
-                        data = data + "0, 0, "
-                    if len(align) > 0:
-                        data = data + str(align[2]) + ", "
-                    else:
-                        data = data + "0, "
-                    if len(c_com) > 0:
-                        data = data + str(c_com[2]) + ", "
-                    else:
-                        data = data + "0, "
-                    if len(s_com) > 0:
-                        data = data + str(s_com[2]) + "\n"
-                    else:
-                        data = data + "0\n"  
-                    self.swarm.log_data(data)
-                 
-                    combined_vel = Swarm2.weighted_sum_forces(forces, weights)
-                    # print('vx vy ' + str(combined_vel[0]) + ', ' + str(combined_vel[1]))
-                    combined_speed = math.sqrt(combined_vel[0]*combined_vel[0] + combined_vel[1]*combined_vel[1])
-                    combined_head = math.degrees(math.atan2(combined_vel[0], combined_vel[1]))
-                    # print('comb speed ' + str(combined_speed) + ' ' + str(combined_head))                
-                    boid.set_heading(int(combined_head))
-                    theta = combined_head
-
-                    if combined_speed > self.Vmin and combined_speed < self.Vmax:
-                        boid.set_speed(int(combined_speed))
-                    elif combined_speed < self.Vmin:
-                        boid.set_speed(self.Vmin)
-                    else:
-                        boid.set_speed(self.Vmax)
-                                   
-                    # calculate a predicted target 50cm in front of self
-                    x = boid.get_location()['x']
-                    y = boid.get_location()['y']
-                    theta = boid.get_heading()                  
-                    target_x = x + self.WAYPOINT_RANGE*math.sin(math.radians(theta))
-                    target_y = y + self.WAYPOINT_RANGE*math.cos(math.radians(theta))
-                   
-                    # wall reflection if target will be 'out of bounds'
-                    if target_x > 100 or target_x < -100:
-                        boid.set_heading(-theta)
-                        theta = -theta
-                        target_x = x + self.WAYPOINT_RANGE*math.sin(math.radians(theta))
-                        target_y = y + self.WAYPOINT_RANGE*math.cos(math.radians(theta))    
- 
-                    if target_y > 100 or target_y < 0:
-                        boid.set_heading(180-theta)
-                        theta = 180-theta
-               
+                    self.step()
                     time.sleep(0.15)
             except KeyboardInterrupt:
                 print('Interrupted')
+            self.commands.stop()
+            print(self.toy.name + ': ' + self.commands.summary())
            
 
 def main():
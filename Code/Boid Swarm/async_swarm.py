@@ -0,0 +1,205 @@
+import asyncio
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# seconds between two control steps of the whole swarm
+TICK = 0.15
+
+# rough BOLT ground speed in cm/s per unit of set_speed, 255 is about 2 m/s
+SIM_CM_PER_SPEED_UNIT = 200/255
+
+
+# Stand-in for the sensor_control of a toy, hands the samples to its listeners like spherov2 does
+class SimulatedSensorControl:
+
+    def __init__(self):
+        self.listeners = set()
+        self.interval = 250  # ms, the spherov2 default
+
+    def add_sensor_data_listener(self, listener):
+        self.listeners.add(listener)
+
+    def remove_sensor_data_listener(self, listener):
+        self.listeners.remove(listener)
+
+    def set_interval(self, interval):
+        self.interval = interval
+
+    def emit(self, sensor_data):
+        for listener in list(self.listeners):
+            listener(sensor_data)
+
+
+# Stand-in for the drive_control of a toy, keeps the heading and speed of the last roll command like the BOLT does.
+# ToyUtil.roll_start sends to it, so the simulated toy follows the CommandCoalescer as well as the api.
+class SimulatedDriveControl:
+
+    def __init__(self):
+        self.heading = 0
+        self.speed = 0
+        self.lock = threading.Lock()
+
+    # a negative speed rolls backwards, like spherov2 turns it around before sending
+    def roll_start(self, heading, speed):
+        if speed < 0:
+            heading = heading + 180
+        with self.lock:
+            self.heading = heading % 360
+            self.speed = min(255, abs(speed))
+
+    def roll_stop(self, heading):
+        self.roll_start(heading, 0)
+
+    # heading and speed the toy rolls with
+    def get(self):
+        with self.lock:
+            return self.heading, self.speed
+
+
+# Stand-in for a BOLT to test the swarm locally without robots: a name, a start position and a connection delay
+class SimulatedToy:
+
+    def __init__(self, name, x=0, y=0, connect_time=1.0):
+        self.name = name
+        self.x = x
+        self.y = y
+        self.connect_time = connect_time
+        self.sensor_control = SimulatedSensorControl()
+        self.drive_control = SimulatedDriveControl()
+
+
+# Stand-in for SpheroEduAPI driving a SimulatedToy. It keeps its own target and sends it to the toy's drive_control,
+# the toy rolls along the heading of its last roll command and the api streams the location, velocity and yaw
+# every sensor interval from a background thread.
+class SimulatedEduAPI:
+
+    def __init__(self, toy):
+        self.toy = toy
+        self.heading = 0
+        self.speed = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def __enter__(self):
+        time.sleep(self.toy.connect_time)
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.stream, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stopped.set()
+        self.thread.join()
+
+    # move the toy and send a sensor sample every interval until the api is closed
+    def stream(self):
+        last = time.monotonic()
+        while not self.stopped.wait(self.toy.sensor_control.interval/1000):
+            now = time.monotonic()
+            heading, speed = self.toy.drive_control.get()
+            vx = speed*SIM_CM_PER_SPEED_UNIT*math.sin(math.radians(heading))
+            vy = speed*SIM_CM_PER_SPEED_UNIT*math.cos(math.radians(heading))
+            self.toy.x = self.toy.x + vx*(now-last)
+            self.toy.y = self.toy.y + vy*(now-last)
+            last = now
+            self.toy.sensor_control.emit({'locator': {'x': self.toy.x, 'y': self.toy.y}, 'velocity': {'x': vx, 'y': vy},
+                                          'attitude': {'pitch': 0, 'roll': 0, 'yaw': heading}})
+
+    def get_location(self):
+        return {'x': self.toy.x, 'y': self.toy.y}
+
+    def get_heading(self):
+        return self.heading
+
+    def get_speed(self):
+        return self.speed
+
+    def set_heading(self, heading):
+        self.heading = heading % 360
+        self.toy.drive_control.roll_start(self.heading, self.speed)
+
+    def set_speed(self, speed):
+        self.speed = min(255, max(-255, speed))
+        self.toy.drive_control.roll_start(self.heading, self.speed)
+
+    def stop_roll(self, heading=None):
+        if heading is not None:
+            self.heading = heading % 360
+        self.speed = 0
+        self.toy.drive_control.roll_stop(self.heading)
+
+
+# open one toy in a worker thread, return the api and the seconds from the start until it was ready
+async def connect(loop, executor, toy, api_factory, started):
+    api = api_factory(toy)
+    await loop.run_in_executor(executor, api.__enter__)
+    return api, time.monotonic() - started
+
+
+# connect every boid's toy at once, then drive all the boids from this one loop on a common tick
+# swarm is a Swarm2 (or Swarm) and boids its Boids, api_factory opens a toy (SpheroEduAPI or SimulatedEduAPI)
+# stagger gives that many seconds to place each robot before they all start, 0 starts them straight away
+async def run_swarm(swarm, boids, api_factory, ticks, tick=TICK, stagger=0):
+    loop = asyncio.get_running_loop()
+    # one worker per toy, the connections and the blocking toy commands all run side by side
+    executor = ThreadPoolExecutor(max_workers=max(1, len(boids)))
+    started = time.monotonic()
+    results = await asyncio.gather(*[connect(loop, executor, boid.toy, api_factory, started) for boid in boids],
+                                   return_exceptions=True)
+    ready = []
+    for boid, result in zip(boids, results):
+        if isinstance(result, BaseException):
+            print(boid.toy.name + ' failed to connect: ' + repr(result))
+        else:
+            api, boid.ready_time = result
+            print(boid.toy.name + ' ready after ' + str(round(boid.ready_time, 2)) + ' s')
+            ready.append((boid, api))
+
+    try:
+        for boid, api in ready:
+            boid.attach(api)
+            if stagger > 0:
+                print('place ' + boid.toy.name + '...')
+                await asyncio.sleep(stagger)
+        await asyncio.gather(*[loop.run_in_executor(executor, boid.launch) for boid, _ in ready])
+
+        next_tick = loop.time()
+        for count in range(0, ticks):
+            await loop.run_in_executor(executor, swarm.refresh_snapshot)
+            await asyncio.gather(*[loop.run_in_executor(executor, boid.step) for boid, _ in ready])
+            next_tick = next_tick + tick
+            if next_tick < loop.time():
+                # the tick overran, start the next one now instead of rushing to catch up
+                next_tick = loop.time()
+            await asyncio.sleep(next_tick - loop.time())
+        for boid, _ in ready:
+            print(boid.toy.name + ': ' + boid.commands.summary())
+    finally:
+        await asyncio.gather(*[loop.run_in_executor(executor, api.__exit__, None, None, None) for _, api in ready],
+                             return_exceptions=True)
+        executor.shutdown()
+
+
+def main(names, simulate=False, stagger=0):
+    from SwarmingBOLT import Swarm2, Boid
+    if simulate:
+        toys = [SimulatedToy(name, random.uniform(-50, 50), random.uniform(0, 100)) for name in names]
+        api_factory = SimulatedEduAPI
+    else:
+        from spherov2.sphero_edu import SpheroEduAPI
+        toys = None
+        api_factory = SpheroEduAPI
+    swarm = Swarm2(names, toys)
+    boids = [Boid(swarm) for toy in swarm.toys]
+    try:
+        asyncio.run(run_swarm(swarm, boids, api_factory, 240, TICK, stagger))
+    except KeyboardInterrupt:
+        print('Interrupted')
+    swarm.finalise()
+
+
+if __name__ == '__main__':
+    main(['SB-09D3', 'SB-A753'])
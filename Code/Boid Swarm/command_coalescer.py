@@ -0,0 +1,117 @@
+import time
+
+from spherov2.utils import ToyUtil
+
+# largest heading change (degrees) and speed change that are not worth a roll command
+HEADING_TOLERANCE = 2
+SPEED_TOLERANCE = 2
+
+# seconds after which the toy's target is sent again while it rolls, like the background thread of SpheroEduAPI
+RESEND_INTERVAL = 0.8
+
+
+# smallest difference between two headings in degrees, 0 to 180
+def heading_difference(heading_a, heading_b):
+    difference = (heading_a - heading_b) % 360
+    return min(difference, 360 - difference)
+
+
+# Sits between a boid and its SpheroEduAPI. The set_heading and set_speed calls of one tick only change a
+# pending target, flush() then sends it as a single roll command, or drops it when it is within the tolerances
+# of the target the toy already has. Counts the set calls, the roll commands sent and the ones suppressed.
+# SpheroEduAPI sends a roll command on every set_heading and set_speed and its roll() sleeps then stops the toy,
+# so with the toy given the roll command goes straight to the toy (drive_with_heading through ToyUtil.roll_start)
+# and the coalescer keeps the toy's target itself, stop() hands it back to the api at the end of the run.
+# While the coalescer owns the toy the api must hold speed 0, otherwise its background thread rolls the toy back
+# to the api's target every 0.8 s, so a rolling api is stopped when the coalescer takes the toy over.
+class CommandCoalescer:
+
+    def __init__(self, api, toy=None, heading_tolerance=HEADING_TOLERANCE, speed_tolerance=SPEED_TOLERANCE):
+        self.api = api
+        self.toy = toy          # None to send set_heading and set_speed through the api
+        self.heading_tolerance = heading_tolerance
+        self.speed_tolerance = speed_tolerance
+        self.heading = None     # pending heading, None when not changed this tick
+        self.speed = None       # pending speed, None when not changed this tick
+        self.toy_heading = None # heading last sent to the toy, None while the api holds it
+        self.toy_speed = None   # speed last sent to the toy, None while the api holds it
+        self.requested = 0      # set_heading and set_speed calls
+        self.sent = 0           # roll commands sent
+        self.suppressed = 0     # ticks whose changes were too small to send
+        self.resent = 0         # roll commands sent again to keep a rolling toy on its target
+        self.sent_time = time.monotonic()
+        if toy is not None and api.get_speed() != 0:
+            api.stop_roll(api.get_heading())
+
+    # read the target the toy is rolling with
+    def get_toy_heading(self):
+        return self.api.get_heading() if self.toy_heading is None else self.toy_heading
+
+    def get_toy_speed(self):
+        return self.api.get_speed() if self.toy_speed is None else self.toy_speed
+
+    # read the pending target, so the boid sees its own changes within the tick like it would on the api
+    def get_heading(self):
+        return self.get_toy_heading() if self.heading is None else self.heading
+
+    def get_speed(self):
+        return self.get_toy_speed() if self.speed is None else self.speed
+
+    def set_heading(self, heading):
+        self.heading = heading % 360
+        self.requested = self.requested + 1
+
+    def set_speed(self, speed):
+        self.speed = min(255, max(-255, speed))
+        self.requested = self.requested + 1
+
+    # send the pending target as one roll command if it differs enough from the toy's, return True if sent
+    # starting or stopping is always sent
+    def flush(self):
+        if self.heading is None and self.speed is None:
+            return self.resend()
+        heading = self.get_heading()
+        speed = self.get_speed()
+        self.heading = None
+        self.speed = None
+
+        current_heading = self.get_toy_heading()
+        current_speed = self.get_toy_speed()
+        if (heading_difference(heading, current_heading) <= self.heading_tolerance
+                and abs(speed - current_speed) <= self.speed_tolerance
+                and (speed == 0) == (current_speed == 0)):
+            self.suppressed = self.suppressed + 1
+            return self.resend()
+
+        if self.toy is not None:
+            ToyUtil.roll_start(self.toy, heading, speed)
+            self.toy_heading = heading
+            self.toy_speed = speed
+            self.sent_time = time.monotonic()
+        else:
+            self.api.set_heading(heading)
+            self.api.set_speed(speed)
+        self.sent = self.sent + 1
+        return True
+
+    # send the toy's target again when nothing was sent for RESEND_INTERVAL while it rolls, return True if sent
+    # the api does this itself when it holds the target
+    def resend(self):
+        if self.toy is None or not self.toy_speed or time.monotonic() - self.sent_time < RESEND_INTERVAL:
+            return False
+        ToyUtil.roll_start(self.toy, self.toy_heading, self.toy_speed)
+        self.sent_time = time.monotonic()
+        self.resent = self.resent + 1
+        return True
+
+    # stop the toy on the heading it has, so the api holds the toy's target again and does not turn it on exit
+    def stop(self):
+        self.heading = None
+        self.speed = None
+        self.api.stop_roll(self.get_toy_heading())
+        self.toy_heading = None
+        self.toy_speed = None
+
+    def summary(self):
+        return (str(self.requested) + ' heading/speed changes, ' + str(self.sent) + ' roll commands sent, '
+                + str(self.suppressed) + ' suppressed, ' + str(self.resent) + ' resent')
@@ -0,0 +1,263 @@
+import argparse
+import itertools
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# columns of a swarm log line, as written by Boid.run_boid through Swarm2.log_data
+LOG_DTYPE = np.dtype([('t', 'i8'), ('robot', 'U16'), ('x', 'f8'), ('y', 'f8'), ('speed', 'f8'), ('heading', 'f8'),
+                      ('a_x', 'f8'), ('a_y', 'f8'), ('c_x', 'f8'), ('c_y', 'f8'), ('s_x', 'f8'), ('s_y', 'f8'),
+                      ('n_a', 'i4'), ('n_c', 'i4'), ('n_s', 'i4')])
+
+# seconds per time bin
+BIN_WIDTH = 1.0
+# lines read at a time, the analysis never holds more than this (plus one bin) of a log in memory
+CHUNK_ROWS = 100000
+# a robot with no sample for this many seconds is left out of the swarm until it logs again
+STALE_AFTER = 2.0
+# nearest neighbour distance histogram bins in cm, the last bin counts everything further
+NN_EDGES = np.append(np.arange(0, 305, 5), np.inf)
+
+# per time bin columns of the metrics
+METRICS = ('t', 'rows', 'robots', 'polarisation', 'cohesion_radius', 'max_radius', 'nn_min', 'nn_mean',
+           'speed', 'align_force', 'cohesion_force', 'separation_force')
+
+
+# read the log a chunk of lines at a time, skipping lines that are cut off or malformed
+# yields (records, skipped lines)
+def read_chunks(path, chunk_rows=CHUNK_ROWS):
+    columns = len(LOG_DTYPE.names)
+    with open(path, 'r') as log:
+        while True:
+            lines = list(itertools.islice(log, chunk_rows))
+            if len(lines) == 0:
+                return
+            good = [line for line in lines if line.count(',') == columns - 1]
+            try:
+                records = np.loadtxt(good, delimiter=',', dtype=LOG_DTYPE, ndmin=1)
+            except ValueError:
+                # a bad value somewhere in the chunk, fall back to one line at a time
+                records = []
+                for line in good:
+                    try:
+                        records.append(np.loadtxt([line], delimiter=',', dtype=LOG_DTYPE, ndmin=1))
+                    except ValueError:
+                        pass
+                records = np.concatenate(records) if len(records) > 0 else np.zeros(0, dtype=LOG_DTYPE)
+            yield records, len(lines) - len(records)
+
+
+# Streams one log and works out the flocking metrics of each time bin. Each robot's state in a bin is its
+# last sample up to the end of the bin, carried forward from earlier bins while it is not stale, so every bin
+# sees the whole swarm. The metrics of all the bins of a chunk are worked out together on bins x robots arrays.
+class FlockAnalysis:
+
+    def __init__(self, bin_width=BIN_WIDTH, stale_after=STALE_AFTER, nn_edges=NN_EDGES):
+        self.bin_ns = int(bin_width*1e9)
+        self.bin_width = bin_width
+        self.stale_ns = int(stale_after*1e9)
+        self.nn_edges = nn_edges
+        self.nn_counts = np.zeros(len(nn_edges) - 1, dtype=np.int64)
+        self.t0 = None                  # first timestamp, bins count from here
+        self.robots = {}                # robot name to column
+        self.last = None                # last state of each robot (t, x, y, heading, speed), carried between chunks
+        self.held = None                # rows of the newest bin, it may go on in the next chunk
+        self.next_bin = 0               # first bin not worked out yet
+        self.results = []               # metrics of each chunk
+        self.skipped = 0                # lines cut off or malformed
+        self.late = 0                   # rows for a bin already worked out, the log is only roughly in time order
+
+    # robot columns of the records, adding new robots
+    def robot_columns(self, records):
+        names, inverse = np.unique(records['robot'], return_inverse=True)
+        columns = np.array([self.robots.setdefault(name.strip(), len(self.robots)) for name in names], dtype=np.int64)
+        return columns[inverse]
+
+    def add(self, records, skipped=0):
+        self.skipped = self.skipped + skipped
+        if len(records) == 0:
+            return
+        if self.t0 is None:
+            self.t0 = int(records['t'].min())
+        if self.held is not None:
+            records = np.concatenate([self.held, records])
+        bins = (records['t'] - self.t0)//self.bin_ns
+        late = bins < self.next_bin
+        self.late = self.late + int(late.sum())
+        records = records[~late]
+        bins = bins[~late]
+        if len(records) == 0:
+            return
+        newest = bins.max()
+        self.held = records[bins == newest]
+        self.work_out(records[bins < newest], bins[bins < newest], newest)
+
+    # work out the metrics of the bins from next_bin up to (not including) end
+    def work_out(self, records, bins, end):
+        if end <= self.next_bin:
+            return
+        n_bins = int(end - self.next_bin)
+        cols = self.robot_columns(records)
+        n_robots = len(self.robots)
+        b = bins - self.next_bin
+        rows = np.bincount(b, minlength=n_bins)
+
+        # last sample of each robot in each bin: sort by time, the later one of a (bin, robot) wins the assignment
+        order = np.argsort(records['t'], kind='stable')
+        b_o = b[order]
+        c_o = cols[order]
+        state = np.full((n_bins + 1, n_robots, 5), np.nan)
+        if self.last is not None:
+            state[0, :len(self.last)] = self.last
+        fields = np.stack([records['t'][order].astype(np.float64), records['x'][order], records['y'][order],
+                           records['heading'][order], records['speed'][order]], axis=1)
+        state[b_o + 1, c_o] = fields
+
+        # carry each robot's last sample forward through the bins it has none
+        seen = ~np.isnan(state[:, :, 0])
+        source = np.where(seen, np.arange(n_bins + 1)[:, None], 0)
+        np.maximum.accumulate(source, axis=0, out=source)
+        state = state[source, np.arange(n_robots)[None, :]]
+        self.last = state[-1].copy()
+        state = state[1:]
+
+        bin_end = self.t0 + (np.arange(self.next_bin, end) + 1).astype(np.float64)*self.bin_ns
+        present = (bin_end[:, None] - state[:, :, 0]) <= self.stale_ns
+        x = np.where(present, state[:, :, 1], np.nan)
+        y = np.where(present, state[:, :, 2], np.nan)
+        heading = np.radians(np.where(present, state[:, :, 3], np.nan))
+        speed = np.where(present, state[:, :, 4], np.nan)
+        robots = present.sum(axis=1)
+
+        with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+            # bins with no robots (or one) give empty means, they are left as nan
+            warnings.simplefilter('ignore', RuntimeWarning)
+            # polarisation: length of the mean heading vector, 1 when all robots head the same way
+            polarisation = np.hypot(np.nanmean(np.sin(heading), axis=1), np.nanmean(np.cos(heading), axis=1))
+            # cohesion radius: mean distance from the centre of mass
+            radius = np.hypot(x - np.nanmean(x, axis=1)[:, None], y - np.nanmean(y, axis=1)[:, None])
+            cohesion_radius = np.nanmean(radius, axis=1)
+            max_radius = np.nanmax(np.where(present, radius, -np.inf), axis=1)
+            # nearest neighbour distance of every robot
+            distance = np.hypot(x[:, :, None] - x[:, None, :], y[:, :, None] - y[:, None, :])
+            distance[:, np.arange(n_robots), np.arange(n_robots)] = np.nan
+            distance = np.where(np.isnan(distance), np.inf, distance)
+            nearest = distance.min(axis=2)
+            nearest = np.where(np.isinf(nearest), np.nan, nearest)
+            nn_min = np.nanmin(np.where(np.isnan(nearest), np.inf, nearest), axis=1)
+            nn_mean = np.nanmean(nearest, axis=1)
+            mean_speed = np.nanmean(speed, axis=1)
+
+            # rule force magnitudes, mean over all the rows of the bin (0 when the rule had no neighbours)
+            forces = [np.bincount(b, weights=np.hypot(records[fx], records[fy]), minlength=n_bins)/rows
+                      for fx, fy in (('a_x', 'a_y'), ('c_x', 'c_y'), ('s_x', 's_y'))]
+
+        max_radius[robots == 0] = np.nan
+        nn_min[robots < 2] = np.nan
+        self.nn_counts += np.histogram(nearest[~np.isnan(nearest)], bins=self.nn_edges)[0]
+
+        t = (np.arange(self.next_bin, end)*self.bin_width).astype(np.float64)
+        self.results.append(np.stack([t, rows, robots, polarisation, cohesion_radius, max_radius, nn_min, nn_mean,
+                                      mean_speed] + forces, axis=1))
+        self.next_bin = int(end)
+
+    # work out the bins still held and return the metrics, one row per time bin with the columns of METRICS
+    def finish(self):
+        if self.held is not None and len(self.held) > 0:
+            bins = (self.held['t'] - self.t0)//self.bin_ns
+            self.work_out(self.held, bins, bins.max() + 1)
+            self.held = None
+        if len(self.results) == 0:
+            return np.zeros((0, len(METRICS)))
+        metrics = np.concatenate(self.results)
+        # leave out the bins nobody logged in and nobody was present, e.g. a pause in a long run
+        return metrics[(metrics[:, 1] > 0) | (metrics[:, 2] > 0)]
+
+
+# analyse one log, returns a dict with the per bin metrics, the nearest neighbour histogram and the line counts
+def analyse_file(path, bin_width=BIN_WIDTH, chunk_rows=CHUNK_ROWS, stale_after=STALE_AFTER):
+    analysis = FlockAnalysis(bin_width, stale_after)
+    for records, skipped in read_chunks(path, chunk_rows):
+        analysis.add(records, skipped)
+    metrics = analysis.finish()
+    return {'path': path, 'metrics': metrics, 'nn_counts': analysis.nn_counts, 'nn_edges': analysis.nn_edges,
+            'robots': list(analysis.robots), 'skipped': analysis.skipped, 'late': analysis.late}
+
+
+# analyse many logs side by side, one process per log
+def analyse_files(paths, workers=None, bin_width=BIN_WIDTH, chunk_rows=CHUNK_ROWS, stale_after=STALE_AFTER):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        n = len(paths)
+        return list(pool.map(analyse_file, paths, [bin_width]*n, [chunk_rows]*n, [stale_after]*n))
+
+
+# name of each log in the outputs, its file name without the extension, with as many of its folders in front as it
+# takes to tell it apart from the other logs, e.g. run1_swarm_log and run2_swarm_log for two swarm_log.txt
+def output_names(paths):
+    parts = [os.path.splitext(os.path.abspath(path))[0].split(os.sep) for path in paths]
+    names = []
+    for path_parts in parts:
+        depth = 1
+        while depth < len(path_parts) and any(other[-depth:] == path_parts[-depth:]
+                                              for other in parts if other != path_parts):
+            depth = depth + 1
+        names.append('_'.join(part for part in path_parts[-depth:] if part))
+    # the same log given more than once is numbered from its second time
+    return [name if names[:i].count(name) == 0 else name + '_' + str(names[:i].count(name) + 1)
+            for i, name in enumerate(names)]
+
+
+# one line summary of a run, means over its time bins, name is the log's name in the outputs
+def summarise(result, name=None):
+    metrics = result['metrics']
+    name = os.path.splitext(os.path.basename(result['path']))[0] if name is None else name
+    summary = {'log': name, 'bins': len(metrics), 'robots': len(result['robots']),
+               'skipped': result['skipped'], 'late': result['late']}
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for i, name in enumerate(METRICS[3:], start=3):
+            summary[name] = float(np.nanmean(metrics[:, i])) if len(metrics) > 0 else float('nan')
+    return summary
+
+
+# name is the log's name in the outputs, from output_names when several logs are written to the same folder
+def write_metrics(result, out_dir, name=None):
+    name = os.path.splitext(os.path.basename(result['path']))[0] if name is None else name
+    np.savetxt(os.path.join(out_dir, name + '_metrics.csv'), result['metrics'], delimiter=', ',
+               header=', '.join(METRICS), comments='', fmt='%.6g')
+    nn = np.stack([result['nn_edges'][:-1], result['nn_edges'][1:], result['nn_counts']], axis=1)
+    np.savetxt(os.path.join(out_dir, name + '_nn_histogram.csv'), nn, delimiter=', ',
+               header='from, to, count', comments='', fmt='%.6g')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Flocking metrics of swarm logs, per time bin')
+    parser.add_argument('logs', nargs='+')
+    parser.add_argument('--bin', type=float, default=BIN_WIDTH, help='seconds per time bin')
+    parser.add_argument('--stale', type=float, default=STALE_AFTER,
+                        help='seconds without a sample before a robot is left out')
+    parser.add_argument('--workers', type=int, default=None, help='processes, one log each')
+    parser.add_argument('--out', default='.', help='folder for the per log csv files and summary.csv')
+    args = parser.parse_args()
+
+    if len(args.logs) == 1:
+        results = [analyse_file(args.logs[0], args.bin, CHUNK_ROWS, args.stale)]
+    else:
+        results = analyse_files(args.logs, args.workers, args.bin, CHUNK_ROWS, args.stale)
+    os.makedirs(args.out, exist_ok=True)
+    summaries = []
+    for result, name in zip(results, output_names(args.logs)):
+        write_metrics(result, args.out, name)
+        summaries.append(summarise(result, name))
+        print(', '.join(str(value) if isinstance(value, (str, int)) else str(round(value, 3))
+                        for value in summaries[-1].values()))
+    with open(os.path.join(args.out, 'summary.csv'), 'w') as summary_file:
+        summary_file.write(', '.join(summaries[0]) + '\n')
+        for summary in summaries:
+            summary_file.write(', '.join(str(value) for value in summary.values()) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import os
+import sys
+import math
+import numpy as np
+
+# The neighbour indexes are shared with the RVR controller, which keeps them in its assets folder
+RVR_ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'RVR Swarm',
+                              'RVR_Swarming_Obs_CorrectCommunication', 'RVR_Shadi_New', '01- Setup Robots',
+                              'rvr_scripts', 'RVR_Vicon_Swarm_Controller', 'assets')
+sys.path.append(RVR_ASSETS_DIR)
+
+from Spatial_Index import make_neighbor_index
+
+# grid cells are sized to the largest neighbourhood radius used by the BOLT boids (cm)
+GRID_CELL_SIZE = 100
+
+# 'brute', 'grid' or 'kdtree', the kdtree copes better when the bolts bunch up together
+NEIGHBOUR_INDEX = 'grid'
+
+
+def make_neighbour_index(kind=NEIGHBOUR_INDEX):
+    return make_neighbor_index(kind, GRID_CELL_SIZE)
+
+
+# return a mask of the points seen within the vision cone, the dot product form of the angle test
+#   -vision_theta/2 < degrees(atan2(x-xb, y-yb)) < vision_theta/2
+# the angle is measured from the +y axis, so its cosine is (y-yb)/dist and the test becomes
+# (y-yb) > cos(vision_theta/2)*dist, a point on top of (x, y) has angle 0
+def in_vision_cone(dx, dy, dist, vision_theta):
+    half_theta = vision_theta/2
+    if half_theta <= 0:
+        return np.zeros(len(dist), dtype=bool)
+    if half_theta > 180:
+        return np.ones(len(dist), dtype=bool)
+    if half_theta == 180:
+        # full circle, only the ray where atan2 gives +-180 is left out
+        return (dx != 0) | (dy >= 0)
+    cos_half_theta = math.cos(math.radians(half_theta))
+    return (dy > cos_half_theta*dist) | (dist == 0)
+
+
+# return the cohesion, separation and alignment neighbourhoods of (x, y) in one call
+# each one is a mask over points of the points closer than its radius and inside the vision cone
+def get_neighbourhood_masks(x, y, points, rad_c, rad_s, rad_a, vision_theta):
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    dx = x - points[:, 0]
+    dy = y - points[:, 1]
+    dist = np.sqrt(dx*dx + dy*dy)
+    cone = in_vision_cone(dx, dy, dist, vision_theta)
+    return (dist < rad_c) & cone, (dist < rad_s) & cone, (dist < rad_a) & cone
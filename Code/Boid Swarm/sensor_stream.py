@@ -0,0 +1,99 @@
+import math
+import time
+from threading import Lock
+import numpy as np
+
+# columns of a sample: monotonic time (s), location (cm), measured velocity (cm/s) and measured yaw (degrees)
+SAMPLE_FIELDS = ('t', 'x', 'y', 'vx', 'vy', 'yaw')
+
+# samples kept per toy
+RING_SIZE = 64
+
+# ms between streamed samples, the sensing rate is set here and no longer by how often the loop asks
+SENSOR_INTERVAL = 50
+
+
+# Fixed-size ring of the newest samples of one toy.
+# The newest sample is also kept as a tuple that is swapped in whole, so readers get it without waiting.
+class SensorRing:
+
+    def __init__(self, size=RING_SIZE):
+        self.samples = np.full((size, len(SAMPLE_FIELDS)), np.nan)
+        self.count = 0          # number of samples written so far
+        self.newest = None
+        self.lock = Lock()      # guards samples and count against history readers
+
+    # add a sample, the oldest one is overwritten once the ring is full
+    def push(self, sample):
+        with self.lock:
+            self.samples[self.count % len(self.samples)] = sample
+            self.count = self.count + 1
+        self.newest = sample
+
+    # return the last n samples (all kept ones by default) as an array, oldest first
+    def history(self, n=None):
+        with self.lock:
+            kept = min(self.count, len(self.samples))
+            n = kept if n is None else min(n, kept)
+            rows = np.arange(self.count - n, self.count) % len(self.samples)
+            return self.samples[rows]
+
+
+# Subscribes once to the sensor stream of a toy and writes every sample into a SensorRing.
+# Reads the same way as SpheroEduAPI (get_location, get_heading, get_speed), the location comes from the
+# newest sample, heading and speed are the targets held by the api, which are local and need no radio traffic.
+# With a CommandCoalescer sending the roll commands, heading and speed are the targets it sent to the toy.
+class SensorStream:
+
+    def __init__(self, toy, api, commands=None, size=RING_SIZE, interval=SENSOR_INTERVAL):
+        self.toy = toy
+        self.api = api
+        self.commands = commands
+        self.interval = interval
+        self.ring = SensorRing(size)
+
+    # subscribe to the toy's sensor stream, call once the api has connected and enabled the sensors
+    def start(self):
+        self.toy.sensor_control.add_sensor_data_listener(self.on_sensor_data)
+        self.toy.sensor_control.set_interval(self.interval)
+
+    def stop(self):
+        self.toy.sensor_control.remove_sensor_data_listener(self.on_sensor_data)
+
+    # called by spherov2 for every streamed packet, samples without a location are skipped
+    def on_sensor_data(self, sensor_data):
+        locator = sensor_data.get('locator')
+        if locator is None:
+            return
+        velocity = sensor_data.get('velocity', {})
+        attitude = sensor_data.get('attitude', {})
+        self.ring.push((time.monotonic(), locator['x'], locator['y'],
+                        velocity.get('x', math.nan), velocity.get('y', math.nan), attitude.get('yaw', math.nan)))
+
+    # newest sample as a (t, x, y, vx, vy, yaw) tuple, None before the first one
+    def get_sample(self):
+        return self.ring.newest
+
+    # seconds since the newest sample, infinite before the first one
+    def age(self):
+        sample = self.ring.newest
+        if sample is None:
+            return math.inf
+        return time.monotonic() - sample[0]
+
+    # newest location, from the api until the first sample arrives
+    def get_location(self):
+        sample = self.ring.newest
+        if sample is None:
+            return self.api.get_location()
+        return {'x': sample[1], 'y': sample[2]}
+
+    def get_heading(self):
+        if self.commands is not None:
+            return self.commands.get_toy_heading()
+        return self.api.get_heading()
+
+    def get_speed(self):
+        if self.commands is not None:
+            return self.commands.get_toy_speed()
+        return self.api.get_speed()
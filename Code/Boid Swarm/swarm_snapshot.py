@@ -0,0 +1,61 @@
+import math
+import time
+from threading import Lock
+
+
+# Location, heading and speed of every boid, read once per tick and shared read-only by all the
+# neighbourhood queries of that tick, instead of every boid reading every other toy on its own.
+class SwarmSnapshot:
+
+    def __init__(self, index, max_age):
+        self.index = index          # neighbour index rebuilt from the snapshot positions
+        self.max_age = max_age      # a snapshot older than this (s) is refreshed by the next boid asking
+        self.boids = []
+        self.positions = []
+        self.headings = []
+        self.speeds = []
+        self.timestamp = None       # time.monotonic() of the last refresh
+        self.lock = Lock()          # guards the snapshot data against the readers
+        self.refresh_lock = Lock()  # lets a single boid refresh at a time, the others then find it fresh
+
+    # seconds since the last refresh, infinite before the first one
+    def age(self):
+        if self.timestamp is None:
+            return math.inf
+        return time.monotonic() - self.timestamp
+
+    # read every toy once (location, heading and speed) and rebuild the neighbour index
+    # apis are the SpheroEduAPI objects to read, one per boid, the boids themselves by default
+    def refresh(self, boids, apis=None):
+        boids = list(boids)
+        apis = boids if apis is None else list(apis)
+        positions = []
+        headings = []
+        speeds = []
+        for api in apis:
+            location = api.get_location()
+            positions.append([location['x'], location['y']])
+            headings.append(api.get_heading())
+            speeds.append(api.get_speed())
+        with self.lock:
+            self.boids = boids
+            self.positions = positions
+            self.headings = headings
+            self.speeds = speeds
+            self.index.update(positions)
+            self.timestamp = time.monotonic()
+
+    # refresh only if the snapshot is older than max_age, so the first boid to run in a tick pays for the reads
+    # return True if it was refreshed
+    def refresh_if_stale(self, boids, apis=None):
+        with self.refresh_lock:
+            if self.age() < self.max_age:
+                return False
+            self.refresh(boids, apis)
+            return True
+
+    # return (boid, x, y, heading, speed) of the boids within the given radius of given position, in boid order
+    def get_candidates(self, x, y, radius):
+        with self.lock:
+            point_index, _ = self.index.query_radius([x, y], radius)
+            return [(self.boids[i], self.positions[i][0], self.positions[i][1], self.headings[i], self.speeds[i]) for i in sorted(point_index)]
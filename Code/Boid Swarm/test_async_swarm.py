@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from async_swarm import SimulatedToy, SimulatedEduAPI
+
+
+def make_api(x=0, y=0):
+    toy = SimulatedToy('SB-TEST', x, y, connect_time=0)
+    toy.sensor_control.set_interval(10)
+    return toy, SimulatedEduAPI(toy)
+
+
+def test_api_target_drives_the_toy():
+    toy, api = make_api()
+    api.set_heading(90)
+    api.set_speed(-100)
+    # backwards is the opposite heading at the same speed
+    assert toy.drive_control.get() == (270, 100)
+    api.stop_roll(45)
+    assert toy.drive_control.get() == (45, 0)
+    assert api.get_speed() == 0
+
+
+def test_flushed_command_steers_the_simulated_toy():
+    pytest.importorskip('spherov2')
+    from command_coalescer import CommandCoalescer
+
+    toy, api = make_api()
+    samples = []
+    toy.sensor_control.add_sensor_data_listener(samples.append)
+    with api:
+        commands = CommandCoalescer(api, toy)
+        commands.set_heading(90)
+        commands.set_speed(100)
+        assert commands.flush()
+        # the coalescer sends to the toy, the api keeps its own target
+        assert toy.drive_control.get() == (90, 100)
+        assert api.get_speed() == 0
+        time.sleep(0.2)
+        commands.stop()
+    # rolled along +x, the streamed yaw is the flushed heading
+    assert toy.x > 1 and abs(toy.y) < 1e-6
+    assert samples[-1]['attitude']['yaw'] == 90
+    assert toy.drive_control.get() == (90, 0)
@@ -0,0 +1,28 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from log_analysis import output_names, write_metrics, summarise, NN_EDGES, METRICS
+
+
+def test_output_names_tell_logs_apart():
+    paths = [os.path.join('runs', 'day1', 'swarm_log.txt'), os.path.join('runs', 'day2', 'swarm_log.txt'),
+             os.path.join('runs', 'solo.txt'), os.path.join('old', 'day1', 'swarm_log.txt'),
+             os.path.join('runs', 'day1', 'swarm_log.txt')]
+    names = output_names(paths)
+    assert names == ['runs_day1_swarm_log', 'day2_swarm_log', 'solo', 'old_day1_swarm_log', 'runs_day1_swarm_log_2']
+    assert len(set(names)) == len(names)
+
+
+def test_same_file_names_do_not_overwrite(tmp_path):
+    paths = [os.path.join('day1', 'swarm_log.txt'), os.path.join('day2', 'swarm_log.txt')]
+    results = [{'path': path, 'metrics': np.full((1, len(METRICS)), float(i)), 'nn_counts': np.zeros(len(NN_EDGES) - 1),
+                'nn_edges': NN_EDGES, 'robots': ['SB-1'], 'skipped': 0, 'late': 0} for i, path in enumerate(paths)]
+    names = output_names(paths)
+    for result, name in zip(results, names):
+        write_metrics(result, str(tmp_path), name)
+    assert sorted(os.listdir(tmp_path)) == ['day1_swarm_log_metrics.csv', 'day1_swarm_log_nn_histogram.csv',
+                                            'day2_swarm_log_metrics.csv', 'day2_swarm_log_nn_histogram.csv']
+    assert [summarise(result, name)['log'] for result, name in zip(results, names)] == names
@@ -0,0 +1,72 @@
+import os
+import sys
+import math
+import random
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from neighbourhood import in_vision_cone, get_neighbourhood_masks
+
+VISION_THETAS = [0, 1, 45, 90, 120, 179.9, 180, 180.1, 270, 300, 359.9, 360, 360.1, 400, 720]
+
+
+# the atan2 test the bolts used before in_vision_cone, (x, y) is the boid and (xb, yb) the other point
+def atan2_in_cone(x, y, xb, yb, vision_theta):
+    return -vision_theta/2 < math.degrees(math.atan2(x-xb, y-yb)) < vision_theta/2
+
+
+def check_same_cone(x, y, points, vision_theta):
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    dx = x - points[:, 0]
+    dy = y - points[:, 1]
+    dist = np.sqrt(dx*dx + dy*dy)
+    cone = in_vision_cone(dx, dy, dist, vision_theta)
+    expected = [atan2_in_cone(x, y, xb, yb, vision_theta) for xb, yb in points.tolist()]
+    assert cone.tolist() == expected, (x, y, vision_theta)
+
+
+def test_cone_matches_atan2_random_points():
+    rng = random.Random(5)
+    for case in range(3000):
+        x, y = rng.uniform(-100, 100), rng.uniform(-100, 100)
+        points = [[rng.uniform(-100, 100), rng.uniform(-100, 100)] for _ in range(20)]
+        for vision_theta in VISION_THETAS + [rng.uniform(0, 800)]:
+            check_same_cone(x, y, points, vision_theta)
+
+
+def test_cone_matches_atan2_on_the_special_rays():
+    # integer points put many of them on the axes, on the diagonals and on top of the boid
+    rng = random.Random(6)
+    for case in range(300):
+        x, y = rng.randint(-5, 5), rng.randint(-5, 5)
+        points = [[x + dx, y + dy] for dx in range(-4, 5) for dy in range(-4, 5)]
+        # the +-180 ray behind the boid and a point on top of it
+        points += [[x, y - rng.uniform(0.1, 50)], [x, y]]
+        for vision_theta in VISION_THETAS:
+            check_same_cone(x, y, points, vision_theta)
+
+
+def test_cone_special_cases():
+    dx = np.array([0.0, 0.0, 1.0, 0.0])
+    dy = np.array([0.0, -1.0, -1.0, 1.0])
+    dist = np.sqrt(dx*dx + dy*dy)
+    # a point on top of the boid has angle 0, the ray behind it is +-180
+    assert in_vision_cone(dx, dy, dist, 0).tolist() == [False, False, False, False]
+    assert in_vision_cone(dx, dy, dist, 180).tolist() == [True, False, False, True]
+    assert in_vision_cone(dx, dy, dist, 360).tolist() == [True, False, True, True]
+    assert in_vision_cone(dx, dy, dist, 400).tolist() == [True, True, True, True]
+
+
+def test_masks_match_separate_queries():
+    rng = random.Random(7)
+    for case in range(500):
+        x, y = rng.uniform(0, 200), rng.uniform(0, 200)
+        points = np.array([[rng.uniform(0, 200), rng.uniform(0, 200)] for _ in range(30)])
+        rad_c, rad_s, rad_a = rng.uniform(10, 100), rng.uniform(10, 100), rng.uniform(10, 100)
+        vision_theta = rng.choice(VISION_THETAS)
+        masks = get_neighbourhood_masks(x, y, points, rad_c, rad_s, rad_a, vision_theta)
+        for mask, rad in zip(masks, (rad_c, rad_s, rad_a)):
+            expected = [math.sqrt((x-xb)**2 + (y-yb)**2) < rad and atan2_in_cone(x, y, xb, yb, vision_theta)
+                        for xb, yb in points.tolist()]
+            assert mask.tolist() == expected
@@ -0,0 +1,388 @@
+"""
+Communication Benchmarks
+
+Stress test and benchmarks of the communication handlers of the RVR Vicon swarm controller (Communication_Handler.py),
+over localhost sockets. Run it to stress test the message framing, with 'benchmark' to compare the single thread
+ServerSide against one receive thread per client, with 'jitter' to compare the control loop tick jitter of the
+threaded and the asyncio handler, or with 'multicast' to test the multicast mode with many agents.
+
+@ version   1.0
+"""
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import struct
+import sys
+import threading
+import time
+
+# The handlers are kept with the RVR controller
+RVR_CONTROLLER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'RVR Swarm',
+                                  'RVR_Swarming_Obs_CorrectCommunication', 'RVR_Shadi_New', '01- Setup Robots',
+                                  'rvr_scripts', 'RVR_Vicon_Swarm_Controller')
+sys.path.append(RVR_CONTROLLER_DIR)
+
+from Communication_Handler import (Communication_Handler, Async_Communication_Handler, Multicast_Communication_Handler,
+                                   ServerSide, FrameReceiver, LENGTH_PREFIX, DATAGRAM_HEADER)
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to make the payload of stress test message number sequence, its length and bytes follow from the number
+def stress_payload(sequence):
+    return LENGTH_PREFIX.pack(sequence) + bytes([sequence % 251]) * (sequence % 97)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to stress test the framing of ServerSide over localhost sockets (Linux, the senders use 127.0.0.2, .3, ...
+# because the server keeps one connection per IP). Every sender blasts numbered messages of varying length as fast as
+# it can and writes them in random pieces, so frames are split (even inside the length prefix) and several frames
+# come in one read. Every received message is checked: intact, numbered higher than the one before it, and the last
+# message of every sender arrives.
+# Parameters:
+#       - senders (int): number of sending connections.
+#       - seconds (float): how long every sender blasts.
+#       - port (int): port of the test server.
+def stress_test(senders=4, seconds=3.0, port=12399):
+    last_sequence = {}
+    corrupt = []
+
+    def check_message(sender_ip, message):
+        sequence = LENGTH_PREFIX.unpack_from(message)[0] if len(message) >= LENGTH_PREFIX.size else -1
+        if message != stress_payload(sequence) or sequence <= last_sequence.get(sender_ip, 0):
+            corrupt.append((sender_ip, message[:16]))
+        last_sequence[sender_ip] = sequence
+
+    server_side = ServerSide("stress_test", "127.0.0.1", port, message_listener=check_message)
+    server_side.start()
+
+    sent = {}
+
+    def blast(sender_ip):
+        with socket.create_connection(("127.0.0.1", port), source_address=(sender_ip, 0)) as sender_socket:
+            name = sender_ip.encode()
+            pending = LENGTH_PREFIX.pack(len(name)) + name
+            sequence = 0
+            stop_time = time.time() + seconds
+            while time.time() < stop_time:
+                for _ in range(random.randint(1, 20)):
+                    sequence += 1
+                    payload = stress_payload(sequence)
+                    pending += LENGTH_PREFIX.pack(len(payload)) + payload
+                # write what is pending in random pieces, the last piece may stop in the middle of a frame
+                while len(pending) > 64:
+                    piece = random.randint(1, len(pending) - 1)
+                    sender_socket.sendall(pending[:piece])
+                    pending = pending[piece:]
+            sender_socket.sendall(pending)
+            sent[sender_ip] = sequence
+            # give the server time to read the last frame before the connection closes
+            time.sleep(0.5)
+
+    sender_ips = [f"127.0.0.{2 + sender}" for sender in range(senders)]
+    sender_threads = [threading.Thread(target=blast, args=(sender_ip,)) for sender_ip in sender_ips]
+    for sender_thread in sender_threads:
+        sender_thread.start()
+    receivers = {}
+    while len(receivers) < senders and any(sender_thread.is_alive() for sender_thread in sender_threads):
+        with server_side.clients_update_lock:
+            receivers = {ip: client['receiver'] for ip, client in server_side.clients.items()}
+        time.sleep(0.01)
+    for sender_thread in sender_threads:
+        sender_thread.join()
+    server_side.terminating_serverside()
+
+    total_sent = sum(sent.values())
+    # every receiver also counts the name frame
+    total_framed = sum(receiver.frames - 1 for receiver in receivers.values())
+    total_skipped = sum(receiver.skipped for receiver in receivers.values())
+    print(f"\n{total_sent} messages sent by {senders} senders in {seconds} s ({total_sent / seconds:.0f} per second)")
+    print(f"{total_framed} framed by the server, {total_framed - total_skipped} passed on, "
+          f"{total_skipped} replaced by a newer message of the same read")
+    lost = [ip for ip in sender_ips if last_sequence.get(ip) != sent.get(ip)]
+    if corrupt or lost or total_framed != total_sent:
+        print(f"FAILED: {len(corrupt)} corrupt messages, last message missing from {lost}")
+        return False
+    print("OK: no corrupt, reordered or lost frames")
+    return True
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to simulate peers sending their state, run in its own process so its CPU time is not counted
+# Every peer connects from its own IP (127.0.0.2, .3, ...) and sends a 31 byte message holding its send time
+# Parameters:
+#       - peers (int): number of simulated peers.
+#       - port (int): port of the server.
+#       - rate (float): messages per second of every peer.
+#       - seconds (float): how long the peers send.
+#       - serve (bool): every peer also listens on its IP and port, and drains what the server sends it.
+def benchmark_peers(peers, port, rate, seconds, serve=False):
+    def drain(listen_socket):
+        client_socket, client_address = listen_socket.accept()
+        while client_socket.recv(65536):
+            pass
+
+    if serve:
+        for peer in range(peers):
+            listen_socket = socket.create_server((f"127.0.0.{2 + peer}", port))
+            threading.Thread(target=drain, args=(listen_socket,), daemon=True).start()
+
+    peer_sockets = []
+    for peer in range(peers):
+        peer_socket = socket.create_connection(("127.0.0.1", port), source_address=(f"127.0.0.{2 + peer}", 0))
+        name = f"peer{peer}".encode()
+        peer_socket.sendall(LENGTH_PREFIX.pack(len(name)) + name)
+        peer_sockets.append(peer_socket)
+    # the server connects back to the peers once a second
+    time.sleep(1.5 if serve else 0.5)
+
+    send_time = time.monotonic()
+    stop_time = send_time + seconds
+    while send_time < stop_time:
+        for peer_socket in peer_sockets:
+            message = struct.pack("<q", time.monotonic_ns()) + bytes(23)
+            peer_socket.sendall(LENGTH_PREFIX.pack(len(message)) + message)
+        send_time += 1 / rate
+        time.sleep(max(0.0, send_time - time.monotonic()))
+    time.sleep(0.2)
+    for peer_socket in peer_sockets:
+        peer_socket.close()
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to receive the way ServerSide did before the selector, one blocking receive thread per client
+# Parameters:
+#       - port (int): port of the server.
+#       - message_listener (function): called as message_listener(sender_ip, message).
+#       - stop (threading.Event): set to stop accepting.
+def serve_with_threads(port, message_listener, stop):
+    def receive_from_client(client_socket, client_ip):
+        receiver = FrameReceiver(client_socket)
+        try:
+            receiver.receive_frame()
+            while True:
+                message = receiver.receive_newest()
+                if message is not None:
+                    message_listener(client_ip, message)
+        except (ConnectionError, OSError):
+            client_socket.close()
+
+    with socket.create_server(("127.0.0.1", port)) as server_socket:
+        server_socket.settimeout(0.2)
+        while not stop.is_set():
+            try:
+                client_socket, client_address = server_socket.accept()
+            except socket.timeout:
+                continue
+            threading.Thread(target=receive_from_client, args=(client_socket, client_address[0]), daemon=True).start()
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to benchmark receiving from many peers on localhost (Linux, see benchmark_peers): the single thread
+# selector ServerSide against one receive thread per client. Prints the threads of the process, the CPU time it used
+# and the latency from send to the message listener.
+# Parameters:
+#       - peer_counts (tuple): numbers of simulated peers.
+#       - rate (float): messages per second of every peer.
+#       - seconds (float): how long every run sends.
+#       - port (int): first port of the test servers, every run uses the next one.
+def benchmark(peer_counts=(5, 20, 50), rate=20, seconds=3.0, port=12400):
+    results = []
+    for peers in peer_counts:
+        for receive_mode in ('threads', 'selector'):
+            port += 1
+            latencies = []
+
+            def measure_latency(sender_ip, message):
+                latencies.append(time.monotonic_ns() - struct.unpack_from("<q", message)[0])
+
+            stop = threading.Event()
+            if receive_mode == 'threads':
+                server_thread = threading.Thread(target=serve_with_threads, args=(port, measure_latency, stop),
+                                                 daemon=True)
+                server_thread.start()
+            else:
+                server_side = ServerSide("benchmark", "127.0.0.1", port, message_listener=measure_latency)
+                server_side.start()
+            time.sleep(0.3)
+
+            peers_process = multiprocessing.Process(target=benchmark_peers, args=(peers, port, rate, seconds))
+            cpu_start = time.process_time()
+            peers_process.start()
+            threads = threading.active_count()
+            while peers_process.is_alive():
+                threads = max(threads, threading.active_count())
+                time.sleep(0.1)
+            cpu_time = time.process_time() - cpu_start
+
+            if receive_mode == 'threads':
+                stop.set()
+                server_thread.join()
+            else:
+                server_side.terminating_serverside()
+
+            latencies_ms = sorted(latency / 1e6 for latency in latencies)
+            results.append((peers, receive_mode, threads, cpu_time, len(latencies_ms),
+                            statistics.median(latencies_ms) if latencies_ms else float('nan'),
+                            latencies_ms[int(0.99 * (len(latencies_ms) - 1))] if latencies_ms else float('nan')))
+
+    print(f"\n{rate} messages per second per peer, {seconds} s per run")
+    print(f"{'peers':>6}{'receive':>10}{'threads':>9}{'CPU (s)':>9}{'messages':>10}{'median (ms)':>13}{'p99 (ms)':>10}")
+    for peers, receive_mode, threads, cpu_time, messages, median, p99 in results:
+        print(f"{peers:>6}{receive_mode:>10}{threads:>9}{cpu_time:>9.3f}{messages:>10}{median:>13.3f}{p99:>10.3f}")
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to benchmark the tick jitter of an asyncio control loop (like Agent.run_agent) with the threaded
+# Communication_Handler against the Async_Communication_Handler, on localhost (Linux, see benchmark_peers).
+# Every tick sends a state message to all peers, reads the last messages, computes for work_ms and sleeps until the
+# next tick. The jitter is how late each tick starts, threads counts the threads the handler added.
+# Parameters:
+#       - peers (int): number of simulated neighbors, they send to and receive from the handler.
+#       - rate (float): ticks and peer messages per second, 20 like the 50 ms command_time_step of the Agent.
+#       - work_ms (float): computing time of every tick (boid rules, logging).
+#       - seconds (float): how long every run sends.
+#       - port (int): first port of the test handlers, every run uses the next one.
+def jitter_benchmark(peers=10, rate=20, work_ms=10.0, seconds=5.0, port=12450):
+    results = []
+    for handler_mode in ('threads', 'asyncio'):
+        port += 1
+        threads_before = threading.active_count()
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        neighbors_ips = [f"127.0.0.{2 + peer}" for peer in range(peers)]
+        if handler_mode == 'threads':
+            handler = Communication_Handler("jitter", "127.0.0.1", neighbors_ips, port)
+            handler.start_communication()
+        else:
+            handler = Async_Communication_Handler("jitter", "127.0.0.1", neighbors_ips, port)
+            loop.run_until_complete(handler.start_communication())
+
+        peers_process = multiprocessing.Process(target=benchmark_peers, args=(peers, port, rate, seconds, True))
+        peers_process.start()
+
+        async def run_ticks():
+            lateness = []
+            tick_time = loop.time()
+            while peers_process.is_alive():
+                lateness.append(loop.time() - tick_time)
+                handler.send_message_to_all(struct.pack("<q", time.monotonic_ns()) + bytes(23))
+                handler.get_last_received_messages()
+                work_end = time.perf_counter() + work_ms / 1000
+                while time.perf_counter() < work_end:
+                    pass
+                tick_time += 1 / rate
+                await asyncio.sleep(max(0.0, tick_time - loop.time()))
+            return lateness
+
+        cpu_start = time.process_time()
+        lateness_ms = sorted(late * 1000 for late in loop.run_until_complete(run_ticks()))
+        cpu_time = time.process_time() - cpu_start
+        threads = threading.active_count() - threads_before
+        peers_heard = len(handler.get_last_received_messages())
+        handler.handle_termination()
+        loop.run_until_complete(asyncio.sleep(0.1))
+        loop.close()
+
+        results.append((handler_mode, threads, peers_heard, cpu_time, len(lateness_ms), statistics.median(lateness_ms),
+                        lateness_ms[int(0.99 * (len(lateness_ms) - 1))], lateness_ms[-1]))
+
+    print(f"\n{peers} peers, {rate} ticks per second, {work_ms} ms of work per tick")
+    print(f"{'handler':>8}{'threads':>9}{'heard':>7}{'CPU (s)':>9}{'ticks':>7}{'median late (ms)':>18}"
+          f"{'p99 (ms)':>10}{'max (ms)':>10}")
+    for handler_mode, threads, peers_heard, cpu_time, ticks, median, p99, worst in results:
+        print(f"{handler_mode:>8}{threads:>9}{peers_heard:>7}{cpu_time:>9.3f}{ticks:>7}{median:>18.3f}"
+              f"{p99:>10.3f}{worst:>10.3f}")
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to test the multicast mode on loopback with many agents in one process. Every tick each agent sends one
+# numbered message to the group, and every few ticks an old datagram of agent0 is sent again, as a reordered packet.
+# Every message passed on is checked: intact and numbered higher than the one before it from the same sender.
+# Parameters:
+#       - agents (int): number of agents.
+#       - rate (float): ticks per second.
+#       - seconds (float): how long the agents send.
+#       - port (int): port of the group.
+def multicast_test(agents=20, rate=20, seconds=3.0, port=12500):
+    corrupt = []
+
+    def make_listener(last_sequence):
+        def check_message(sender_name, message):
+            sequence = LENGTH_PREFIX.unpack_from(message)[0] if len(message) >= LENGTH_PREFIX.size else -1
+            if message != stress_payload(sequence) or sequence <= last_sequence.get(sender_name, 0):
+                corrupt.append((sender_name, sequence))
+            last_sequence[sender_name] = sequence
+        return check_message
+
+    handlers = [Multicast_Communication_Handler(f"agent{agent}", "127.0.0.1", [], port,
+                                                message_listener=make_listener({}))
+                for agent in range(agents)]
+    for handler in handlers:
+        handler.start_communication()
+
+    ticks = int(seconds * rate)
+    send_start = time.perf_counter()
+    for tick in range(1, ticks + 1):
+        for handler in handlers:
+            handler.send_message_to_all(stress_payload(tick))
+        if tick % 5 == 0 and tick > 3:
+            # agent0's datagram of 3 ticks ago, arriving late
+            late = stress_payload(tick - 3)
+            handlers[0].send_socket.sendto(DATAGRAM_HEADER.pack(tick - 3, len(handlers[0].name_bytes)) +
+                                           handlers[0].name_bytes + late, (handlers[0].group, port))
+        time.sleep(max(0.0, send_start + tick / rate - time.perf_counter()))
+    time.sleep(0.5)
+
+    for handler in handlers:
+        handler.is_running = False
+    for handler in handlers:
+        handler.receive_thread.join()
+        handler.receive_socket.close()
+        handler.send_socket.close()
+
+    heard = [len(handler.last_received_messages) for handler in handlers]
+    newest = sum(1 for handler in handlers for message in handler.last_received_messages.values()
+                 if message == stress_payload(ticks))
+    received = sum(handler.received_datagrams for handler in handlers)
+    late = sum(handler.late_datagrams for handler in handlers)
+    expected = agents * (agents - 1) * ticks
+    print(f"\n{agents} agents, {ticks} ticks: 1 sendto per agent per tick "
+          f"(TCP mode: {2 * (agents - 1)} send calls)")
+    print(f"{received} of {expected} messages passed on ({100 * received / expected:.1f}%), "
+          f"{late} late datagrams dropped, every agent heard {min(heard)} to {max(heard)} others, "
+          f"{newest} of {agents * (agents - 1)} hold the newest message")
+    if corrupt or min(heard) != agents - 1:
+        print(f"FAILED: {len(corrupt)} corrupt or out of order messages passed on")
+        return False
+    print("OK: no corrupt or out of order messages passed on")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress test or benchmark the communication over localhost")
+    parser.add_argument('mode', nargs='?', choices=('stress', 'benchmark', 'jitter', 'multicast'), default='stress',
+                        help="stress test the framing (default), benchmark the receive threads, "
+                             "benchmark the tick jitter of the threaded and the asyncio handler, "
+                             "or test the multicast mode with many agents")
+    args = parser.parse_args()
+    if args.mode == 'stress':
+        stress_test()
+    elif args.mode == 'benchmark':
+        benchmark()
+    elif args.mode == 'jitter':
+        jitter_benchmark()
+    else:
+        multicast_test()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,53 +1,73 @@
+import os
+import sys
 import time 
 import math
 import random
+import asyncio
 from spherov2 import scanner
 from spherov2.toy.bolt import BOLT
 from spherov2.sphero_edu import EventType, SpheroEduAPI
 from spherov2.types import Color
-from threading import Thread
+from threading import Thread, Lock
+
+# shared neighbourhood helpers live in the Boid Swarm folder
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Boid Swarm'))
+from neighbourhood import make_neighbour_index, get_neighbourhood_masks
+from swarm_snapshot import SwarmSnapshot
+from sensor_stream import SensorStream
+from command_coalescer import CommandCoalescer
+# the RVR log index, its assets folder is on the path through neighbourhood
+from Log_Index import LogIndexWriter
+from async_swarm import run_swarm, SimulatedToy, SimulatedEduAPI
 
 class Swarm:
 
+    # the boids loop every 0.25 s, the snapshot is read again once it is older than that
+    SNAPSHOT_MAX_AGE = 0.25
+
     def __init__(self):
         self.boids = []
-        self.log = open("swarm_log_red_comms.txt", 'w')
+        # '\n' line ends on every platform, the index counts the bytes of each line
+        self.log = open("swarm_log_red_comms.txt", 'w', newline='\n')
+        self.log_index = LogIndexWriter("swarm_log_red_comms.txt")
+        self.log_lock = Lock()
+        self.snapshot = SwarmSnapshot(make_neighbour_index(), Swarm.SNAPSHOT_MAX_AGE)
 
     # add to a list of active boids
     def add_boid(self, boid):
         self.boids.append(boid)
 
+    # read every boid once per tick into the shared snapshot, whichever boid gets there first
+    def update_snapshot(self):
+        boids = list(self.boids)
+        self.snapshot.refresh_if_stale(boids, [boid.sensors for boid in boids])
+
+    # read every boid into the snapshot now, used when one loop drives all the boids on a common tick
+    def refresh_snapshot(self):
+        boids = list(self.boids)
+        self.snapshot.refresh(boids, [boid.sensors for boid in boids])
+
+    # return (boid, x, y, heading, speed) from the snapshot for the boids within the given radius of given position
+    def get_candidates(self, x, y, radius):
+        return self.snapshot.get_candidates(x, y, radius)
+
     # return average boid stats (coms and avg vel) of boids within the three radii of interest wrt given position
     def get_neighbourhood_stats(self, name, x, y, rad_c, rad_s, rad_a, vision_theta):
-        x_com_c = 0
-        y_com_c = 0
-        x_com_s = 0
-        y_com_s = 0
+        candidates = [candidate for candidate in self.get_candidates(x, y, max(rad_c, rad_s, rad_a)) if candidate[0].toy.name != name]
+        masks = get_neighbourhood_masks(x, y, [[candidate[1], candidate[2]] for candidate in candidates], rad_c, rad_s, rad_a, vision_theta)
+        cohesion, separation, alignment = [[candidate for candidate, inside in zip(candidates, mask) if inside] for mask in masks]
+        x_com_c = sum(neighbour[1] for neighbour in cohesion)
+        y_com_c = sum(neighbour[2] for neighbour in cohesion)
+        x_com_s = sum(neighbour[1] for neighbour in separation)
+        y_com_s = sum(neighbour[2] for neighbour in separation)
         x_vec_a = 0
         y_vec_a = 0
-        num_boids_c = 0
-        num_boids_a = 0
-        num_boids_s = 0
-        for boid in self.boids:
-            if boid.toy.name != name:
-                xb = boid.api.get_location()['x']
-                yb = boid.api.get_location()['y']
-                dist = Swarm.get_distance(x, y, xb, yb)
-                dir = 180*math.atan2(x-xb, y-yb)/math.pi
-                if dist < rad_c and dir < vision_theta/2 and dir > -(vision_theta/2):
-                    x_com_c = x_com_c + xb
-                    y_com_c = y_com_c + yb
-                    num_boids_c = num_boids_c + 1
-                if dist < rad_s and dir < vision_theta/2 and dir > -(vision_theta/2):
-                    x_com_s = x_com_s + xb
-                    y_com_s = y_com_s + yb
-                    num_boids_s = num_boids_s + 1
-                if dist < rad_a and dir < vision_theta/2 and dir > -(vision_theta/2):
-                    thetab = boid.api.get_heading()
-                    speedb = boid.api.get_speed()
-                    x_vec_a = x_vec_a + speedb*math.sin(math.radians(thetab))
-                    y_vec_a = y_vec_a + speedb*math.cos(math.radians(thetab))
-                    num_boids_a = num_boids_a + 1
+        for _, _, _, thetab, speedb in alignment:
+            x_vec_a = x_vec_a + speedb*math.sin(math.radians(thetab))
+            y_vec_a = y_vec_a + speedb*math.cos(math.radians(thetab))
+        num_boids_c = len(cohesion)
+        num_boids_s = len(separation)
+        num_boids_a = len(alignment)
         result = [0, 0, 0, 0, 0, 0, 0, 0, 0] # format is c_com_x, c_com_y, s_com_x, s_com_y, a_vel_x, a_vel_y, n_c, n_s, n_a
         if num_boids_c > 0: # only return a value if there are boids nearby other than me
             result[0] = x_com_c/num_boids_c
@@ -63,11 +83,16 @@ class Swarm:
             result[8] = num_boids_a
         return result
 
+    # data is one log line, starting with its timestamp and robot name
     def log_data(self, data):
-        self.log.write(data)
+        t, name = data.split(', ', 2)[:2]
+        with self.log_lock:
+            self.log.write(data)
+            self.log_index.add(int(t), name, len(data.encode()))
 
     def finalise(self):
         self.log.close()
+        self.log_index.close()
 
     @staticmethod
     def get_distance(x1, y1, x2, y2):
@@ -100,74 +125,101 @@ class Boid:
         self.Vmin = 70
         self.Vmax = 80
         
+    # connect-time setup once the api is open: start the sensor stream and join the swarm
+    def attach(self, api):
+        self.api = api
+        self.commands = CommandCoalescer(api, self.toy)
+        self.sensors = SensorStream(self.toy, api, self.commands)
+        self.sensors.start()
+        self.swarm.add_boid(self)
+
+    # start rolling at a random heading and speed, return the speed
+    def launch(self):
+        theta = random.randint(-45, 45)
+        speed = random.randint(self.Vmin, self.Vmax)
+        self.commands.set_heading(theta)
+        self.commands.set_speed(speed)
+        self.commands.flush()
+        return speed
+
+    # one control iteration: flocking forces, new heading and speed, wall reflection, sent as one roll command
+    def step(self):
+        try:
+            # current position and orientation of robot
+            location = self.sensors.get_location()
+            x = location['x']
+            y = location['y']
+            speed = self.commands.get_speed()
+            theta = self.commands.get_heading()
+            data = str(time.time_ns()) + ", " + self.toy.name + ", " + str(x) + ", " + str(y) + ", " + str(speed) + ", " + str(theta) + ", "
+        
+            # modify target according to cohesion, separation and alignment rules
+            self.swarm.update_snapshot()
+            stats = self.swarm.get_neighbourhood_stats(self.toy.name, x, y, self.Rc, self.Rs, self.Ra, self.vision_theta)
+            forces = [[speed*math.sin(math.radians(theta)), speed*math.cos(math.radians(theta))], [stats[0]-x, stats[1]-y], [x-stats[2], y-stats[3]], [stats[4], stats[5]]]
+            weights = [1, self.Wc, self.Ws, self.Wa]
+            data = data + str(self.Wa*stats[4]) + ", " + str(self.Wa*stats[5]) + ", " + str(self.Wc*(stats[0]-x)) + ", " + str(self.Wc*(stats[1]-y)) + ", "
+            data = data + str(self.Ws*(x-stats[2])) + ", " + str(self.Ws*(y-stats[3])) + ", " + str(stats[8]) + ", " + str(stats[6]) + ", " + str(stats[7]) + "\n"
+            self.swarm.log_data(data)
+      
+            combined_vel = Swarm.weighted_sum_forces(forces, weights) 
+            # print('vx vy ' + str(combined_vel[0]) + ', ' + str(combined_vel[1]))
+            combined_speed = math.sqrt(combined_vel[0]*combined_vel[0] + combined_vel[1]*combined_vel[1])
+            combined_head = math.degrees(math.atan2(combined_vel[0], combined_vel[1]))
+            # print('comb speed ' + str(combined_speed) + ' ' + str(combined_head))                 
+            self.commands.set_heading(int(combined_head))
+            theta = combined_head
+
+            if combined_speed > self.Vmin and combined_speed < self.Vmax:
+                self.commands.set_speed(int(combined_speed))
+            elif combined_speed < self.Vmin:
+                self.commands.set_speed(self.Vmin)
+            else:
+                self.commands.set_speed(self.Vmax)
+                         
+            # calculate a predicted target 50cm in front of self
+            location = self.sensors.get_location()
+            x = location['x']
+            y = location['y']
+            theta = self.commands.get_heading()    
+                        
+            target_x = x + self.WAYPOINT_RANGE*math.sin(math.radians(theta))
+            target_y = y + self.WAYPOINT_RANGE*math.cos(math.radians(theta))
+        
+            # wall reflection if target will be 'out of bounds'
+            if target_x > 120 or target_x < -120:
+                self.commands.set_heading(-theta)
+                theta = -theta        
+                target_x = x + self.WAYPOINT_RANGE*math.sin(math.radians(theta))
+                target_y = y + self.WAYPOINT_RANGE*math.cos(math.radians(theta))    
+
+            if target_y > 120 or target_y < 0:
+                self.commands.set_heading(180-theta)
+                theta = 180-theta
+
+            self.commands.flush()
+        except:
+            print('exception, moving on')
+
     def run_boid(self, delay):
-        with SpheroEduAPI(self.toy) as self.api:
+        with SpheroEduAPI(self.toy) as api:
             time.sleep(5)
-            self.swarm.add_boid(self)
-            theta = random.randint(-45, 45)
-            speed = random.randint(self.Vmin, self.Vmax)
-            self.api.set_heading(theta)
-            self.api.set_speed(speed)
+            self.attach(api)
+            speed = self.launch()
             time.sleep(1)
-            self.api.set_speed(0)
+            self.commands.set_speed(0)
+            self.commands.flush()
             time.sleep(delay)
-            self.api.set_speed(speed)
+            self.commands.set_speed(speed)
+            self.commands.flush()
             try:
                 for count in range(0, 480):
-                    try:
-                        # current position and orientation of robot
-                        x = self.api.get_location()['x']
-                        y = self.api.get_location()['y']
-                        speed = self.api.get_speed()
-                        theta = self.api.get_heading()
-                        data = str(time.time_ns()) + ", " + self.toy.name + ", " + str(x) + ", " + str(y) + ", " + str(speed) + ", " + str(theta) + ", "
-                    
-                        # modify target according to cohesion, separation and alignment rules
-                        stats = self.swarm.get_neighbourhood_stats(self.toy.name, x, y, self.Rc, self.Rs, self.Ra, self.vision_theta)
-                        forces = [[speed*math.sin(math.radians(theta)), speed*math.cos(math.radians(theta))], [stats[0]-x, stats[1]-y], [x-stats[2], y-stats[3]], [stats[4], stats[5]]]
-                        weights = [1, self.Wc, self.Ws, self.Wa]
-                        data = data + str(self.Wa*stats[4]) + ", " + str(self.Wa*stats[5]) + ", " + str(self.Wc*(stats[0]-x)) + ", " + str(self.Wc*(stats[1]-y)) + ", "
-                        data = data + str(self.Ws*(x-stats[2])) + ", " + str(self.Ws*(y-stats[3])) + ", " + str(stats[8]) + ", " + str(stats[6]) + ", " + str(stats[7]) + "\n"
-                        self.swarm.log_data(data)
-                  
-                        combined_vel = Swarm.weighted_sum_forces(forces, weights) 
-                        # print('vx vy ' + str(combined_vel[0]) + ', ' + str(combined_vel[1]))
-                        combined_speed = math.sqrt(combined_vel[0]*combined_vel[0] + combined_vel[1]*combined_vel[1])
-                        combined_head = math.degrees(math.atan2(combined_vel[0], combined_vel[1]))
-                        # print('comb speed ' + str(combined_speed) + ' ' + str(combined_head))                 
-                        self.api.set_heading(int(combined_head))
-                        theta = combined_head
-
-                        if combined_speed > self.Vmin and combined_speed < self.Vmax:
-                            self.api.set_speed(int(combined_speed))
-                        elif combined_speed < self.Vmin:
-                            self.api.set_speed(self.Vmin)
-                        else:
-                            self.api.set_speed(self.Vmax)
-                                     
-                        # calculate a predicted target 50cm in front of self
-                        x = self.api.get_location()['x']
-                        y = self.api.get_location()['y']
-                        theta = self.api.get_heading()    
-                                    
-                        target_x = x + self.WAYPOINT_RANGE*math.sin(math.radians(theta))
-                        target_y = y + self.WAYPOINT_RANGE*math.cos(math.radians(theta))
-                    
-                        # wall reflection if target will be 'out of bounds'
-                        if target_x > 120 or target_x < -120:
-                            self.api.set_heading(-theta)
-                            theta = -theta        
-                            target_x = x + self.WAYPOINT_RANGE*math.sin(math.radians(theta))
-                            target_y = y + self.WAYPOINT_RANGE*math.cos(math.radians(theta))    
-  
-                        if target_y > 120 or target_y < 0:
-                            self.api.set_heading(180-theta)
-                            theta = 180-theta
-                    except:
-                        print('exception, moving on')
+                    self.step()
                     time.sleep(0.25)
             except KeyboardInterrupt:
                 print('Interrupted')
+            self.commands.stop()
+            print(self.toy.name + ': ' + self.commands.summary())
             
 
 def main():
@@ -196,6 +248,27 @@ def main():
 
     except KeyboardInterrupt:
         print('Interrupted')
+
+
+
+# same swarm driven by one asyncio loop: all toys connected at once and stepped together every 0.25 s
+# simulate runs on stand-in toys, stagger gives that many seconds to place each robot before the start
+def main_async(simulate=False, stagger=0):
+    try:
+        names = ['SB-B85A', 'SB-8427', 'SB-B11E']
+        if simulate:
+            toys = [SimulatedToy(name, random.uniform(-50, 50), random.uniform(0, 100)) for name in names]
+        else:
+            toys = scanner.find_toys(toy_names=names)
+        print('found ' + str(len(toys)) + ' toys.')
+
+        swarm = Swarm()
+        boids = [Boid(swarm, toy) for toy in toys]
+        asyncio.run(run_swarm(swarm, boids, SimulatedEduAPI if simulate else SpheroEduAPI, 480, 0.25, stagger))
+        swarm.finalise()
+
+    except KeyboardInterrupt:
+        print('Interrupted')
    
             
 if __name__ == '__main__':
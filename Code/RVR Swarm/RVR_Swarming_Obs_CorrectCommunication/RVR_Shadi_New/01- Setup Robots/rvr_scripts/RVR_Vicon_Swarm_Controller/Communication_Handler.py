@@ -5,6 +5,9 @@ The Communication_Handler class is the central component of a networked communic
 interaction between devices. It plays a pivotal role in message exchange, robot monitoring, and graceful termination
 signal handling. This class serves as the backbone for developing sophisticated networked applications, providing
 a robust foundation for building collaborative systems that rely on effective communication and real-time monitoring.
+Async_Communication_Handler does the same on the asyncio event loop of the Agent, without threads.
+Multicast_Communication_Handler sends each message once as a UDP multicast (or broadcast) datagram instead.
+The stress test and the benchmarks of these handlers are in Code/Comms Test/comm_benchmarks.py.
 
 @ author            Reda Ghanem
 @ version           1.0
@@ -13,19 +16,31 @@ a robust foundation for building collaborative systems that rely on effective co
 
 # ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
 
+import asyncio
 import socket
+import struct
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
 import atexit
+import ipaddress
 import platform
 import os
+import selectors
 
 # ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
 
 # Flag to enable or disable print Exception Errors
 print_exception_errors_flag = False
 
+# Every message is sent as a frame: its length in bytes (4 bytes, big-endian), then the message
+LENGTH_PREFIX = struct.Struct(">I")
+
+# A multicast datagram starts with the sequence number of the sender (4 bytes) and the length of its name (1 byte),
+# then the name and the message
+DATAGRAM_HEADER = struct.Struct(">IB")
+# Default multicast group (administratively scoped, it stays inside the local network)
+MULTICAST_GROUP = "239.255.77.1"
+
 # ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
 # ┃-------------------- # Communication_Handler Class # -----------------------┃ #
 # ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
@@ -38,12 +53,14 @@ class Communication_Handler:
     #       - host (str): The IP address of the Agent.
     #       - neighbors_ips (list): List of IP addresses of neighboring robots.
     #       - port (int): The port to use for communication (default is 12345).
-    def __init__(self, robot_name='', host='', neighbors_ips='', port=12345):
+    #       - message_listener (function): called as message_listener(sender_ip, message) for every received message (default is None).
+    def __init__(self, robot_name='', host='', neighbors_ips='', port=12345, message_listener=None):
 
         self.robot_name = robot_name
         self.host = host
         self.neighbors_ips = neighbors_ips
         self.port = port
+        self.message_listener = message_listener
 
         # Set the buffer size for data transmission
         self.buffer_size = 1024
@@ -71,7 +88,7 @@ class Communication_Handler:
         self.is_running = True
 
         # Initialize server and client sides
-        self.server_side = ServerSide(self.robot_name, self.host, self.port)
+        self.server_side = ServerSide(self.robot_name, self.host, self.port, message_listener=self.message_listener)
         self.client_side = ClientSide(self.robot_name, self.neighbors_ips, self.port)
 
         # Create and start threads for server and client sides
@@ -91,14 +108,21 @@ class Communication_Handler:
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
     # Function to send a message to all connected clients via the client side.
     # Parameters:
-    #       - data (str): The message to be sent to all connected neighbors.
+    #       - data (bytes or str): The message to be sent to all connected neighbors.
     def send_message_to_all(self, data):
         # Delegates the task to the corresponding method in the client side
         self.client_side.send_message_to_all_hosts(data)
 
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to retrieve the send counters of every neighbor from the client side
+    # Returns 'dict': IP address to {'sent', 'superseded', 'dropped'} message counts.
+    def get_send_counters(self):
+        # Delegates the task to the corresponding method in the client side
+        return self.client_side.get_send_counters()
+
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
     # Function to retrieve a list of all the last received messages from the server side
-    # Returns 'list': A list of tuples where each tuple contains (sender_ip, message).
+    # Returns 'list': A list of tuples where each tuple contains (sender_ip, message), the messages are bytes.
     def get_last_received_messages(self):
         # Delegates the task to the corresponding method in the server side
         return self.server_side.get_last_received_messages_from_clients()
@@ -141,6 +165,117 @@ class Communication_Handler:
             print_exception_errors(f"Error while calling handle_termination: {str(e)}")
 
 
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+# ┃------------------------ # FrameReceiver Class # ---------------------------┃ #
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+
+class FrameReceiver:
+    # Bytes received in one go, enough for hundreds of state messages
+    BUFFER_SIZE = 65536
+    # Largest frame accepted, a larger length prefix means the stream is broken
+    MAX_FRAME_SIZE = 1 << 20
+
+    # Initialize the FrameReceiver, reads the length prefixed frames of one connection.
+    # TCP can split a frame over several reads or put several frames in one read, so the bytes are received
+    # with recv_into into one preallocated buffer and only complete frames are taken out of it.
+    # Parameters:
+    #       - client_socket: the connected socket, None when the bytes are received by an asyncio transport.
+    #       - buffer_size (int): bytes of the receive buffer, it grows for a frame that does not fit.
+    def __init__(self, client_socket, buffer_size=BUFFER_SIZE):
+        self.client_socket = client_socket
+        self.buffer = bytearray(buffer_size)
+        self.view = memoryview(self.buffer)
+        self.start = 0              # first byte not taken out yet
+        self.end = 0                # end of the received bytes
+        self.frames = 0             # complete frames received
+        self.skipped = 0            # frames replaced by a newer one of the same read
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to receive what the socket has (waits for at least one byte), raises ConnectionError when closed
+    def fill(self):
+        self.received(self.client_socket.recv_into(self.free_space()))
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to get the free part of the buffer to receive into, making room first when the buffer is full
+    # Returns a memoryview of the free bytes
+    def free_space(self):
+        if self.start == self.end:
+            self.start = self.end = 0
+        elif self.end == len(self.buffer):
+            # move the part of a frame received so far to the front, and grow the buffer if the frame is too large
+            needed = LENGTH_PREFIX.size
+            if self.end - self.start >= LENGTH_PREFIX.size:
+                needed += LENGTH_PREFIX.unpack_from(self.buffer, self.start)[0]
+            pending = self.end - self.start
+            if needed > len(self.buffer):
+                self.buffer = self.buffer[self.start:self.end] + bytearray(needed - pending)
+                self.view = memoryview(self.buffer)
+            else:
+                self.view[:pending] = self.view[self.start:self.end]
+            self.start, self.end = 0, pending
+        return self.view[self.end:]
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to add the bytes received into free_space(), raises ConnectionError for 0 bytes (connection closed)
+    # Parameters:
+    #       - received (int): number of bytes received.
+    def received(self, received):
+        if received == 0:
+            raise ConnectionError("connection closed by the client")
+        self.end += received
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to take the next complete frame out of the buffer
+    # Returns (offset, length) of the frame in the buffer, or None when no complete frame is buffered
+    def next_frame(self):
+        if self.end - self.start < LENGTH_PREFIX.size:
+            return None
+        length = LENGTH_PREFIX.unpack_from(self.buffer, self.start)[0]
+        if length > self.MAX_FRAME_SIZE:
+            raise ValueError(f"frame of {length} bytes, the stream is broken")
+        if self.end - self.start - LENGTH_PREFIX.size < length:
+            return None
+        offset = self.start + LENGTH_PREFIX.size
+        self.start = offset + length
+        self.frames += 1
+        return offset, length
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to receive the next frame, waits until it is complete (ex. the name sent first by a client)
+    # Returns the frame (bytes)
+    def receive_frame(self):
+        frame = self.next_frame()
+        while frame is None:
+            self.fill()
+            frame = self.next_frame()
+        offset, length = frame
+        return bytes(self.view[offset:offset + length])
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to receive once and keep only the newest complete frame, older frames of the same read are skipped
+    # Returns the newest frame (bytes), or None when the read completed no frame
+    def receive_newest(self):
+        self.fill()
+        return self.newest_frame()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to take every complete frame out of the buffer and keep only the newest, without receiving
+    # Returns the newest frame (bytes), or None when no complete frame is buffered
+    def newest_frame(self):
+        newest = None
+        frame = self.next_frame()
+        while frame is not None:
+            if newest is not None:
+                self.skipped += 1
+            newest = frame
+            frame = self.next_frame()
+        if newest is None:
+            return None
+        offset, length = newest
+        # the only copy of the read, the buffer is reused by the next one
+        return bytes(self.view[offset:offset + length])
+
+
 # ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
 # ┃------------------------- # ServerSide Class # -----------------------------┃ #
 # ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
@@ -152,7 +287,8 @@ class ServerSide:
     #       - host (str): The IP address of the server.
     #       - port (int): The port to use for server communication.
     #       - buffer_size (int): Size of the buffer for receiving messages (default is 1024).
-    def __init__(self, robot_name, host, port=12345, buffer_size=1024):
+    #       - message_listener (function): called as message_listener(sender_ip, message) for every received message (default is None).
+    def __init__(self, robot_name, host, port=12345, buffer_size=1024, message_listener=None):
         """
 
         """
@@ -160,6 +296,7 @@ class ServerSide:
         self.host = host
         self.port = port
         self.buffer_size = buffer_size
+        self.message_listener = message_listener
 
         # Create a TCP socket for server communication
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -167,11 +304,13 @@ class ServerSide:
         # Set socket option to allow reusing the address immediately after the server is terminated
         self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 
-        # Set the timeout for the server socket, so each 1 sec out from server_socket.accept()
-        self.server_socket.settimeout(1)  # 1 second timeout (adjust as needed)
+        # The server socket and every client socket are non-blocking and watched by one selector (epoll on Linux),
+        # so a single thread accepts the clients and receives from all of them
+        self.server_socket.setblocking(False)
+        self.selector = selectors.DefaultSelector()
 
-        # Initialize thread for accept_clients function
-        self.accept_clients_thread = None
+        # Initialize thread for serve_clients function
+        self.serve_clients_thread = None
 
         # Dictionary to store information about connected clients (IP as key)
         self.clients = {}
@@ -190,82 +329,101 @@ class ServerSide:
         self.is_running_lock = threading.Lock()
 
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
-    # Function to accept incoming client connections
-    def accept_clients(self):
+    # Function to accept clients and receive their messages, in one thread until the server side is terminated
+    def serve_clients(self):
         while True:
             with self.is_running_lock:
                 if not self.is_running:
                     break
 
-            try:
-                # Accept incoming client connections
-                client_socket, client_address = self.server_socket.accept()
-
-                # Extract client IP address from the client address tuple
-                client_ip = client_address[0]
+            # Wait for a new connection or data from a client, each 1 sec out to check is_running
+            for key, events in self.selector.select(timeout=1):
+                if key.data is None:
+                    self.accept_client()
+                else:
+                    self.handle_client(key.fileobj, key.data)
 
-                # Check if the client is not already in the clients dictionary
-                if client_ip not in self.clients:
-                    # Receive the client's name sent by the client
-                    client_name = client_socket.recv(self.buffer_size).decode().strip()
+        # Close the sockets of the clients and of the server
+        with self.clients_update_lock:
+            for client_ip in list(self.clients.keys()):
+                self.remove_client(self.clients[client_ip]['socket'], client_ip)
+        self.selector.close()
+        self.server_socket.close()
 
-                    # Print information about the new connection
-                    print(f"New connection from {client_name} at {client_ip}")
-
-                    # Create a new thread to handle the client and pass it to the handle_client method
-                    client_thread = threading.Thread(target=self.handle_client, args=(client_socket, client_ip),
-                                                     daemon=True)
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to accept an incoming client connection, called when the server socket is readable
+    def accept_client(self):
+        try:
+            # Accept incoming client connections
+            client_socket, client_address = self.server_socket.accept()
+        except (BlockingIOError, InterruptedError):
+            # Another attempt took the connection (ex. the client gave up)
+            return
+        except OSError as e:
+            # Handle errors while accepting client connections
+            print_exception_errors(f"Error while accepting client connection: {str(e)}")
+            return
 
-                    # Update the clients dictionary with client information (name, socket, thread)
-                    with self.clients_update_lock:
-                        self.clients[client_ip] = {'name': client_name, 'socket': client_socket,
-                                                   'thread': client_thread}
+        # Extract client IP address from the client address tuple
+        client_ip = client_address[0]
 
-                    # Start the thread to handle the client
-                    client_thread.start()
+        # Check if the client is not already in the clients dictionary, one connection per client
+        if client_ip in self.clients:
+            client_socket.close()
+            return
 
-            except socket.timeout:
-                # Handle timeout (no incoming connection during the specified timeout)
-                pass
-
-            except OSError as e:
-                # Handle errors while accepting client connections
-                with self.is_running_lock:
-                    if not self.is_running:
-                        break
-                print_exception_errors(f"Error while accepting client connection: {str(e)}")
+        # The client's name comes as its first frame, handle_client reads it when it arrives
+        client_socket.setblocking(False)
+        with self.clients_update_lock:
+            self.clients[client_ip] = {'name': None, 'socket': client_socket, 'receiver': FrameReceiver(client_socket)}
+        self.selector.register(client_socket, selectors.EVENT_READ, data=client_ip)
 
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
-    # Function to handle communication with a client.
-    
+    # Function to handle communication with a client, called when its socket is readable.
+    # Each read takes every complete frame the client sent since the last one and keeps only the newest, a state
+    # message replaces the older ones of the same sender, so a slow loop gets the latest state instead of a backlog.
+    # Parameters:
+    #       - client_socket: The socket object of the client.
+    #       - client_address: The IP address of the client.
     def handle_client(self, client_socket, client_address):
-        while True:
-            with self.is_running_lock:
-                if not self.is_running:
-                    break
-
-            try:
-                # Receive message_length_bytes from the client
-                message_length_bytes = client_socket.recv(4)
-                message_length = int.from_bytes(message_length_bytes, byteorder='big')
-
-                # Check if message_length_bytes is received
-                if message_length_bytes:
-                    # Decode the received message
-                    message = client_socket.recv(message_length).decode()
-
-                    # Update the last received messages with the client's address and message
-                    self.last_received_messages[client_address] = message
-            except Exception as e:
-                # Handle errors while receiving data from the client
-                print_exception_errors(f"Error while receiving data from {client_address}: {str(e)}")
+        client = self.clients[client_address]
+        receiver = client['receiver']
+        try:
+            receiver.fill()
+
+            # Receive the client's name, the first frame sent by the client
+            if client['name'] is None:
+                frame = receiver.next_frame()
+                if frame is None:
+                    return
+                offset, length = frame
+                client['name'] = bytes(receiver.view[offset:offset + length]).decode().strip()
+
+                # Print information about the new connection
+                print(f"New connection from {client['name']} at {client_address}")
+
+            # Receive the newest complete message, kept as bytes (ex. a binary state message)
+            message = receiver.newest_frame()
+
+            # Check if a complete message is received
+            if message is not None:
+                # Update the last received messages with the client's address and message
+                self.last_received_messages[client_address] = message
+
+                # Pass the message on as it arrives (ex. to NeighborAggregates)
+                if self.message_listener is not None:
+                    self.message_listener(client_address, message)
+        except (BlockingIOError, InterruptedError):
+            # Nothing to read after all, wait for the next event
+            pass
+        except Exception as e:
+            # Handle errors while receiving data from the client
+            print_exception_errors(f"Error while receiving data from {client_address}: {str(e)}")
 
-                # Remove the client from the clients dictionary and close its socket
+            # Remove the client from the clients dictionary and close its socket
+            with self.clients_update_lock:
                 self.remove_client(client_socket, client_address)
 
-                # Exit the loop
-                break
-
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
     # Function to retrieve a list of all the last received messages from all senders
     # Returns 'list': A list of tuples where each tuple contains (sender_ip, message).
@@ -284,10 +442,12 @@ class ServerSide:
             if client == client_address:
                 # Print a message indicating the lost connection
                 print(f"Connection with {client} lost")
-                # Remove the client from the dictionary
+                # Remove the client from the dictionary, and its last message, it is no longer up to date
                 self.clients.pop(client)
+                self.last_received_messages.pop(client, None)
                 break
-        # Close the socket associated with the disconnected client
+        # Stop watching and close the socket associated with the disconnected client
+        self.selector.unregister(client_socket)
         client_socket.close()
 
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
@@ -329,9 +489,10 @@ class ServerSide:
             self.server_socket.listen()
             # Print a message indicating that the server is listening for messages
             print(f"{self.robot_name} Listening for messages on {self.host}:{self.port}")
-            # Create a thread to accept incoming clients
-            self.accept_clients_thread = threading.Thread(target=self.accept_clients, daemon=True)
-            self.accept_clients_thread.start()
+            # Create the thread that accepts the clients and receives from all of them
+            self.selector.register(self.server_socket, selectors.EVENT_READ, data=None)
+            self.serve_clients_thread = threading.Thread(target=self.serve_clients, daemon=True)
+            self.serve_clients_thread.start()
 
         except OSError as e:
             if e.errno == 98:  # Address already in use
@@ -352,14 +513,64 @@ class ServerSide:
         with self.is_running_lock:
             self.is_running = False
 
-        # Wait for the accept thread to finish if it exists
-        if hasattr(self, 'accept_clients_thread'):
-            self.accept_clients_thread.join()
+        # Wait for the serve thread to finish if it exists
+        if self.serve_clients_thread is not None:
+            self.serve_clients_thread.join()
 
         # Print a message indicating that the server side has been terminated
         print("ServerSide terminated.")
 
 
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+# ┃--------------------------- # Outbox Class # -------------------------------┃ #
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+
+class Outbox:
+    # Initialize the Outbox, holds the one message waiting to be sent to a neighbor.
+    # A new message replaces a waiting one (latest wins), so a neighbor that does not keep up gets the newest state
+    # when it catches up instead of a queue of old ones, and the memory used does not grow.
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.message = None             # the waiting message, None when empty
+        self.closed = False
+        self.sent = 0                   # messages sent
+        self.superseded = 0             # messages replaced by a newer one before they were sent
+        self.dropped = 0                # messages not sent because the neighbor was not connected or the send failed
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to put a message in the outbox, replacing the waiting one
+    def put(self, message):
+        with self.condition:
+            if self.message is not None:
+                self.superseded += 1
+            self.message = message
+            self.condition.notify()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to take the waiting message out, waits for one
+    # Returns the message, or None once the outbox is closed and empty
+    def take(self):
+        with self.condition:
+            while self.message is None and not self.closed:
+                self.condition.wait()
+            message = self.message
+            self.message = None
+            return message
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to count a message that was not sent, called by the control loop and the sender thread
+    def drop(self):
+        with self.condition:
+            self.dropped += 1
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to close the outbox, take returns None after the waiting message
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
 # ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
 # ┃------------------------- # ClientSide Class # -----------------------------┃ #
 # ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
@@ -392,8 +603,10 @@ class ClientSide:
         # Lock for synchronizing access to is_running
         self.is_running_lock = threading.Lock()
 
-        # Executor for managing parallel tasks related to neighbors.
-        self.executor = ThreadPoolExecutor(max_workers=len(neighbors_ips))
+        # One outbox and one sender thread per neighbor, a neighbor that stalls holds up only its own thread
+        self.outboxes = {neighbor: Outbox() for neighbor in neighbors_ips}
+        self.send_threads = {neighbor: threading.Thread(target=self.send_from_outbox, args=(neighbor,), daemon=True)
+                             for neighbor in neighbors_ips}
 
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
     # Function to establish connections to neighboring hosts as a client
@@ -412,11 +625,15 @@ class ClientSide:
                         # Create a new socket for each connection attempt
                         self.sockets_to_hosts[neighbor_ip] = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
                         # Set the timeout for the sockets_to_hosts[neighbor_ip], so each 1 sec out from sockets_to_hosts[neighbor_ip].connect
+                        # The timeout also applies to sending, a neighbor that takes nothing for 2 seconds is dropped
                         self.sockets_to_hosts[neighbor_ip].settimeout(2)  # 2 second timeout (adjust as needed)
+                        # Send every message at once instead of waiting to fill a packet (Nagle's algorithm)
+                        self.sockets_to_hosts[neighbor_ip].setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
                         # Connect to the neighbor's IP and port
                         self.sockets_to_hosts[neighbor_ip].connect((neighbor_ip, self.port))
-                        # Send the robot's name to the neighbor
-                        self.sockets_to_hosts[neighbor_ip].send(f"{self.robot_name}".encode())
+                        # Send the robot's name to the neighbor, framed like every message after it
+                        robot_name = f"{self.robot_name}".encode()
+                        self.sockets_to_hosts[neighbor_ip].sendall(LENGTH_PREFIX.pack(len(robot_name)) + robot_name)
                         self.connected_to_host[neighbor_ip] = True
                         print(f"Connected to the host at {neighbor_ip}:{self.port}")
 
@@ -434,27 +651,56 @@ class ClientSide:
             time.sleep(1)
 
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
-    # Function to send a message to all connected hosts
-    
+    # Function to send a message to all connected hosts, puts it in the outbox of every connected neighbor and returns
+    # Parameters:
+    #       - message (bytes or str): The message to be sent to all connected neighbors.
     def send_message_to_all_hosts(self, message):
-        def send_message(ip):
+        # the length prefix counts bytes, text messages are encoded first
+        if isinstance(message, str):
+            message = message.encode()
+        # the length prefix and the message go out in one sendall
+        frame = LENGTH_PREFIX.pack(len(message)) + message
+
+        for ip, outbox in self.outboxes.items():
+            if self.connected_to_host[ip]:
+                outbox.put(frame)
+            else:
+                outbox.drop()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to send the messages of the outbox of a neighbor, runs in the sender thread of the neighbor
+    # Parameters:
+    #       - ip (str): The IP address of the neighbor.
+    def send_from_outbox(self, ip):
+        outbox = self.outboxes[ip]
+        while True:
+            frame = outbox.take()
+            if frame is None:
+                break
+
+            # Check if still connected to the neighbor
+            if not self.connected_to_host[ip]:
+                outbox.drop()
+                continue
+            # the socket the message goes to, connect_to_neighbors_as_client replaces it once the neighbor is dropped
+            host_socket = self.sockets_to_hosts[ip]
             try:
-                # Check if still connected to the neighbor
-                if self.connected_to_host[ip]:
-                    # Send the message to the connected neighbor
-                    message_length = len(message)
-                    self.sockets_to_hosts[ip].send(message_length.to_bytes(4, byteorder='big'))
-                    self.sockets_to_hosts[ip].send(message.encode())
+                # Send the message to the connected neighbor
+                host_socket.sendall(frame)
+                outbox.sent += 1
             except Exception as e:
-                # Handle errors during message sending
+                # Handle errors during message sending, connect_to_neighbors_as_client connects again
                 print_exception_errors(f"Error sending message to {ip}: {str(e)}")
+                outbox.drop()
+                host_socket.close()
                 self.connected_to_host[ip] = False
-                self.sockets_to_hosts[ip].close()
 
-        # Get a list of all connected neighbors' IPs
-        all_hosts_ips = list(self.sockets_to_hosts.keys())
-        # Use ThreadPoolExecutor to concurrently send messages to all connected neighbors
-        self.executor.map(send_message, all_hosts_ips)
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to retrieve the send counters of every neighbor
+    # Returns 'dict': IP address to {'sent', 'superseded', 'dropped'} message counts.
+    def get_send_counters(self):
+        return {ip: {'sent': outbox.sent, 'superseded': outbox.superseded, 'dropped': outbox.dropped}
+                for ip, outbox in self.outboxes.items()}
 
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
     # Function to start the client side
@@ -464,6 +710,10 @@ class ClientSide:
                                                                       daemon=True)
         self.connect_to_neighbors_as_client_thread.start()
 
+        # Start the sender thread of every neighbor
+        for send_thread in self.send_threads.values():
+            send_thread.start()
+
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
     # Function to handle termination of the client side
     def terminating_clientside(self):
@@ -475,9 +725,469 @@ class ClientSide:
         if hasattr(self, 'connect_to_neighbors_as_client_thread'):
             self.connect_to_neighbors_as_client_thread.join()
 
+        # Stop the sender threads, a sender blocked on a stalled neighbor returns at its send timeout
+        for outbox in self.outboxes.values():
+            outbox.close()
+        for send_thread in self.send_threads.values():
+            if send_thread.is_alive():
+                send_thread.join()
+
         print("ClientSide terminated.")
 
 
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+# ┃----------------- # Async_Communication_Handler Class # --------------------┃ #
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+
+class Async_Communication_Handler:
+    # Largest number of bytes waiting to be sent to a neighbor, a neighbor that does not keep up misses the newer
+    # messages instead of getting a growing backlog of old states
+    MAX_PENDING_BYTES = 4096
+
+    # Initialize the Async_Communication_Handler, the same as the Communication_Handler but it runs on the asyncio
+    # event loop of the Agent instead of its own threads. The server, the connections to the neighbors and every
+    # receive are callbacks of the loop, scheduled between the awaits of the control loop, and a send only puts the
+    # message in the send buffer of each connection. So there is no thread and no handoff between threads.
+    # start_communication is a coroutine, the other functions must be called from the thread of the loop.
+    # Parameters: as Communication_Handler
+    def __init__(self, robot_name='', host='', neighbors_ips='', port=12345, message_listener=None):
+
+        self.robot_name = robot_name
+        self.host = host
+        self.neighbors_ips = neighbors_ips
+        self.port = port
+        self.message_listener = message_listener
+
+        # The event loop, the server and the tasks connecting to the neighbors, set by start_communication
+        self.loop = None
+        self.server = None
+        self.connect_tasks = []
+
+        # Dictionary to store information about connected clients (IP as key)
+        self.clients = {}
+
+        # Dictionary to store the last received message from each client (IP as key)
+        self.last_received_messages = {}
+
+        # Dictionary to store the transport of the connection to each neighbor, None while not connected
+        self.transports_to_hosts = {neighbor: None for neighbor in neighbors_ips}
+
+        # Number of messages not sent to a neighbor because its send buffer was full
+        self.dropped_messages = 0
+
+        # Flag to indicate if the Async_Communication_Handler is currently running or not.
+        self.is_running = None
+
+        # Register cleanup function to be called on program exit
+        atexit.register(self.atexit_cleanup)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to Start communication: start the server and the tasks connecting to the neighbors, on the running loop
+    async def start_communication(self):
+
+        self.is_running = True
+        self.loop = asyncio.get_running_loop()
+
+        self.server = await self.loop.create_server(lambda: PeerProtocol(self), self.host, self.port,
+                                                    reuse_address=True)
+        print(f"{self.robot_name} Listening for messages on {self.host}:{self.port}")
+
+        self.connect_tasks = [self.loop.create_task(self.connect_to_neighbor(neighbor_ip))
+                              for neighbor_ip in self.neighbors_ips]
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to keep a connection to a neighbor, (re)connects every second while not connected
+    # Parameters:
+    #       - neighbor_ip (str): The IP address of the neighbor.
+    async def connect_to_neighbor(self, neighbor_ip):
+        while self.is_running:
+            transport = self.transports_to_hosts[neighbor_ip]
+            if transport is None or transport.is_closing():
+                try:
+                    # Connect to the neighbor's IP and port, 2 second timeout
+                    transport, protocol = await asyncio.wait_for(
+                        self.loop.create_connection(asyncio.Protocol, neighbor_ip, self.port), 2)
+                    # Send the robot's name to the neighbor, framed like every message after it
+                    robot_name = f"{self.robot_name}".encode()
+                    transport.write(LENGTH_PREFIX.pack(len(robot_name)) + robot_name)
+                    self.transports_to_hosts[neighbor_ip] = transport
+                    print(f"Connected to the host at {neighbor_ip}:{self.port}")
+                except (OSError, asyncio.TimeoutError) as e:
+                    # Handle errors during connection attempts
+                    print_exception_errors(f"Error connecting to {neighbor_ip}:{self.port}: {str(e)}")
+
+            # Sleep for a short duration to avoid excessive connection attempts
+            await asyncio.sleep(1)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to send a message to all connected neighbors, returns at once, the loop sends it in the background
+    # Parameters:
+    #       - data (bytes or str): The message to be sent to all connected neighbors.
+    def send_message_to_all(self, data):
+        # the length prefix counts bytes, text messages are encoded first
+        if isinstance(data, str):
+            data = data.encode()
+        frame = LENGTH_PREFIX.pack(len(data)) + data
+
+        for transport in self.transports_to_hosts.values():
+            if transport is None or transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > self.MAX_PENDING_BYTES:
+                self.dropped_messages += 1
+                continue
+            transport.write(frame)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to pass on the newest message of a client, called by its PeerProtocol
+    # Parameters:
+    #       - sender_ip (str): The IP address of the client.
+    #       - message (bytes): The message.
+    def on_message(self, sender_ip, message):
+        # Update the last received messages with the client's address and message
+        self.last_received_messages[sender_ip] = message
+
+        # Pass the message on as it arrives (ex. to NeighborAggregates)
+        if self.message_listener is not None:
+            self.message_listener(sender_ip, message)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to retrieve a list of all the last received messages
+    # Returns 'list': A list of tuples where each tuple contains (sender_ip, message), the messages are bytes.
+    def get_last_received_messages(self):
+        return list(self.last_received_messages.items())
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to Perform cleanup before exit
+    def atexit_cleanup(self):
+
+        # check if the program exit before calling handle_termination, then call it now
+        if self.is_running == True:
+            print_in_green_box("Performing cleanup for Communications before exit...")
+            self.handle_termination()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to Handle termination signals gracefully, stops the connect tasks and closes the server and connections
+    def handle_termination(self):
+
+        self.is_running = False             # set Async_Communication_Handler as inactive
+
+        try:
+            print_in_green_box(f"Terminating Async Communication of {self.robot_name}")
+
+            for connect_task in self.connect_tasks:
+                connect_task.cancel()
+            for transport in self.transports_to_hosts.values():
+                if transport is not None:
+                    transport.close()
+            for client in list(self.clients.values()):
+                client['transport'].close()
+            if self.server is not None:
+                self.server.close()
+
+            print("All Sockets closed.")
+            animate_termination()
+        except Exception as e:
+            # Handle errors while calling handle_termination (ex. the loop is already closed)
+            print_exception_errors(f"Error while calling handle_termination: {str(e)}")
+
+
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+# ┃------------------------- # PeerProtocol Class # ---------------------------┃ #
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+
+class PeerProtocol(asyncio.BufferedProtocol):
+    # Initialize the PeerProtocol, receives the frames of one client of the Async_Communication_Handler.
+    # As a BufferedProtocol the loop receives straight into the buffer of a FrameReceiver, like recv_into.
+    # Parameters:
+    #       - handler (Async_Communication_Handler): gets the newest message of every read.
+    def __init__(self, handler):
+        self.handler = handler
+        self.receiver = FrameReceiver(None)
+        self.transport = None
+        self.client_ip = None           # None until connected, and for a second connection from a known IP
+        self.client_name = None         # None until the first frame (the name) is received
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function called by the loop when a client connects
+    def connection_made(self, transport):
+        self.transport = transport
+        client_ip = transport.get_extra_info('peername')[0]
+
+        # Check if the client is not already in the clients dictionary, one connection per client
+        if client_ip in self.handler.clients:
+            transport.close()
+            return
+        self.client_ip = client_ip
+        self.handler.clients[client_ip] = {'name': None, 'transport': transport, 'receiver': self.receiver}
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function called by the loop for the buffer to receive into
+    def get_buffer(self, sizehint):
+        return self.receiver.free_space()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function called by the loop when nbytes were received into the buffer
+    def buffer_updated(self, nbytes):
+        self.receiver.received(nbytes)
+        if self.client_ip is None:
+            return
+        try:
+            # Receive the client's name, the first frame sent by the client
+            if self.client_name is None:
+                frame = self.receiver.next_frame()
+                if frame is None:
+                    return
+                offset, length = frame
+                self.client_name = bytes(self.receiver.view[offset:offset + length]).decode().strip()
+                self.handler.clients[self.client_ip]['name'] = self.client_name
+
+                # Print information about the new connection
+                print(f"New connection from {self.client_name} at {self.client_ip}")
+
+            # Pass on the newest complete message, kept as bytes (ex. a binary state message)
+            message = self.receiver.newest_frame()
+            if message is not None:
+                self.handler.on_message(self.client_ip, message)
+        except Exception as e:
+            # Handle errors while receiving data from the client (ex. a broken stream)
+            print_exception_errors(f"Error while receiving data from {self.client_ip}: {str(e)}")
+            self.transport.close()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function called by the loop when the connection is closed, removes the client
+    def connection_lost(self, exc):
+        if self.client_ip is not None and self.handler.clients.get(self.client_ip, {}).get('transport') is self.transport:
+            # Print a message indicating the lost connection
+            print(f"Connection with {self.client_ip} lost")
+            self.handler.clients.pop(self.client_ip)
+            self.handler.last_received_messages.pop(self.client_ip, None)
+
+
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+# ┃--------------- # Multicast_Communication_Handler Class # ------------------┃ #
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+
+class Multicast_Communication_Handler:
+    # Largest datagram received, a state message is a few tens of bytes
+    BUFFER_SIZE = 2048
+    # A sequence number at most this far behind the newest of its sender is a late (reordered or duplicated) datagram
+    # and is dropped, further behind means the sender restarted and counts from 1 again
+    REORDER_WINDOW = 64
+
+    # Initialize the Multicast_Communication_Handler, the same interface as the Communication_Handler but every
+    # message is sent once as a UDP datagram to a multicast group (or a broadcast address) that all robots listen to,
+    # instead of once over the TCP connection to every neighbor. A send costs one sendto whatever the number of robots.
+    # UDP can lose, duplicate or reorder datagrams, so every datagram carries the sequence number of its sender and
+    # only the newest per sender is kept. Senders are told apart by robot name, so many agents can share one host.
+    # Parameters:
+    #       - robot_name (str): The name of the robot, unique in the swarm (at most 255 bytes).
+    #       - host (str): The IP address of the Agent, the interface to send and receive on.
+    #       - neighbors_ips (list): not used, every robot in the group is heard (kept for the same interface).
+    #       - port (int): The port of the group (default is 12345).
+    #       - message_listener (function): called as message_listener(sender_name, message) for every newer message.
+    #       - group (str): the multicast group, or a broadcast address (ex. 192.168.68.255).
+    #       - messages_listener (function): called as messages_listener(messages) with the newer messages of all the
+    #                                       datagrams waiting in the socket, tuples (sender_name, message) in the order
+    #                                       received (ex. NeighborTable.on_messages), instead of message_listener.
+    def __init__(self, robot_name='', host='', neighbors_ips='', port=12345, message_listener=None,
+                 group=MULTICAST_GROUP, messages_listener=None):
+
+        self.robot_name = robot_name
+        self.host = host
+        self.neighbors_ips = neighbors_ips
+        self.port = port
+        self.message_listener = message_listener
+        self.messages_listener = messages_listener
+        self.group = group
+
+        self.name_bytes = f"{robot_name}".encode()
+        self.send_sequence = 0          # sequence number of the last datagram sent
+
+        # Sockets and receive thread, created by start_communication
+        self.send_socket = None
+        self.receive_socket = None
+        self.receive_thread = None
+
+        # Dictionary to store the last received message and its sequence number of each sender (name as key)
+        self.last_received_messages = {}
+        self.last_sequences = {}
+
+        # Counters of the received datagrams: passed on, dropped as late and dropped as broken
+        self.received_datagrams = 0
+        self.late_datagrams = 0
+        self.broken_datagrams = 0
+
+        # Flag to indicate if the Multicast_Communication_Handler is currently running or not.
+        self.is_running = None
+
+        # Register cleanup function to be called on program exit
+        atexit.register(self.atexit_cleanup)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to Start communication: open the send and receive sockets and start the receive thread
+    def start_communication(self):
+
+        self.is_running = True
+        interface = socket.inet_aton(self.host or "0.0.0.0")
+        is_multicast = ipaddress.ip_address(self.group).is_multicast
+
+        self.send_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if is_multicast:
+            # Send on the interface of host, keep it to the local network, and loop it back to agents on this host
+            self.send_socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, interface)
+            self.send_socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+            self.send_socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        else:
+            self.send_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+
+        # Every agent on the host binds the same port, so the address and port are shared
+        self.receive_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.receive_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, 'SO_REUSEPORT'):
+            self.receive_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self.receive_socket.bind(("", self.port))
+        if is_multicast:
+            self.receive_socket.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP,
+                                           socket.inet_aton(self.group) + interface)
+        # Set the timeout for the receive socket, so each 1 sec out from recvfrom_into to check is_running
+        self.receive_socket.settimeout(1)
+
+        self.receive_thread = threading.Thread(target=self.receive_datagrams, daemon=True)
+        self.receive_thread.start()
+        print(f"{self.robot_name} Listening for messages on {self.group}:{self.port}")
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to send a message to all robots, one datagram to the group
+    # Parameters:
+    #       - data (bytes or str): The message to be sent to all robots.
+    def send_message_to_all(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        self.send_sequence = (self.send_sequence + 1) & 0xFFFFFFFF
+        datagram = DATAGRAM_HEADER.pack(self.send_sequence, len(self.name_bytes)) + self.name_bytes + data
+        try:
+            self.send_socket.sendto(datagram, (self.group, self.port))
+        except OSError as e:
+            # Handle errors during message sending (ex. the network is down), the next tick sends again
+            print_exception_errors(f"Error sending message to {self.group}:{self.port}: {str(e)}")
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to check the sequence number of a datagram against the newest one of its sender
+    # Returns True for a newer datagram (also the first one of a sender, or one of a restarted sender)
+    def is_newer(self, sender_name, sequence):
+        last_sequence = self.last_sequences.get(sender_name)
+        if last_sequence is None:
+            return True
+        ahead = (sequence - last_sequence) & 0xFFFFFFFF
+        if 0 < ahead < 0x80000000:
+            return True
+        # same or a little behind: late, far behind: the sender restarted
+        return (last_sequence - sequence) & 0xFFFFFFFF > self.REORDER_WINDOW
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to check a received datagram and keep its message if it is the newest of its sender
+    # Parameters:
+    #       - view (memoryview): the receive buffer.
+    #       - size (int): the size of the datagram in the buffer.
+    # Returns (sender_name, message), or None for a broken, own or late datagram
+    def read_datagram(self, view, size):
+        if size < DATAGRAM_HEADER.size:
+            self.broken_datagrams += 1
+            return None
+        sequence, name_length = DATAGRAM_HEADER.unpack_from(view)
+        message_start = DATAGRAM_HEADER.size + name_length
+        if size < message_start:
+            self.broken_datagrams += 1
+            return None
+        sender_name = bytes(view[DATAGRAM_HEADER.size:message_start]).decode(errors='replace')
+
+        # Skip the robot's own datagrams (looped back) and datagrams older than the newest of their sender
+        if sender_name == self.robot_name:
+            return None
+        if not self.is_newer(sender_name, sequence):
+            self.late_datagrams += 1
+            return None
+
+        message = bytes(view[message_start:size])
+        self.last_sequences[sender_name] = sequence
+        self.last_received_messages[sender_name] = message
+        self.received_datagrams += 1
+        return sender_name, message
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to receive the datagrams of all robots, runs in the receive thread until termination
+    def receive_datagrams(self):
+        buffer = bytearray(self.BUFFER_SIZE)
+        view = memoryview(buffer)
+        # with a messages_listener the datagrams already waiting are read without blocking and passed on together
+        drain_flags = getattr(socket, 'MSG_DONTWAIT', 0) if self.messages_listener is not None else 0
+        while self.is_running:
+            try:
+                size, sender_address = self.receive_socket.recvfrom_into(buffer)
+            except socket.timeout:
+                continue
+            except OSError as e:
+                # Handle errors while receiving (ex. the socket is closed by handle_termination)
+                if self.is_running:
+                    print_exception_errors(f"Error while receiving datagrams: {str(e)}")
+                continue
+
+            messages = []
+            while True:
+                received = self.read_datagram(view, size)
+                if received is not None:
+                    messages.append(received)
+                if drain_flags == 0:
+                    break
+                try:
+                    size, sender_address = self.receive_socket.recvfrom_into(buffer, 0, drain_flags)
+                except OSError:
+                    # nothing more waiting (BlockingIOError), or the socket is closed and the next receive reports it
+                    break
+
+            # Pass the messages on as they arrive (ex. to the NeighborTable)
+            if self.messages_listener is not None:
+                if messages:
+                    self.messages_listener(messages)
+            elif self.message_listener is not None:
+                for sender_name, message in messages:
+                    self.message_listener(sender_name, message)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to retrieve a list of all the last received messages
+    # Returns 'list': A list of tuples where each tuple contains (sender_name, message), the messages are bytes.
+    def get_last_received_messages(self):
+        return list(self.last_received_messages.items())
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to Perform cleanup before exit
+    def atexit_cleanup(self):
+
+        # check if the program exit before calling handle_termination, then call it now
+        if self.is_running == True:
+            print_in_green_box("Performing cleanup for Communications before exit...")
+            self.handle_termination()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to Handle termination signals gracefully, stops the receive thread and closes the sockets
+    def handle_termination(self):
+
+        self.is_running = False             # set Multicast_Communication_Handler as inactive
+
+        try:
+            print_in_green_box(f"Terminating Multicast Communication of {self.robot_name}")
+            if self.receive_thread is not None:
+                self.receive_thread.join()
+            self.receive_socket.close()
+            self.send_socket.close()
+
+            print("All Sockets closed.")
+            animate_termination()
+        except Exception as e:
+            # Handle errors while calling handle_termination
+            print_exception_errors(f"Error while calling handle_termination: {str(e)}")
+
+
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━ Helper Functions ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
@@ -545,4 +1255,3 @@ def animate_termination(iterations=20, delay=0.02):
     print(end="\r")
     print(f"{green_color}{str('▇' * iterations)}{reset_color}")
     print_in_green_box("All Communications Terminated Successfully!")
-
@@ -0,0 +1,177 @@
+"""
+Arena Geometry
+
+The ArenaGeometry class rasterizes a polygonal arena boundary and static polygonal obstacles into a signed-distance
+field (SDF) and its gradient on a grid with ARENA_SDF_CELL_SIZE spacing, at most half of WALL_AVOIDANCE_RANGE so the
+band where boids turn away from a wall always spans more than one cell. The distance is positive in free space (inside
+the arena and outside every obstacle) and negative elsewhere, and the gradient points away from the nearest wall or
+obstacle. The field is built once at startup and cached to disk under a hash of the geometry, so wall and static
+obstacle avoidance becomes one bilinear lookup per boid whatever the shape of the arena or the number of obstacles.
+
+This module only depends on numpy (it does not import Constants), Constants builds the geometry from inputs_data.json.
+
+@ version   1.0
+"""
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+import hashlib                      # for the geometry hash used as cache key
+import json                         # for a stable text form of the geometry
+import os                           # for the cache folder
+import numpy as np                  # for array operations
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+# Number of grid nodes handled per block when measuring distances to all edges, keeps memory at chunk_size x edges
+CHUNK_SIZE = 4096
+
+# Version of the cached field, part of the geometry hash, increase it when build() or the saved arrays change so the
+# fields cached by an older version are not loaded
+ARENA_SDF_FORMAT = 1
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to list the edges of a closed polygon as an Ex2x2 array of [start, end] points
+def polygon_edges(polygon):
+    polygon = np.asarray(polygon, dtype=float).reshape(-1, 2)
+    return np.stack((polygon, np.roll(polygon, -1, axis=0)), axis=1)
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to compute the distance of every point to the nearest edge
+# Parameters:
+#       - points (array Nx2): the points.
+#       - edges (array Ex2x2): the edges as [start, end] points.
+def distance_to_edges(points, edges):
+    start, end = edges[:, 0], edges[:, 1]
+    edge = end - start
+    edge_length_sq = np.maximum(edge[:, 0]**2 + edge[:, 1]**2, 1e-300)
+
+    distance = np.empty(len(points))
+    for chunk_start in range(0, len(points), CHUNK_SIZE):
+        chunk = points[chunk_start:chunk_start + CHUNK_SIZE]
+        # position of the closest point along every edge, clamped to the edge ends
+        to_point = chunk[:, None, :] - start[None, :, :]
+        t = np.clip((to_point[:, :, 0] * edge[:, 0] + to_point[:, :, 1] * edge[:, 1]) / edge_length_sq, 0, 1)
+        offset = to_point - t[:, :, None] * edge[None, :, :]
+        distance[chunk_start:chunk_start + CHUNK_SIZE] = np.sqrt((offset[:, :, 0]**2 + offset[:, :, 1]**2).min(axis=1))
+    return distance
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to test which points are inside a polygon (even-odd rule)
+def inside_polygon(points, polygon):
+    edges = polygon_edges(polygon)
+    x, y = points[:, 0:1], points[:, 1:2]
+    (x1, y1), (x2, y2) = edges[:, 0].T, edges[:, 1].T
+
+    # count the edges crossed by a ray going from every point towards +x
+    crosses = (y1 > y) != (y2 > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    return (crosses & (x < x_cross)).sum(axis=1) % 2 == 1
+
+
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+# ┃---------------------- # ArenaGeometry Class # -----------------------------┃ #
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+
+class ArenaGeometry:
+    # Initialize the ArenaGeometry.
+    # Parameters:
+    #       - arena_polygon (list): the arena boundary as a list of [x, y] vertices (in meters).
+    #       - obstacles (list): static obstacles, each one a list of [x, y] vertices (in meters).
+    #       - cell_size (float): spacing of the distance grid (in meters).
+    def __init__(self, arena_polygon, obstacles=[], cell_size=0.25):
+        self.arena_polygon = [[float(x), float(y)] for x, y in arena_polygon]
+        self.obstacles = [[[float(x), float(y)] for x, y in obstacle] for obstacle in obstacles]
+        self.cell_size = float(cell_size)
+
+        self.origin = np.zeros(2)           # [x, y] of grid node (0, 0)
+        self.distance = np.zeros((0, 0))    # signed distance at every grid node, indexed [ix, iy]
+        self.gradient = np.zeros((0, 0, 2)) # gradient of the signed distance at every grid node
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to compute the hash of the geometry and the field format, used as the cache key
+    def geometry_hash(self):
+        geometry = json.dumps({'format': ARENA_SDF_FORMAT, 'arena': self.arena_polygon, 'obstacles': self.obstacles,
+                               'cell_size': self.cell_size}, sort_keys=True)
+        return hashlib.sha1(geometry.encode()).hexdigest()[:16]
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to rasterize the arena and the obstacles into the signed-distance field and its gradient
+    def build(self):
+        arena = np.asarray(self.arena_polygon)
+
+        # grid covering the arena with two cells of margin, so boids slightly outside still get pushed back
+        self.origin = arena.min(axis=0) - 2 * self.cell_size
+        shape = np.ceil((arena.max(axis=0) + 2 * self.cell_size - self.origin) / self.cell_size).astype(int) + 1
+        ix, iy = np.meshgrid(np.arange(shape[0]), np.arange(shape[1]), indexing='ij')
+        nodes = self.origin + np.column_stack((ix.ravel(), iy.ravel())) * self.cell_size
+
+        # unsigned distance to the nearest wall or obstacle edge
+        edges = np.concatenate([polygon_edges(arena)] + [polygon_edges(obstacle) for obstacle in self.obstacles])
+        distance = distance_to_edges(nodes, edges)
+
+        # free space is inside the arena and outside every obstacle
+        free = inside_polygon(nodes, arena)
+        for obstacle in self.obstacles:
+            free &= ~inside_polygon(nodes, obstacle)
+
+        self.distance = np.where(free, distance, -distance).reshape(shape)
+        self.gradient = np.stack(np.gradient(self.distance, self.cell_size), axis=-1)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to load the field from the cache folder, or build it and save it there
+    # Parameters:
+    #       - cache_dir (str): folder of the cached fields, one .npz file per geometry hash (not tracked by git).
+    def load_or_build(self, cache_dir):
+        cache_file = os.path.join(cache_dir, f"arena_sdf_{self.geometry_hash()}.npz")
+
+        if os.path.exists(cache_file):
+            with np.load(cache_file) as cached:
+                self.origin, self.distance, self.gradient = cached['origin'], cached['distance'], cached['gradient']
+            return self
+
+        self.build()
+        os.makedirs(cache_dir, exist_ok=True)
+        np.savez(cache_file, origin=self.origin, distance=self.distance, gradient=self.gradient)
+        return self
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to look up the signed distance and its gradient at any points, with bilinear interpolation
+    # Parameters:
+    #       - points (array Nx2): the points.
+    # Returns (distance, gradient), arrays of shape N and Nx2
+    def sample(self, points):
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        shape = np.array(self.distance.shape)
+
+        # grid cell of every point and the position inside it, points off the grid use the border cells
+        grid_position = np.clip((points - self.origin) / self.cell_size, 0, shape - 1)
+        cell = np.minimum(grid_position.astype(int), shape - 2)
+        fx, fy = (grid_position - cell).T
+        ix, iy = cell.T
+
+        weights = ((1 - fx) * (1 - fy), fx * (1 - fy), (1 - fx) * fy, fx * fy)
+        corners = ((ix, iy), (ix + 1, iy), (ix, iy + 1), (ix + 1, iy + 1))
+
+        distance = sum(w * self.distance[i, j] for w, (i, j) in zip(weights, corners))
+        gradient = sum(w[:, None] * self.gradient[i, j] for w, (i, j) in zip(weights, corners))
+        return distance, gradient
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to compute the direction away from walls and obstacles for points closer than avoidance_range
+    # Returns an Nx2 array of unit vectors, zero for points that are far enough
+    def avoidance_directions(self, points, avoidance_range):
+        distance, gradient = self.sample(points)
+        length = np.sqrt(gradient[:, 0]**2 + gradient[:, 1]**2)
+        near = (distance < avoidance_range) & (length > 0)
+
+        directions = np.zeros_like(gradient)
+        directions[near] = gradient[near] / length[near, None]
+        return directions
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to create the geometry of a rectangle arena, the same walls as wall_avoidance_rule
+def rectangle_arena(width, length):
+    return [[0, 0], [width, 0], [width, length], [0, length]]
@@ -0,0 +1,254 @@
+"""
+Binary Log
+
+A fixed-schema binary format for the swarm logs, used instead of the free-form text of the RVR telemetry file
+(Swarming_1_1.txt) and the BOLT swarm log (swarm_log_*.txt). Every record has the same typed columns (RECORD_DTYPE):
+timestamp, sequence number, robot, position, velocity, target speed and heading, rule forces and neighbor counts,
+columns a log does not have are NaN (or -1 for the timestamp and sequence number).
+A file is a short JSON header, recording the schema and the inputs_data.json used, followed by the records packed
+back to back. Files are append-only and read with numpy.memmap, so even multi-hour logs open at once.
+The converters go to and from the existing text layouts (LAYOUTS), run this file for the command line version.
+
+This module only depends on numpy (it does not import Constants).
+
+@ version   1.0
+"""
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+import argparse                     # for the command line converters
+import json                         # for the file header
+import os                           # for file sizes
+import struct                       # for the header length
+import numpy as np                  # for the records
+
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+# First bytes of every binary log, followed by the header length (uint32) and the JSON header
+MAGIC = b"SWARMLOG"
+VERSION = 3
+
+# One log record, little-endian and packed. The numbers are float64, so text -> binary -> text gives back every
+# digit the text logs were written with (version 2 used float32 and kept only about 7 significant digits)
+RECORD_DTYPE = np.dtype([
+    ('t_ns', '<i8'),                        # time in nanoseconds (BOLT wall clock, RVR monotonic clock), -1 if none
+    ('seq', '<i8'),                         # record number of the robot (RVR), -1 when the log has none
+    ('robot', 'S16'),                       # robot name
+    ('x', '<f8'), ('y', '<f8'),             # position
+    ('v_x', '<f8'), ('v_y', '<f8'),         # velocity (RVR)
+    ('speed', '<f8'), ('heading', '<f8'),   # target speed and heading (BOLT)
+    ('a_x', '<f8'), ('a_y', '<f8'),         # alignment force
+    ('c_x', '<f8'), ('c_y', '<f8'),         # cohesion force
+    ('s_x', '<f8'), ('s_y', '<f8'),         # separation force
+    ('o_x', '<f8'), ('o_y', '<f8'),         # obstacle avoidance force
+    ('n_a', '<i2'), ('n_c', '<i2'), ('n_s', '<i2'),     # neighbors counted by alignment, cohesion, separation
+])
+
+# Columns of the existing text logs in file order, as record fields
+LAYOUTS = {
+    # Swarming_1_1.txt, written by the TelemetryWriter
+    'rvr':  ('robot', 'x', 'y', 'v_x', 'v_y', 'a_x', 'a_y', 'c_x', 'c_y', 's_x', 's_y', 'o_x', 'o_y', 'n_a', 'n_c', 'n_s',
+             't_ns', 'seq'),
+    # Swarming_1_1.txt written before the records had a time and sequence number
+    'rvr_untimed':  ('robot', 'x', 'y', 'v_x', 'v_y', 'a_x', 'a_y', 'c_x', 'c_y', 's_x', 's_y', 'o_x', 'o_y',
+                     'n_a', 'n_c', 'n_s'),
+    # swarm_log_*.txt, written by the BOLT swarms
+    'bolt': ('t_ns', 'robot', 'x', 'y', 'speed', 'heading', 'a_x', 'a_y', 'c_x', 'c_y', 's_x', 's_y', 'n_a', 'n_c', 'n_s'),
+}
+
+# Header line and separator of each text layout, the BOLT logs have no header line
+LAYOUT_HEADERS = {
+    'rvr':  "Robot_name,pos_X, pos_Y, V_x, V_y, A_x, A_y, C_x, C_y, S_x, S_y, Obs_avoid_x, obs_avoid_y, n_a, n_c, n_s, t_ns, seq",
+    'rvr_untimed':  "Robot_name,pos_X, pos_Y, V_x, V_y, A_x, A_y, C_x, C_y, S_x, S_y, Obs_avoid_x, obs_avoid_y, n_a, n_c, n_s",
+    'bolt': None,
+}
+LAYOUT_SEPARATORS = {'rvr': " , ", 'rvr_untimed': " , ", 'bolt': ", "}
+
+# Number of text lines converted per block, keeps memory flat for large logs
+CHUNK_ROWS = 100000
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to build records from rows of a text layout, missing columns are NaN (-1 for the timestamp and sequence)
+# Parameters:
+#       - rows (list): the rows, each one the values (numbers or text) of the layout columns in order.
+#       - layout (str): one of LAYOUTS.
+def rows_to_records(rows, layout):
+    columns = LAYOUTS[layout]
+    records = np.zeros(len(rows), dtype=RECORD_DTYPE)
+    for field in RECORD_DTYPE.names:
+        if field not in columns and RECORD_DTYPE[field].kind == 'f':
+            records[field] = np.nan
+    for field in ('t_ns', 'seq'):
+        if field not in columns:
+            records[field] = -1
+
+    if len(rows) > 0:
+        for field, values in zip(columns, zip(*rows)):
+            records[field] = np.asarray(values).astype(RECORD_DTYPE[field])
+    return records
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to format the records as lines of a text layout
+def records_to_lines(records, layout):
+    columns = []
+    for field in LAYOUTS[layout]:
+        values = records[field]
+        if values.dtype.kind == 'S':
+            columns.append(np.char.decode(values, 'ascii'))
+        elif values.dtype.kind == 'f':
+            # whole numbers (BOLT speed and heading, missing forces) are written without decimals
+            whole = np.isfinite(values) & (values == np.round(values))
+            columns.append(np.where(whole, values.astype(np.int64, copy=False).astype(str), values.astype(str)))
+        else:
+            columns.append(values.astype(str))
+    separator = LAYOUT_SEPARATORS[layout]
+    return [separator.join(row) for row in zip(*columns)]
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to read the header of a binary log
+# Returns (header, data_offset), header is the JSON dict and data_offset the position of the first record
+def read_header(file_path):
+    with open(file_path, "rb") as log_file:
+        if log_file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{file_path} is not a binary swarm log")
+        header_length, = struct.unpack("<I", log_file.read(4))
+        header = json.loads(log_file.read(header_length).decode())
+    return header, len(MAGIC) + 4 + header_length
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to open a binary log without loading it, the records are read from disk as they are used
+# A partly written last record (the robot stopped mid write) is left out
+# Returns (header, records), records is a read-only numpy.memmap of the header's dtype
+def read_log(file_path):
+    header, data_offset = read_header(file_path)
+    dtype = np.dtype([tuple(field) for field in header['dtype']])
+    count = (os.path.getsize(file_path) - data_offset) // dtype.itemsize
+    if count == 0:
+        return header, np.zeros(0, dtype=dtype)
+    return header, np.memmap(file_path, dtype=dtype, mode='r', offset=data_offset, shape=(count,))
+
+
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+# ┃--------------------- # BinaryLogWriter Class # ----------------------------┃ #
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+
+class BinaryLogWriter:
+    # Initialize the BinaryLogWriter, creates the file with its header, or appends to it.
+    # Parameters:
+    #       - file_path (str): the binary log.
+    #       - layout (str): text layout the records come from (one of LAYOUTS), kept in the header.
+    #       - inputs_data (dict): the inputs_data.json used for the run, kept in the header.
+    #       - append (bool): add to an existing log of the same schema instead of starting a new one.
+    def __init__(self, file_path, layout, inputs_data=None, append=False):
+
+        if append and os.path.exists(file_path):
+            header, data_offset = read_header(file_path)
+            if np.dtype([tuple(field) for field in header['dtype']]) != RECORD_DTYPE:
+                raise ValueError(f"{file_path} has a different record schema")
+            # drop a partly written last record so the new ones stay aligned
+            count = (os.path.getsize(file_path) - data_offset) // RECORD_DTYPE.itemsize
+            self.log_file = open(file_path, "ab")
+            self.log_file.truncate(data_offset + count * RECORD_DTYPE.itemsize)
+            return
+
+        header = {
+            'version': VERSION,
+            'layout': layout,
+            'dtype': [list(field) for field in RECORD_DTYPE.descr],
+            'inputs_data': inputs_data,
+        }
+        header_bytes = json.dumps(header).encode()
+        self.log_file = open(file_path, "wb")
+        self.log_file.write(MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to append records, a structured array of RECORD_DTYPE
+    def write_records(self, records):
+        self.log_file.write(np.ascontiguousarray(records, dtype=RECORD_DTYPE).tobytes())
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to append rows of a text layout
+    def write_rows(self, rows, layout):
+        self.write_records(rows_to_records(rows, layout))
+
+    def flush(self):
+        self.log_file.flush()
+
+    def close(self):
+        self.log_file.close()
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to convert a text log into a binary log, block by block
+# Lines that do not have the layout's number of columns (header, cut off last line) are skipped
+# Returns (records written, lines skipped)
+def text_to_binary(text_path, binary_path, layout, inputs_data=None):
+    columns = len(LAYOUTS[layout])
+    writer = BinaryLogWriter(binary_path, layout, inputs_data)
+    written = 0
+    skipped = 0
+    rows = []
+    with open(text_path, "r") as text_file:
+        for line in text_file:
+            values = [value.strip() for value in line.split(',')]
+            if len(values) != columns or line.startswith("Robot_name"):
+                skipped += line.strip() != ""
+                continue
+            rows.append(values)
+            if len(rows) == CHUNK_ROWS:
+                writer.write_rows(rows, layout)
+                written += len(rows)
+                rows = []
+    writer.write_rows(rows, layout)
+    written += len(rows)
+    writer.close()
+    return written, skipped
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to convert a binary log back into its text layout (the one in its header unless given)
+# Returns the number of records written
+def binary_to_text(binary_path, text_path, layout=None):
+    header, records = read_log(binary_path)
+    layout = layout or header['layout']
+    with open(text_path, "w") as text_file:
+        if LAYOUT_HEADERS[layout] is not None:
+            print(LAYOUT_HEADERS[layout], file=text_file)
+        for start in range(0, len(records), CHUNK_ROWS):
+            lines = records_to_lines(records[start:start + CHUNK_ROWS], layout)
+            text_file.write("".join(line + "\n" for line in lines))
+    return len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert swarm logs between the text layouts and the binary format")
+    commands = parser.add_subparsers(dest='command', required=True)
+    to_binary = commands.add_parser('to-binary', help="text log to binary log")
+    to_binary.add_argument('text_path')
+    to_binary.add_argument('binary_path')
+    to_binary.add_argument('--layout', choices=sorted(LAYOUTS), required=True)
+    to_binary.add_argument('--inputs', help="inputs_data.json used for the run, kept in the header")
+    to_text = commands.add_parser('to-text', help="binary log to text log")
+    to_text.add_argument('binary_path')
+    to_text.add_argument('text_path')
+    to_text.add_argument('--layout', choices=sorted(LAYOUTS), help="defaults to the layout in the header")
+    args = parser.parse_args()
+
+    if args.command == 'to-binary':
+        inputs_data = None
+        if args.inputs:
+            with open(args.inputs, "r") as inputs_file:
+                inputs_data = json.load(inputs_file)
+        written, skipped = text_to_binary(args.text_path, args.binary_path, args.layout, inputs_data)
+        print(f"{written} records written, {skipped} lines skipped")
+    else:
+        print(f"{binary_to_text(args.binary_path, args.text_path, args.layout)} records written")
+
+
+if __name__ == '__main__':
+    main()
@@ -20,6 +20,7 @@ import numpy as np                  # for array operations
 from assets import Constants as Cons            # for Constants and Global variables
 from Helper_Functions import *                  # for helper functions ex. normalize_speed_limit ...
 from Boids_Rules import *                       # for swarm rules ex. alignment_rule, cohesion_rule ...
+from Telemetry_Writer import TelemetryWriter    # for the per tick log written in the background
 
 
 # ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
@@ -29,14 +30,13 @@ from Boids_Rules import *                       # for swarm rules ex. alignment_
 # ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
 
 class Boid:
-    def __init__(self, start_position = [0,0], start_heading_angle = 0, ObsPosition=[-10000,-10000], boid_size = [10,10], boid_id = 0, robot_id_name='None'):
+    def __init__(self, start_position = [0,0], start_heading_angle = 0, obstacles_positions = [], boid_size = [10,10], boid_id = 0, robot_id_name='None', telemetry=None):
 
         self.x, self.y              = start_position            # start_position contains [x, y] of the boid
         self.position               = [self.x, self.y]          # boid position as list [x, y]
         self.heading_angle          = start_heading_angle       # start Orientation angle of the boid
-        self.obsX , self.obsY       = ObsPosition           #This is the defult obstacle position, means that no obstacle is set yet. 
-        self.obsPosition            =[self.obsX,self.obsY]
-        self.obsSize                = Cons.Obstacle_size     # Defualt size of obstacle
+        self.obstacles_positions    = obstacles_positions       # centers of all known obstacles as Mx2 [x, y], empty means no obstacle is set yet
+        self.obstacles_half_sizes   = Cons.Obstacle_half_size   # half extents of the obstacles, same for all
 
 
         # Calculate the forward velocity
@@ -56,23 +56,46 @@ class Boid:
         self.id                     = boid_id                    # boid id
         self.name                   = robot_id_name
 
-        # variables to collect data from neighbors 
-        self.neighbors_IDs = []
-        self.neighbors_positions = []
-        self.neighbors_velocities = []
+        # variables to collect data from neighbors, NumPy arrays with one row per neighbor
+        self.clear_neighbors_data()
+
+        # NeighborAggregates fed by the Communication_Handler, when set the neighbor sums are read from it instead of the
+        # neighbor arrays, and the IDs and ages of the neighbors come from it
+        self.neighbor_aggregates = None
+
+        # TelemetryWriter that logs every tick, a disabled one (no-op) when not given
+        self.telemetry = telemetry if telemetry is not None else TelemetryWriter(enabled=False)
 
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
     # Function to compute next step math
     def update_velocity(self):
 
-        # Calculate boid forces
-        alignment_force,n_a         = alignment_rule(self, self.neighbors_positions , self.neighbors_velocities)
-        cohesion_force ,n_c         = cohesion_rule(self, self.neighbors_positions)
-        separation_force,n_s         = separation_rule(self, self.neighbors_positions)
-
-        wall_avoidance_force     = wall_avoidance_rule(self)
-        obs_avoidance_force      = Obs_avoidance_rule(self,self.obsPosition,self.obsSize,self.velocity)
+        if self.neighbor_aggregates is not None:
+            # Calculate boid forces from the running neighbor sums
+            self.neighbor_aggregates.set_own_position(self.position)
+            (alignment_force, n_a), (cohesion_force, n_c), (separation_force, n_s) = steer_from_neighbor_sums(
+                self, *self.neighbor_aggregates.get_sums())
+            self.neighbors_IDs, self.neighbors_ages = self.neighbor_aggregates.get_ids_and_ages()
+        else:
+            # In topological mode only the k nearest neighbors take part in the rules,
+            # the IDs and ages are selected with them so every neighbor array keeps lining up
+            if Cons.NEIGHBOR_MODE == 'topological':
+                nearest = nearest_neighbors(self, self.neighbors_positions, Cons.TOPOLOGICAL_K)
+                self.neighbors_IDs = self.neighbors_IDs[nearest]
+                self.neighbors_positions = self.neighbors_positions[nearest]
+                self.neighbors_velocities = self.neighbors_velocities[nearest]
+                self.neighbors_ages = self.neighbors_ages[nearest]
+
+            # Calculate boid forces, alignment, cohesion and separation share one pass over the neighbors
+            (alignment_force, n_a), (cohesion_force, n_c), (separation_force, n_s) = fused_neighbor_rules(
+                self, self.neighbors_positions, self.neighbors_velocities)
+
+        if Cons.ARENA_GEOMETRY is not None:
+            wall_avoidance_force = arena_avoidance_rule(self)
+        else:
+            wall_avoidance_force = wall_avoidance_rule(self)
+        obs_avoidance_force      = Obs_avoidance_rule(self, self.obstacles_positions, self.obstacles_half_sizes, self.velocity)
 
 
         force_x = (
@@ -106,16 +129,11 @@ class Boid:
 
         # update boid velocity
         self.velocity   = [self.delta_x, self.delta_y]  # boid velocity as list [delt_x, delt_y]
-        # ##########################################
-        # #         Writing into a File            #
-        # #                                        #
-        # ##########################################
-        #
-        TemporalStateObs = open("Swarming_1_1.txt", "a")
-        print("rvr4",",",self.position[0],",",self.position[1],",",self.velocity[0],",",self.velocity[1],",",alignment_force[0]
-                                 ,",",alignment_force[1],",",cohesion_force[0],",",cohesion_force[1],",",separation_force[0],
-                                ",",separation_force[1],",",obs_avoidance_force[0],",",obs_avoidance_force[1],",",n_a,",",n_c,",",n_s,file=TemporalStateObs)
-        TemporalStateFile.close()
+        # Queue the tick record, the TelemetryWriter adds the monotonic time and sequence number and writes it in the background
+        self.telemetry.write(self.name, self.position[0], self.position[1], self.velocity[0], self.velocity[1],
+                             alignment_force[0], alignment_force[1], cohesion_force[0], cohesion_force[1],
+                             separation_force[0], separation_force[1], obs_avoidance_force[0], obs_avoidance_force[1],
+                             n_a, n_c, n_s)
 
         current_angle = self.heading_angle
         desired_angle = math.atan2(self.delta_y, self.delta_x)
@@ -147,7 +165,8 @@ class Boid:
     # Function to clear all old neighbors data
     def clear_neighbors_data(self):
 
-        self.neighbors_IDs.clear()
-        self.neighbors_positions.clear()
-        self.neighbors_velocities.clear()
+        self.neighbors_IDs = np.empty(0, dtype=int)
+        self.neighbors_positions = np.empty((0, 2))         # [x, y] of every neighbor
+        self.neighbors_velocities = np.empty((0, 2))        # [delta_x, delta_y] of every neighbor
+        self.neighbors_ages = np.empty(0)                   # seconds since the last message of every neighbor
         
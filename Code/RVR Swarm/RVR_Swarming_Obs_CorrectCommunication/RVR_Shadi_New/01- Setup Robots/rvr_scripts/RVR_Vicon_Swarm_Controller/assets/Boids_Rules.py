@@ -11,6 +11,8 @@ separation, and wall avoidance to determine the agents' velocities and positions
 
 # ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
 
+import numpy as np                  # for array operations
+
 # Constants must be first import
 from assets import Constants as Cons              # for Constants and Global variables
 from Helper_Functions import *
@@ -98,6 +100,72 @@ def separation_rule(self, neighbors_positions):
     # return separation_vector
     return separation_vector, neighbor_sep_count
 
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# fused neighbor rules: alignment, cohesion and separation in one pass over the neighbors
+# the neighbors are Nx2 arrays (or lists of [x, y]), each neighbor's squared distance is computed once and compared
+# against the squared ranges, and the sums are added in neighbor order,
+# so the results are identical to alignment_rule, cohesion_rule and separation_rule
+def fused_neighbor_rules(self, neighbors_positions, neighbors_velocities):
+    x, y = self.position
+    positions = np.asarray(neighbors_positions, dtype=float).reshape(-1, 2)
+    velocities = np.asarray(neighbors_velocities, dtype=float).reshape(-1, 2)
+
+    # which neighbors are inside each range. float_power calls the C pow like the ** of calculate_distance,
+    # ** on an array squares exactly, which can differ in the last bit and move a neighbor across a range
+    distance_sq = np.float_power(x - positions[:, 0], 2) + np.float_power(y - positions[:, 1], 2)
+    in_alignment = distance_sq < Cons.ALIGNMENT_RANGE_SQ
+    in_cohesion = distance_sq < Cons.COHESION_RANGE_SQ
+    in_separation = distance_sq < Cons.SEPARATION_RANGE_SQ
+
+    # calculate the sums of neighbors velocities and positions inside each range
+    alignment_vector = sequential_sum_rows(velocities[in_alignment])
+    cohesion_vector = sequential_sum_rows(positions[in_cohesion])
+    separation_vector = sequential_sum_rows(positions[in_separation])
+
+    return steer_from_neighbor_sums(self, alignment_vector, cohesion_vector, separation_vector,
+                                    [int(in_alignment.sum()), int(in_cohesion.sum()), int(in_separation.sum())])
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# steering from neighbor sums: turn the sums of neighbors velocities and positions inside each range into
+# the alignment, cohesion and separation vectors, the sums come from fused_neighbor_rules or NeighborAggregates
+def steer_from_neighbor_sums(self, alignment_sum, cohesion_sum, separation_sum, counts):
+    neighbor_alig_count, neighbor_coh_count, neighbor_sep_count = counts
+    alignment_vector = [0, 0]
+    cohesion_vector = [0, 0]
+    separation_vector = [0, 0]
+
+    if neighbor_alig_count > 0:
+        # steering match velocity
+        alignment_vector = [alignment_sum[0] / neighbor_alig_count - self.delta_x,
+                            alignment_sum[1] / neighbor_alig_count - self.delta_y]
+        alignment_vector = normalize_speed_limit(alignment_vector, Cons.MIN_LINEAR_SPEED, Cons.MAX_LINEAR_SPEED)
+
+    if neighbor_coh_count > 0:
+        # steering toward position
+        cohesion_vector = [cohesion_sum[0] / neighbor_coh_count - self.x,
+                           cohesion_sum[1] / neighbor_coh_count - self.y]
+        cohesion_vector = normalize_speed_limit(cohesion_vector, Cons.MIN_LINEAR_SPEED, Cons.MAX_LINEAR_SPEED)
+
+    if neighbor_sep_count > 0:
+        # steering away
+        separation_vector = [self.x - separation_sum[0] / neighbor_sep_count,
+                             self.y - separation_sum[1] / neighbor_sep_count]
+        separation_vector = normalize_speed_limit(separation_vector, Cons.MIN_LINEAR_SPEED, Cons.MAX_LINEAR_SPEED)
+
+    return (alignment_vector, neighbor_alig_count), (cohesion_vector, neighbor_coh_count), (separation_vector, neighbor_sep_count)
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# topological neighbors: keep only the k nearest neighbors, so the cost per tick stays capped in a dense flock
+# the k nearest are found with a partial selection (argpartition), returns their indices in the original order
+# so the same selection can be applied to the positions, velocities, IDs and ages of the neighbors
+def nearest_neighbors(self, neighbors_positions, k):
+    positions = np.asarray(neighbors_positions, dtype=float).reshape(-1, 2)
+    if len(positions) <= k:
+        return np.arange(len(positions))
+
+    distance_sq = (positions[:, 0] - self.position[0]) ** 2 + (positions[:, 1] - self.position[1]) ** 2
+    return np.sort(np.argpartition(distance_sq, k - 1)[:k]) if k > 0 else np.arange(0)
+
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
 # wall avoidance rule: prevent boids from get out of work space
 def wall_avoidance_rule(self):
@@ -121,32 +189,62 @@ def wall_avoidance_rule(self):
         wall_avoidance_vector = normalize_speed_limit(wall_avoidance_vector, Cons.MIN_LINEAR_SPEED, Cons.MAX_LINEAR_SPEED)
 
     return wall_avoidance_vector
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# arena avoidance rule: same as wall_avoidance_rule for any arena shape and the static obstacles,
+# the direction away from the nearest wall or obstacle is looked up in the distance field of ARENA_GEOMETRY
+def arena_avoidance_rule(self):
+    TURN_FACTOR = 1.5 * Cons.WALL_AVOIDANCE_WEIGHT
+
+    direction = Cons.ARENA_GEOMETRY.avoidance_directions([self.position], Cons.WALL_AVOIDANCE_RANGE)[0]
+    arena_avoidance_vector = [float(direction[0]) * TURN_FACTOR, float(direction[1]) * TURN_FACTOR]
+
+    if arena_avoidance_vector != [0, 0]:
+        arena_avoidance_vector = normalize_speed_limit(arena_avoidance_vector, Cons.MIN_LINEAR_SPEED, Cons.MAX_LINEAR_SPEED)
+
+    return arena_avoidance_vector
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
 # Obstacle Avoidance: Define the obstacle avoidance rule.
-def Obs_avoidance_rule(self,obstaclePos,obstacleSize,Velocity):
+# Parameters:
+#       - obstaclesPos (array Mx2): centers of all obstacles.
+#       - obstaclesHalfSize (array Mx2 or [x, y]): half extents of every obstacle, or one half extent for all.
+#       - Velocity ([x, y]): the boid velocity.
+def Obs_avoidance_rule(self, obstaclesPos, obstaclesHalfSize, Velocity):
+    AvoidanceForce = obstacle_avoidance_array([self.position], [Velocity], obstaclesPos, obstaclesHalfSize)[0]
+    return [float(AvoidanceForce[0]), float(AvoidanceForce[1])]
 
-    safeDistance = [0.3,0.3]
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# obstacle avoidance for N boids and M obstacles: both look-ahead points of every boid are tested against the box
+# (half extent + safe distance) of every obstacle in one array operation, and each boid keeps its strongest repulsion
+# Returns an Nx2 array of avoidance forces
+def obstacle_avoidance_array(positions, velocities, obstacles_positions, obstacles_half_sizes):
+    safeDistance = 0.3
     Ahead_Threshold = 0.5
-    AheadVision  = Cons.Obs_Vision
-    AvoidForce   = Cons.Obs_Avoid_Likelihood
-    Ahead_1      = [self.position[0]+(Velocity[0]*AheadVision),self.position[1]+(Velocity[1]*AheadVision)]
-    Ahead_2      = [self.position[0]+(Velocity[0]*AheadVision*Ahead_Threshold),self.position[1]+(Velocity[1]*AheadVision*Ahead_Threshold)]
-    print('Ahead',Ahead_1,Ahead_2)
-    Dist1       = [abs((Ahead_1[0]-obstaclePos[0])), abs((Ahead_1[1]-obstaclePos[1]))]                   
-    Dist2        = [abs((Ahead_2[0]-obstaclePos[0])),abs((Ahead_2[1]-obstaclePos[1]))]
-    print('Dist',Dist1,Dist2)
-    AvoidanceRange = [obstacleSize[0] + safeDistance[0], obstacleSize[1] + safeDistance[1]]
-    print('AvoidanceRange',AvoidanceRange)
-    ahead = -10000
-    if Dist1[0] <= AvoidanceRange[0] and Dist1[1] <= AvoidanceRange[1]:
-        ahead = Ahead_1
-    if Dist2[0] <= AvoidanceRange[0] and Dist2[1] <= AvoidanceRange[1]:
-        ahead = Ahead_2
-    if ahead != -10000:
-        AvoidanceForce = [(ahead[0]-obstaclePos[0])*AvoidForce,(ahead[1]-obstaclePos[1])*AvoidForce]
-        # NewVelocity   =[AvoidanceForce[0]+Velocity[0],AvoidanceForce[1]+Velocity[1]]
-        # HittingAngle_R = math._atan(NewVelocity[0],NewVelocity[1])
-        # HittingAngle_D = degrees(HittingAngle_R)
-    else: 
-        AvoidanceForce = [0,0]
-    print('AvoidanceForce',AvoidanceForce)    
-    return  AvoidanceForce 
\ No newline at end of file
+    positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+    velocities = np.asarray(velocities, dtype=float).reshape(-1, 2)
+    obstacles_positions = np.asarray(obstacles_positions, dtype=float).reshape(-1, 2)
+
+    avoidance = np.zeros_like(positions)
+    if len(obstacles_positions) == 0:
+        return avoidance
+
+    avoidance_range = np.broadcast_to(np.asarray(obstacles_half_sizes, dtype=float), obstacles_positions.shape) + safeDistance
+    ahead_1 = positions + velocities * Cons.Obs_Vision
+    ahead_2 = positions + velocities * Cons.Obs_Vision * Ahead_Threshold
+
+    # N x M tests, an obstacle not seen yet (nan position) is never inside
+    inside_1 = np.all(np.abs(ahead_1[:, None, :] - obstacles_positions) <= avoidance_range, axis=2)
+    inside_2 = np.all(np.abs(ahead_2[:, None, :] - obstacles_positions) <= avoidance_range, axis=2)
+
+    # the nearer look-ahead point wins when both are inside the obstacle range
+    ahead = np.where(inside_2[:, :, None], ahead_2[:, None, :], ahead_1[:, None, :])
+    forces = (ahead - obstacles_positions) * Cons.Obs_Avoid_Likelihood
+
+    # keep the strongest repulsion of every boid
+    strength = np.where(inside_1 | inside_2, forces[:, :, 0]**2 + forces[:, :, 1]**2, -1)
+    strongest = np.argmax(strength, axis=1)
+    rows = np.arange(len(positions))
+    hit = strength[rows, strongest] >= 0
+    avoidance[hit] = forces[rows, strongest][hit]
+
+    return avoidance
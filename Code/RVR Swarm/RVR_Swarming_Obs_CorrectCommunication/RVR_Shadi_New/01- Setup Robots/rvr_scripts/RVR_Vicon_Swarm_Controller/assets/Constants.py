@@ -22,6 +22,7 @@ sys.path.append(current_directory)      # Append the current directory to the sy
 os.chdir(current_directory)             # Change the current working directory to the current directory
 
 from Helper_Functions import *
+from Arena_Geometry import ArenaGeometry, rectangle_arena
 
 # ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
 
@@ -45,6 +46,10 @@ ALIGNMENT_RANGE             = loaded_data['ALIGNMENT_RANGE']
 COHESION_RANGE              = loaded_data['COHESION_RANGE']
 SEPARATION_RANGE            = loaded_data['SEPARATION_RANGE']
 WALL_AVOIDANCE_RANGE        = loaded_data['WALL_AVOIDANCE_RANGE']
+# Squared Behaviors Range, used to compare squared distances without a sqrt per neighbor
+ALIGNMENT_RANGE_SQ          = squared_range_threshold(ALIGNMENT_RANGE)
+COHESION_RANGE_SQ           = squared_range_threshold(COHESION_RANGE)
+SEPARATION_RANGE_SQ         = squared_range_threshold(SEPARATION_RANGE)
 # Robot Speed
 MAX_LINEAR_SPEED            = loaded_data['MAX_LINEAR_SPEED']               # Maximium robot linear speed m/s
 MIN_LINEAR_SPEED            = loaded_data['MIN_LINEAR_SPEED']               # Minimum robot linear speed m/s
@@ -54,6 +59,15 @@ MIN_ANGULAR_SPEED           = loaded_data['MIN_ANGULAR_SPEED']              # Mi
 ARENA_WIDTH                 = loaded_data['ARENA_WIDTH']                    # RectangleArena Width, (in meters)
 ARENA_LENGTH                = loaded_data['ARENA_LENGTH']                   # RectangleArena Length, (in meters)
 CELL_SIZE                   = loaded_data['CELL_SIZE']                      # Cell Size, (in meters)
+NEIGHBOR_GRID_CELL_SIZE     = max(CELL_SIZE, ALIGNMENT_RANGE, COHESION_RANGE, SEPARATION_RANGE)   # neighbor grid cells cover the largest rule range
+ARENA_SDF                   = loaded_data['ARENA_SDF']                      # use the distance field of the arena geometry for wall avoidance
+ARENA_SDF_CELL_SIZE         = min(CELL_SIZE, WALL_AVOIDANCE_RANGE / 2)      # distance field spacing, at least two cells inside the wall avoidance range
+ARENA_POLYGON               = loaded_data['ARENA_POLYGON'] or rectangle_arena(ARENA_WIDTH, ARENA_LENGTH)   # arena vertices [x, y], empty for the rectangle arena
+STATIC_OBSTACLES            = loaded_data['STATIC_OBSTACLES']               # static obstacles, each a list of vertices [x, y]
+NEIGHBOR_INDEX              = loaded_data['NEIGHBOR_INDEX']                 # neighbor index used by SwarmState ('brute', 'grid' or 'kdtree')
+NEIGHBOR_MODE               = loaded_data['NEIGHBOR_MODE']                  # 'metric' or 'topological' (only the TOPOLOGICAL_K nearest neighbors)
+NEIGHBOR_TTL                = loaded_data['NEIGHBOR_TTL']                   # seconds without a message after which a neighbor is dropped
+TOPOLOGICAL_K               = loaded_data['TOPOLOGICAL_K']                  # Number of nearest neighbors used in topological mode
 NUM_OF_ROBOTS               = loaded_data['NUM_OF_ROBOTS']                  # Number of robots
 ITERATIONS_PER_SECOND       = loaded_data['ITERATIONS_PER_SECOND']          # Number of iterations per second
 MAX_STOP_TIME               = loaded_data['MAX_STOP_TIME']                  # Stop simulation after ... sec
@@ -61,22 +75,30 @@ PRINT_CONSOLE_RESULT        = loaded_data["PRINT_CONSOLE_RESULT"]           # pr
 #Obstacle Avoidance: Define the obstacle parameters
 Obs_Vision            = loaded_data["Obs_Vision"]
 Obs_Avoid_Likelihood  = loaded_data["Obs_Avoid_Likelihood"]
+Obstacle_size         = loaded_data["Obstacle_size"]                        # obstacle [length, width] (in meters)
+Obstacle_half_size    = [Obstacle_size[0] / 2, Obstacle_size[1] / 2]        # obstacle half extents, used by the avoidance box test
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Arena geometry: built once at startup, or loaded from arena_cache if the same geometry was built before
+ARENA_GEOMETRY = None
+if ARENA_SDF:
+    ARENA_GEOMETRY = ArenaGeometry(ARENA_POLYGON, STATIC_OBSTACLES, ARENA_SDF_CELL_SIZE).load_or_build(os.path.join(current_directory, 'arena_cache'))
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
 # Robot body dimensions
 
 robot_width =  0.216         # Width of RVR (in meters)
 robot_length = 0.185         # Length of RVR (in meters)
 robot_height = 0.114         # Height of RVR (in meters)
-Obstacle_size = [obs_lenght,obs_width]
 ROBOT_SIZE = [robot_width, robot_length]         # make ROBOT_SIZE in cm and int
 
 ROBOT_RADIUS = 0.5 * math.sqrt(ROBOT_SIZE[0]**2 + ROBOT_SIZE[1]**2)
 
 #Obstacle Avoidance: Change this for collecting obstacle avoidance data
-# ##########################################
-# #         Make a New File                #
-# #                                        #
-# ##########################################
-TemporalStateObs = open("Swarming_1_1.txt", "w")
-print("Robot_name,pos_X, pos_Y, V_x, V_y, A_x, A_y, C_x, C_y, S_x, S_y, Obs_avoid_x, obs_avoid_y, n_a, n_c, n_s",file=TemporalStateObs)
-TemporalStateObs.close()
\ No newline at end of file
+# Telemetry: one line per control tick, written in the background by a TelemetryWriter
+TELEMETRY_ENABLED = loaded_data['TELEMETRY_ENABLED']
+# TELEMETRY_FORMAT is text (Swarming_1_1.txt) or binary (Swarming_1_1.swlog, see Binary_Log.py)
+TELEMETRY_FORMAT = loaded_data['TELEMETRY_FORMAT']
+TELEMETRY_FILE = os.path.join(current_directory, "Swarming_1_1.swlog" if TELEMETRY_FORMAT == "binary" else "Swarming_1_1.txt")
+TELEMETRY_HEADER = "Robot_name,pos_X, pos_Y, V_x, V_y, A_x, A_y, C_x, C_y, S_x, S_y, Obs_avoid_x, obs_avoid_y, n_a, n_c, n_s, t_ns, seq"
+# COMMUNICATION_MODE is threads (Communication_Handler), asyncio (Async_Communication_Handler on the Agent's loop)
+# or multicast (Multicast_Communication_Handler, one UDP datagram per tick to all robots)
+COMMUNICATION_MODE = loaded_data['COMMUNICATION_MODE']
\ No newline at end of file
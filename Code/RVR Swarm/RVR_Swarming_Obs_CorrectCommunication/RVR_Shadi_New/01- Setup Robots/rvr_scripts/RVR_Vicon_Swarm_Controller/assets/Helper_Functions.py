@@ -17,6 +17,7 @@ import sys                          # Module for interacting with the Python int
 import tkinter as tk                # Import the tkinter module and alias it as "tk"
 import time
 from tkinter import messagebox
+import numpy as np                  # for array operations
 
 
 # ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
@@ -62,7 +63,60 @@ def calculate_distance(point_a, point_b):
         distance = math.sqrt(distance_diff[0] ** 2 + distance_diff[1] ** 2)
     
         return distance
-    
 
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to convert a range into a squared distance threshold.
+# The threshold is the smallest float whose sqrt is >= range_value, so (dx**2 + dy**2) < threshold
+# gives exactly the same answer as calculate_distance(...) < range_value, without calling sqrt.
+def squared_range_threshold(range_value):
+    threshold = range_value * range_value
+
+    # step down while the previous float still has sqrt >= range_value
+    while threshold > 0 and math.sqrt(math.nextafter(threshold, 0)) >= range_value:
+        threshold = math.nextafter(threshold, 0)
+
+    # step up until sqrt(threshold) >= range_value
+    while math.sqrt(threshold) < range_value:
+        threshold = math.nextafter(threshold, math.inf)
+
+    return threshold
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Array versions of the functions above, each row of the input is one boid
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to normalize the difference between two angles for an array of angles
+def normalize_angle_diff_array(angle_diff):
+    angle_diff = np.arctan2(np.sin(angle_diff), np.cos(angle_diff))
+
+    # round values to make numbers same in all OS (Windows, Linux)
+    return np.round(angle_diff, 5)
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to normalize an array of angular velocities
+def normalize_angular_velocity_array(raw_angular_velocity, min_angular_speed, max_angular_speed):
+    clamped_angular_velocity = np.clip(raw_angular_velocity, min_angular_speed, max_angular_speed)
+
+    # round values to make numbers same in all OS (Windows, Linux)
+    return np.round(clamped_angular_velocity, 5)
 
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to normalize an Nx2 array of speed vectors, rows with zero magnitude are left as zero
+def normalize_speed_limit_array(speed, min_speed, max_speed):
+    speed = np.asarray(speed, dtype=float)
+    speed_magnitude = np.sqrt(speed[:, 0]**2 + speed[:, 1]**2)
+
+    limit = np.where(speed_magnitude > max_speed, max_speed, np.where(speed_magnitude < min_speed, min_speed, speed_magnitude))
+    scale = np.divide(limit, speed_magnitude, out=np.ones_like(speed_magnitude), where=speed_magnitude != 0)
 
+    # round values to make numbers same in all OS (Windows, Linux)
+    return np.round(speed * scale[:, None], 5)
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to sum the rows of an Nx2 array one after the other, the same way as a Python loop adding them to [0, 0]
+# (np.sum adds pairwise, which can round differently), returns [sum_x, sum_y] as floats
+def sequential_sum_rows(rows):
+    if len(rows) == 0:
+        return [0, 0]
+    total = np.add.accumulate(rows, axis=0)[-1]
+    return [float(total[0]), float(total[1])]
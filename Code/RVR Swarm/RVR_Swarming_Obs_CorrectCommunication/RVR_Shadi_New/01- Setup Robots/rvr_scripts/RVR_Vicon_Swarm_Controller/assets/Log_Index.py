@@ -0,0 +1,200 @@
+"""
+Log Index
+
+A sparse sidecar index for the text telemetry logs, kept next to the log as <log>.idx. The LogIndexWriter is fed
+every record as it is written and adds one index line per block of INDEX_EVERY records: the byte offset and length
+of the block in the log, the number of records before it, its first and last timestamp and the robots in it.
+The LogIndex reader loads the index and seeks straight to the blocks of a time window or a robot instead of reading
+the whole log. The index is written as the log grows, so it also works on the log of a run that stopped early:
+whatever part of the log is not indexed yet is read as one block that matches every query.
+The BOLT swarm logs (Code/Boid Swarm) are indexed the same way, they have no header line so their columns are given.
+
+@ version   1.0
+"""
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+import os                           # for the log size
+
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+INDEX_SUFFIX = ".idx"
+INDEX_HEADER = "offset, length, record, t_min, t_max, robots"
+# Records per index block, about 3 seconds of ticks at 20 Hz
+INDEX_EVERY = 64
+
+
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+# ┃----------------------- # LogIndexWriter Class # ---------------------------┃ #
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+
+class LogIndexWriter:
+    # Initialize the LogIndexWriter, creates <log_path>.idx.
+    # Parameters:
+    #       - log_path (str): the log being indexed.
+    #       - offset (int): byte offset of the first record in the log, after its header line.
+    #       - every (int): records per index block.
+    def __init__(self, log_path, offset=0, every=INDEX_EVERY):
+
+        self.index_file = open(log_path + INDEX_SUFFIX, "w")
+        print(INDEX_HEADER, file=self.index_file)
+        self.every = every
+        self.offset = offset            # byte offset of the next record
+        self.records = 0                # records before the next one
+        self.block_offset = offset      # first byte of the current block
+        self.block_records = 0          # records in the current block
+        self.t_min = None
+        self.t_max = None
+        self.robots = set()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to add one record, in the order the records are written to the log
+    # Parameters:
+    #       - t_ns (int): time of the record in nanoseconds.
+    #       - robot (str): name of the robot of the record.
+    #       - size (int): bytes of the record in the log, line end included.
+    def add(self, t_ns, robot, size):
+        if self.block_records == 0:
+            self.block_offset = self.offset
+            self.t_min = t_ns
+            self.t_max = t_ns
+        self.t_min = min(self.t_min, t_ns)
+        self.t_max = max(self.t_max, t_ns)
+        self.robots.add(robot)
+        self.block_records += 1
+        self.offset += size
+        self.records += 1
+        if self.block_records >= self.every:
+            self.write_block()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to write the index line of the current block and start a new one
+    def write_block(self):
+        if self.block_records == 0:
+            return
+        print(f"{self.block_offset}, {self.offset - self.block_offset}, {self.records - self.block_records}, "
+              f"{self.t_min}, {self.t_max}, {' '.join(sorted(self.robots))}", file=self.index_file)
+        self.block_records = 0
+        self.robots = set()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to flush the index, call it after the log itself is flushed so the index never runs ahead of the log
+    def flush(self):
+        self.index_file.flush()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to index the last, partly filled block and close the index
+    def close(self):
+        self.write_block()
+        self.index_file.close()
+
+
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+# ┃--------------------------- # LogIndex Class # -----------------------------┃ #
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+
+class LogIndex:
+    # Initialize the LogIndex, loads <log_path>.idx (a log without one is read as a single block).
+    # Parameters:
+    #       - log_path (str): the indexed log.
+    #       - robot_column (int): column of the robot name in a log line, 0 for the RVR telemetry, 1 for the BOLT logs.
+    #       - time_column (int): column of the record time in ns, None to find the t_ns column in the header line,
+    #                            0 for the BOLT logs.
+    def __init__(self, log_path, robot_column=0, time_column=None):
+
+        self.log_path = log_path
+        self.robot_column = robot_column
+        self.time_column = time_column  # column of the record time, None if the log has none
+        self.blocks = []                # (offset, length, record, t_min, t_max, robots), t and robots None when unknown
+
+        if self.time_column is None:
+            with open(log_path, "r") as log_file:
+                columns = [column.strip() for column in log_file.readline().split(",")]
+            if "t_ns" in columns:
+                self.time_column = columns.index("t_ns")
+
+        log_size = os.path.getsize(log_path)
+        indexed = 0
+        if os.path.exists(log_path + INDEX_SUFFIX):
+            with open(log_path + INDEX_SUFFIX, "r") as index_file:
+                for line in index_file:
+                    values = [value.strip() for value in line.split(",")]
+                    # skip the header and a line cut off by a crash
+                    if not line.endswith("\n") or len(values) != 6 or not values[0].isdigit():
+                        continue
+                    offset, length, record, t_min, t_max = (int(value) for value in values[:5])
+                    # a block the log itself did not get to write to disk
+                    if offset + length > log_size:
+                        break
+                    self.blocks.append((offset, length, record, t_min, t_max, frozenset(values[5].split())))
+                    indexed = offset + length
+        if log_size > indexed:
+            self.blocks.append((indexed, log_size - indexed, None, None, None, None))
+
+        known = [block[3] for block in self.blocks if block[3] is not None]
+        self.t0 = min(known) if known else self.first_time()     # first timestamp of the log, windows count from here
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to read the time of the first record, for a log that is not indexed yet
+    # Returns the time in ns, None if the log has no time column or no record
+    def first_time(self):
+        if self.time_column is None:
+            return None
+        with open(self.log_path, "r") as log_file:
+            for line in log_file:
+                try:
+                    return int(line.split(",")[self.time_column])
+                except (ValueError, IndexError):
+                    # the header line
+                    continue
+        return None
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to find the blocks of the log that can hold records of the window and robot
+    # Parameters:
+    #       - start, end (float): the time window in seconds from the start of the log, None for no limit.
+    #       - robot (str): robot name, None for every robot.
+    # Returns a list of (offset, length) in the log
+    def find_blocks(self, start=None, end=None, robot=None):
+        start_ns = None if start is None or self.t0 is None else self.t0 + int(start * 1e9)
+        end_ns = None if end is None or self.t0 is None else self.t0 + int(end * 1e9)
+        found = []
+        for offset, length, record, t_min, t_max, robots in self.blocks:
+            if t_min is not None:
+                if (start_ns is not None and t_max < start_ns) or (end_ns is not None and t_min > end_ns):
+                    continue
+                if robot is not None and robot not in robots:
+                    continue
+            if found and found[-1][0] + found[-1][1] == offset:
+                # read neighbouring blocks in one go
+                found[-1] = (found[-1][0], found[-1][1] + length)
+            else:
+                found.append((offset, length))
+        return found
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to read the log lines of a time window and robot, reading only the blocks that can hold them
+    # The robot and the time are matched line by line, a log without a t_ns column is only as fine as its blocks
+    # Parameters: as find_blocks
+    def read_lines(self, start=None, end=None, robot=None):
+        start_ns = None if start is None or self.t0 is None else self.t0 + int(start * 1e9)
+        end_ns = None if end is None or self.t0 is None else self.t0 + int(end * 1e9)
+        with open(self.log_path, "rb") as log_file:
+            for offset, length in self.find_blocks(start, end, robot):
+                log_file.seek(offset)
+                for line in log_file.read(length).decode().splitlines():
+                    values = line.split(",")
+                    if len(values) <= max(self.robot_column, self.time_column or 0):
+                        continue
+                    if robot is not None and values[self.robot_column].strip() != robot:
+                        continue
+                    if self.time_column is not None:
+                        try:
+                            t_ns = int(values[self.time_column])
+                        except ValueError:
+                            # the header line
+                            continue
+                        if (start_ns is not None and t_ns < start_ns) or (end_ns is not None and t_ns > end_ns):
+                            continue
+                    yield line
@@ -0,0 +1,135 @@
+"""
+Merge Logs
+
+In the decentralised setup every RVR writes its own Swarming_1_1.txt on its own Pi, timed by the monotonic clock of
+that Pi. This tool merges the per robot logs into one swarm log in global time order. Each robot's times are moved
+onto a common clock by a clock offset, either given per robot or, by default, found by lining up the first record of
+every log (the robots start together). The logs are merged with a heap of one pending record per log (heapq.merge),
+so memory does not depend on the length of the logs. Records at the same time are ordered by robot and sequence
+number. The merged log has the telemetry layout with the common clock times, and its own sparse index (Log_Index.py).
+
+Run this file for the command line version.
+
+@ version   1.0
+"""
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+import argparse                     # for the command line
+import heapq                        # for the k-way merge
+
+from Binary_Log import LAYOUTS, LAYOUT_HEADERS, LAYOUT_SEPARATORS     # for the telemetry layout
+from Log_Index import LogIndexWriter                                  # for the index of the merged log
+
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+COLUMNS = len(LAYOUTS['rvr'])
+ROBOT_COLUMN = LAYOUTS['rvr'].index('robot')
+TIME_COLUMN = LAYOUTS['rvr'].index('t_ns')
+SEQ_COLUMN = LAYOUTS['rvr'].index('seq')
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to read the records of one log in file order, skipping the header and malformed lines
+# Yields (time on the common clock, robot, sequence number, values)
+# Parameters:
+#       - log_path (str): a per robot telemetry log.
+#       - offset_ns (int): clock offset of the log, added to its times.
+#       - counts (dict): counters of the merge, 'skipped' lines and 'backwards' records are added to it.
+def read_records(log_path, offset_ns=0, counts=None):
+    counts = counts if counts is not None else {}
+    previous = None
+    with open(log_path, "r") as log_file:
+        for line in log_file:
+            values = [value.strip() for value in line.split(",")]
+            try:
+                if len(values) != COLUMNS:
+                    raise ValueError
+                t_ns = int(values[TIME_COLUMN]) + offset_ns
+                sequence = int(values[SEQ_COLUMN])
+            except ValueError:
+                counts['skipped'] = counts.get('skipped', 0) + 1
+                continue
+            # a log is in time order unless the Pi restarted, the merge then stays only roughly ordered
+            if previous is not None and t_ns < previous:
+                counts['backwards'] = counts.get('backwards', 0) + 1
+            previous = t_ns
+            yield t_ns, values[ROBOT_COLUMN], sequence, values
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to read the first record of a log
+# Returns (time, robot), or None when the log has no records
+def first_record(log_path):
+    for t_ns, robot, sequence, values in read_records(log_path):
+        return t_ns, robot
+    return None
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to merge per robot logs into one log in time order
+# Parameters:
+#       - log_paths (list): the per robot telemetry logs.
+#       - merged_path (str): the merged log, written with its index.
+#       - offsets (dict): robot name to clock offset in seconds, added to its times. None lines up the first records
+#                         of the logs at time 0, otherwise every robot needs an offset.
+# Returns the counters of the merge: 'records' written, per robot 'robots' counts, 'skipped' lines, 'backwards' records
+def merge_logs(log_paths, merged_path, offsets=None):
+    offsets_ns = []
+    for log_path in log_paths:
+        first = first_record(log_path)
+        if first is None:
+            print(f"{log_path} has no records with a time, skipped")
+            continue
+        t_ns, robot = first
+        if offsets is None:
+            offsets_ns.append((log_path, -t_ns))
+        elif robot in offsets:
+            offsets_ns.append((log_path, int(offsets[robot] * 1e9)))
+        else:
+            raise ValueError(f"no clock offset given for {robot} ({log_path})")
+
+    counts = {'records': 0, 'robots': {}, 'skipped': 0, 'backwards': 0}
+    streams = [read_records(log_path, offset_ns, counts) for log_path, offset_ns in offsets_ns]
+    separator = LAYOUT_SEPARATORS['rvr']
+    header = LAYOUT_HEADERS['rvr']
+    with open(merged_path, "w", newline="\n") as merged_file:
+        print(header, file=merged_file)
+        index = LogIndexWriter(merged_path, len(header.encode()) + 1)
+        for t_ns, robot, sequence, values in heapq.merge(*streams, key=lambda record: record[:3]):
+            values[TIME_COLUMN] = str(t_ns)
+            line = separator.join(values) + "\n"
+            merged_file.write(line)
+            index.add(t_ns, robot, len(line.encode()))
+            counts['records'] += 1
+            counts['robots'][robot] = counts['robots'].get(robot, 0) + 1
+        index.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge per robot telemetry logs into one log in time order")
+    parser.add_argument('merged_path', help="the merged log")
+    parser.add_argument('log_paths', nargs='+', help="the per robot logs (Swarming_1_1.txt of each Pi)")
+    parser.add_argument('--offset', action='append', default=[], metavar="ROBOT=SECONDS",
+                        help="clock offset of a robot, added to its times, give one for every robot "
+                             "(default: line up the first records)")
+    args = parser.parse_args()
+
+    offsets = None
+    if len(args.offset) > 0:
+        offsets = {}
+        for offset in args.offset:
+            robot, seconds = offset.split("=")
+            offsets[robot.strip()] = float(seconds)
+    counts = merge_logs(args.log_paths, args.merged_path, offsets)
+    print(f"{counts['records']} records merged: " + ", ".join(f"{robot} {n}" for robot, n in counts['robots'].items()))
+    if counts['skipped'] > 0:
+        print(f"{counts['skipped']} lines skipped (headers, malformed or without a time)")
+    if counts['backwards'] > 0:
+        print(f"{counts['backwards']} records went back in time within their log, the merge is only roughly ordered")
+
+
+if __name__ == '__main__':
+    main()
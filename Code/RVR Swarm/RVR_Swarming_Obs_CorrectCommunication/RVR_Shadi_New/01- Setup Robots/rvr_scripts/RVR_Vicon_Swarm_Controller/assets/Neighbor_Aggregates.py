@@ -0,0 +1,170 @@
+"""
+Neighbor Aggregates
+
+The NeighborAggregates class keeps running sums of the neighbors velocities and positions inside each rule range
+(alignment, cohesion and separation), so the control tick reads the sums instead of splitting every message,
+rebuilding the neighbor lists and summing them again.
+It is fed by the NeighborTable, which decodes the messages of the Communication_Handler: every message that arrives
+removes the old contribution of its sender from the sums and adds the new one. When the robot itself moves, the cached neighbors are tested
+against the ranges again and only the ones that entered or left a range change the sums.
+The sums are recomputed from scratch every RESUM_INTERVAL updates, so the rounding drift of the deltas stays bounded.
+Every neighbor also keeps the time its last message was received, so the age of the neighbors is known in metric mode.
+
+@ version   1.0
+"""
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+import threading                    # for the lock shared by the receive threads and the control loop
+import time                         # for the receive timestamps
+import numpy as np                  # for the neighbor IDs and ages
+
+# Constants must be first import
+from assets import Constants as Cons            # for Constants and Global variables
+
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+# ┃--------------------- # NeighborAggregates Class # -------------------------┃ #
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+
+class NeighborAggregates:
+    # Number of delta updates after which the sums are recomputed from the cached neighbors
+    RESUM_INTERVAL = 200
+
+    # Initialize the NeighborAggregates.
+    # Parameters:
+    #       - own_position ([x, y]): start position of the robot itself.
+    def __init__(self, own_position=[0, 0]):
+
+        self.own_position = list(own_position)
+
+        # Latest data of every neighbor (sender as key): {'id', 'position', 'velocity', 'in_range', 'received_ns'}
+        # in_range holds the [alignment, cohesion, separation] range flags the neighbor is counted in,
+        # received_ns the time.monotonic_ns() its last message was received
+        self.neighbors = {}
+
+        # Running sums inside each range, and the number of neighbors in each range [n_a, n_c, n_s]
+        self.alignment_sum = [0, 0]                 # sum of neighbors velocities inside ALIGNMENT_RANGE
+        self.cohesion_sum = [0, 0]                  # sum of neighbors positions inside COHESION_RANGE
+        self.separation_sum = [0, 0]                # sum of neighbors positions inside SEPARATION_RANGE
+        self.counts = [0, 0, 0]
+
+        self.updates_since_resum = 0
+
+        # Lock to synchronize the receive threads with the control loop
+        self.lock = threading.Lock()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to handle a message received from a neighbor, the message listener of the NeighborTable
+    # Parameters:
+    #       - sender (str): the sender, its IP address (or name in multicast mode).
+    #       - row (NEIGHBOR_DTYPE row): the decoded message and its receive time, as stored in the NeighborTable.
+    def on_message(self, sender, row):
+        robot_id = int(row['id'])
+        received_ns = int(row['received_ns'])
+        position = row['position'].tolist()
+        velocity = row['velocity'].tolist()
+
+        with self.lock:
+            old = self.neighbors.get(sender)
+            if old is not None:
+                self.apply(old, -1)
+
+            neighbor = {'id': robot_id, 'position': position, 'velocity': velocity, 'in_range': self.ranges_of(position),
+                        'received_ns': received_ns}
+            self.neighbors[sender] = neighbor
+            self.apply(neighbor, +1)
+            self.count_update()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to remove a neighbor and its contribution to the sums, ex. evicted by the NeighborTable
+    # Parameters:
+    #       - sender (str): the sender of the neighbor.
+    def remove(self, sender):
+        with self.lock:
+            old = self.neighbors.pop(sender, None)
+            if old is not None:
+                self.apply(old, -1)
+                self.count_update()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to move the robot itself, neighbors that entered or left a range update the sums
+    # Parameters:
+    #       - position ([x, y]): the new position of the robot.
+    def set_own_position(self, position):
+        with self.lock:
+            if position[0] == self.own_position[0] and position[1] == self.own_position[1]:
+                return
+            self.own_position = [position[0], position[1]]
+
+            for neighbor in self.neighbors.values():
+                in_range = self.ranges_of(neighbor['position'])
+                if in_range != neighbor['in_range']:
+                    self.apply(neighbor, -1)
+                    neighbor['in_range'] = in_range
+                    self.apply(neighbor, +1)
+                    self.count_update()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to read the current sums
+    # Returns (alignment_sum, cohesion_sum, separation_sum, counts), the input of steer_from_neighbor_sums
+    def get_sums(self):
+        with self.lock:
+            return list(self.alignment_sum), list(self.cohesion_sum), list(self.separation_sum), list(self.counts)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to read the IDs and ages of the cached neighbors
+    # Parameters:
+    #       - now_ns (int): the current time.monotonic_ns(), None to read it.
+    # Returns (ids, ages), arrays in the same order, ages in seconds since the last message of every neighbor
+    def get_ids_and_ages(self, now_ns=None):
+        now_ns = time.monotonic_ns() if now_ns is None else now_ns
+        with self.lock:
+            ids = np.array([neighbor['id'] for neighbor in self.neighbors.values()], dtype=int)
+            received_ns = np.array([neighbor['received_ns'] for neighbor in self.neighbors.values()], dtype=np.int64)
+        return ids, (now_ns - received_ns) / 1e9
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to test a neighbor position against the rule ranges, returns the [alignment, cohesion, separation] flags
+    def ranges_of(self, position):
+        distance_sq = (self.own_position[0] - position[0]) ** 2 + (self.own_position[1] - position[1]) ** 2
+        return [distance_sq < Cons.ALIGNMENT_RANGE_SQ, distance_sq < Cons.COHESION_RANGE_SQ, distance_sq < Cons.SEPARATION_RANGE_SQ]
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to add (sign = +1) or remove (sign = -1) the contribution of one neighbor, the lock must be held
+    def apply(self, neighbor, sign):
+        in_alignment, in_cohesion, in_separation = neighbor['in_range']
+        position, velocity = neighbor['position'], neighbor['velocity']
+
+        if in_alignment:
+            self.alignment_sum[0] += sign * velocity[0]
+            self.alignment_sum[1] += sign * velocity[1]
+            self.counts[0] += sign
+        if in_cohesion:
+            self.cohesion_sum[0] += sign * position[0]
+            self.cohesion_sum[1] += sign * position[1]
+            self.counts[1] += sign
+        if in_separation:
+            self.separation_sum[0] += sign * position[0]
+            self.separation_sum[1] += sign * position[1]
+            self.counts[2] += sign
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to count a delta update and recompute the sums every RESUM_INTERVAL updates, the lock must be held
+    def count_update(self):
+        self.updates_since_resum += 1
+        if self.updates_since_resum >= self.RESUM_INTERVAL:
+            self.resum()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to recompute the sums from the cached neighbors, removes the drift of the deltas, the lock must be held
+    def resum(self):
+        self.alignment_sum = [0, 0]
+        self.cohesion_sum = [0, 0]
+        self.separation_sum = [0, 0]
+        self.counts = [0, 0, 0]
+        for neighbor in self.neighbors.values():
+            self.apply(neighbor, +1)
+        self.updates_since_resum = 0
@@ -0,0 +1,159 @@
+"""
+Neighbor Table
+
+The NeighborTable keeps the latest state of every neighbor together with when it was received (the robot's own
+monotonic clock) and the sender's sequence number, so the age of every neighbor is known. A neighbor that is not heard
+from for the TTL (it crashed, lost its connection or left the network) is evicted instead of feeding its frozen
+position to the rules forever.
+The table is one preallocated NumPy structured array (NEIGHBOR_DTYPE). Eviction moves the last row into the freed row,
+so the neighbors are always the first rows and view() hands the control tick a slice of the array instead of a copy.
+Position and velocity are (2,) fields, so view()['position'] is already the Nx2 array of the rules.
+It is fed by the receive side of the Communication_Handler, one message at a time (on_message) or a batch decoded in
+one call (on_messages). Every message is decoded once, here, and the stored row is passed on to a message listener
+(ex. NeighborAggregates.on_message), every evicted sender to an eviction listener (ex. NeighborAggregates.remove).
+The listeners are called with the table lock held, so a message and an eviction of the same sender reach them in the
+same order as the table and they always hold the same neighbors. A listener must not call back into the table.
+
+@ version   1.0
+"""
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+import threading                    # for the lock shared by the receive side and the control loop
+import time                         # for the receive timestamps
+import numpy as np                  # for the table rows
+
+from assets.State_Message import decode_state, decode_states   # for the neighbor state messages
+
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+NEIGHBOR_DTYPE = np.dtype([
+    ('id', '<u2'),
+    ('seq', '<u4'),                 # sequence number of the last message of the neighbor
+    ('t_ns', '<i8'),                # send time of the last message, on the neighbor's clock
+    ('received_ns', '<i8'),         # receive time of the last message, time.monotonic_ns() of this robot
+    ('position', '<f8', (2,)),      # [x, y]
+    ('velocity', '<f8', (2,)),      # [v_x, v_y]
+])
+
+
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+# ┃------------------------ # NeighborTable Class # ---------------------------┃ #
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+
+class NeighborTable:
+    # Initialize the NeighborTable.
+    # Parameters:
+    #       - ttl (float): seconds after its last message a neighbor is evicted.
+    #       - capacity (int): rows allocated at the start, doubled when more neighbors are heard.
+    #       - message_listener (function): called as message_listener(sender, row) for every valid message, row is the
+    #                                          row of the sender in the table (NEIGHBOR_DTYPE), only valid during the call.
+    #       - eviction_listener (function): called as eviction_listener(sender) for every evicted neighbor.
+    def __init__(self, ttl=1.0, capacity=16, message_listener=None, eviction_listener=None):
+
+        self.ttl_ns = int(ttl * 1e9)
+        self.message_listener = message_listener
+        self.eviction_listener = eviction_listener
+
+        self.rows = np.zeros(capacity, dtype=NEIGHBOR_DTYPE)
+        self.count = 0                  # neighbors in the table, they are rows[:count]
+        self.senders = []               # sender of every row
+        self.row_of = {}                # sender to its row
+        self.evicted = 0                # neighbors evicted so far
+
+        # Lock to synchronize the receive side with the control loop
+        self.lock = threading.Lock()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to handle a message received from a neighbor, called by the receive side of the Communication_Handler
+    # Parameters:
+    #       - sender (str): the sender, its IP address (or name in multicast mode).
+    #       - message (bytes): the neighbor state message (see State_Message.py).
+    def on_message(self, sender, message):
+        state = decode_state(message)
+        if state is None:
+            # ignore broken messages, the neighbor keeps its last valid data
+            return
+        robot_id, sequence, t_ns, x, y, v_x, v_y = state
+        received_ns = time.monotonic_ns()
+
+        with self.lock:
+            self.store(sender, (robot_id, sequence, t_ns, received_ns, (x, y), (v_x, v_y)))
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to handle many messages at once, decoded in one call and stored under one lock
+    # Parameters:
+    #       - messages (list): tuples (sender, message) in the order they were received, a sender may appear more than once.
+    def on_messages(self, messages):
+        states, kept = decode_states([message for sender, message in messages])
+        received_ns = time.monotonic_ns()
+
+        with self.lock:
+            for state, index in zip(states.tolist(), kept):
+                version, robot_id, sequence, t_ns, x, y, v_x, v_y = state
+                self.store(messages[index][0], (robot_id, sequence, t_ns, received_ns, (x, y), (v_x, v_y)))
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to write the row of a sender (added if new) and pass it to the message listener, the lock must be held
+    # Parameters:
+    #       - sender (str): the sender of the message.
+    #       - values (tuple): the row, in the order of NEIGHBOR_DTYPE.
+    def store(self, sender, values):
+        row = self.row_of.get(sender)
+        if row is None:
+            if self.count == len(self.rows):
+                self.rows = np.concatenate((self.rows, np.zeros(len(self.rows), dtype=NEIGHBOR_DTYPE)))
+            row = self.count
+            self.count += 1
+            self.senders.append(sender)
+            self.row_of[sender] = row
+        self.rows[row] = values
+
+        if self.message_listener is not None:
+            self.message_listener(sender, self.rows[row])
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to evict the neighbors not heard from for the TTL, call it once per tick
+    # Parameters:
+    #       - now_ns (int): the current time.monotonic_ns(), None to read it.
+    # Returns the list of evicted senders
+    def evict(self, now_ns=None):
+        now_ns = time.monotonic_ns() if now_ns is None else now_ns
+        evicted = []
+        with self.lock:
+            expired = np.flatnonzero(now_ns - self.rows['received_ns'][:self.count] > self.ttl_ns)
+            # from the last row back, so the rows moved into freed rows are checked already
+            for row in expired[::-1].tolist():
+                evicted.append(self.senders[row])
+                last = self.count - 1
+                if row != last:
+                    self.rows[row] = self.rows[last]
+                    self.senders[row] = self.senders[last]
+                    self.row_of[self.senders[row]] = row
+                del self.row_of[evicted[-1]]
+                self.senders.pop()
+                self.count = last
+            self.evicted += len(evicted)
+
+            # still under the lock, a message of an evicted sender arriving now is added back after the listener
+            # removed it, and not removed again
+            if self.eviction_listener is not None:
+                for sender in evicted:
+                    self.eviction_listener(sender)
+        return evicted
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to read the neighbors without copying them, the lock must be held while the view is used
+    # Returns the rows of the neighbors (a view of the table, NEIGHBOR_DTYPE), in the order of self.senders
+    def view(self):
+        return self.rows[:self.count]
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to compute the age of every neighbor, the lock must be held
+    # Parameters:
+    #       - now_ns (int): the current time.monotonic_ns(), None to read it.
+    # Returns the seconds since the last message of every neighbor, in the order of view()
+    def ages(self, now_ns=None):
+        now_ns = time.monotonic_ns() if now_ns is None else now_ns
+        return (now_ns - self.rows['received_ns'][:self.count]) / 1e9
@@ -0,0 +1,448 @@
+"""
+Spatial Index
+
+Neighbor indexes that replace the brute-force O(N) scan over all boids for every neighbor query.
+The SpatialHashGrid buckets boids into square cells, so a radius query only looks at the cells around
+the query point and a whole-swarm step costs roughly O(N·k) instead of O(N²), where k is the number
+of boids in the neighborhood. The KDTree is rebuilt every tick and keeps its cost when the flock bunches
+up into a few cells, where the grid degrades towards brute force.
+
+All indexes share one interface (rebuild, update, query_radius_batch, query_radius, query_pairs) and
+make_neighbor_index picks one by name ('brute', 'grid' or 'kdtree').
+
+This module only depends on numpy (it does not import Constants), so the BOLT swarm scripts can use it too.
+Run it directly to benchmark the indexes against brute force and find the crossover points.
+
+@ version   1.0
+"""
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+import math                         # for mathematical operations
+import time                         # for the benchmark
+import numpy as np                  # for array operations
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+# Queries return every point within the radius, padded by this relative tolerance so that no point is lost
+# to rounding. Callers apply their own strict range test (ex. distance_sq < ALIGNMENT_RANGE_SQ) on the result.
+RADIUS_TOLERANCE = 1e-9
+
+# Cell coordinates are packed into one int64 key: cell_x * KEY_STRIDE + (cell_y + KEY_OFFSET)
+KEY_STRIDE = 1 << 32
+KEY_OFFSET = 1 << 31
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to expand [start, stop) ranges into flat index arrays without a Python loop
+# Returns (owner, index), where owner[i] is the position of the range that index[i] came from
+def expand_ranges(starts, stops):
+    lengths = stops - starts
+    owner = np.repeat(np.arange(len(starts)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return owner, starts[owner] + offsets
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to find all pairs within radius by checking every pair, used as reference and for small swarms
+# Returns (query_index, point_index, distance_sq) arrays
+def brute_force_radius_pairs(query_points, points, radius):
+    query_points = np.asarray(query_points, dtype=float).reshape(-1, 2)
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    diff = query_points[:, None, :] - points[None, :, :]
+    distance_sq = diff[:, :, 0]**2 + diff[:, :, 1]**2
+    query_index, point_index = np.nonzero(distance_sq <= radius * radius * (1 + RADIUS_TOLERANCE))
+    return query_index, point_index, distance_sq[query_index, point_index]
+
+
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+# ┃----------------------- # NeighborIndex Class # ----------------------------┃ #
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+
+# Base class of the neighbor indexes, subclasses implement rebuild and query_radius_batch
+class NeighborIndex:
+    positions = np.zeros((0, 2))        # Nx2 positions of the indexed points
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to return the number of indexed points
+    def __len__(self):
+        return len(self.positions)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to update the index for the next tick, by default the index is rebuilt
+    # Parameters:
+    #       - positions (array Nx2): new positions of all points, in the same order as before.
+    def update(self, positions):
+        self.rebuild(positions)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to find all indexed points within radius of one point
+    # Returns (point_index, distance_sq) arrays
+    def query_radius(self, point, radius):
+        _, point_index, distance_sq = self.query_radius_batch([point], radius)
+        return point_index, distance_sq
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to find every ordered pair (i, j), i != j, of indexed points within radius of each other
+    # Returns (i, j, distance_sq) arrays
+    def query_pairs(self, radius):
+        i, j, distance_sq = self.query_radius_batch(self.positions, radius)
+        not_self = i != j
+        return i[not_self], j[not_self], distance_sq[not_self]
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to find the k nearest indexed points of each query point, by checking every point.
+    # Query points are handled in blocks of chunk_size, so the distance matrix stays chunk_size x N.
+    # Parameters:
+    #       - query_points (array Mx2): the points to search around.
+    #       - k (int): the number of neighbors to return.
+    # Returns (point_index, distance_sq) arrays of shape M x min(k, N), nearest first
+    def query_knn(self, query_points, k, chunk_size=512):
+        query_points = np.asarray(query_points, dtype=float).reshape(-1, 2)
+        k = min(k, len(self.positions))
+        point_index = np.zeros((len(query_points), k), dtype=np.int64)
+        distance_sq = np.zeros((len(query_points), k))
+
+        for start in range(0, len(query_points), chunk_size):
+            stop = min(start + chunk_size, len(query_points))
+            diff = query_points[start:stop, None, :] - self.positions[None, :, :]
+            chunk_sq = diff[:, :, 0]**2 + diff[:, :, 1]**2
+
+            # partial selection of the k nearest, then only those k are sorted
+            if k < len(self.positions):
+                nearest = np.argpartition(chunk_sq, k - 1, axis=1)[:, :k] if k > 0 else np.zeros((stop - start, 0), dtype=np.int64)
+            else:
+                nearest = np.tile(np.arange(k), (stop - start, 1))
+            nearest_sq = np.take_along_axis(chunk_sq, nearest, axis=1)
+            by_distance = np.argsort(nearest_sq, axis=1, kind='stable')
+            point_index[start:stop] = np.take_along_axis(nearest, by_distance, axis=1)
+            distance_sq[start:stop] = np.take_along_axis(nearest_sq, by_distance, axis=1)
+
+        return point_index, distance_sq
+
+
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+# ┃---------------------- # BruteForceIndex Class # ---------------------------┃ #
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+
+# Checks every point for every query, the fastest choice for small swarms
+class BruteForceIndex(NeighborIndex):
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to rebuild the index, brute force only keeps the positions
+    def rebuild(self, positions):
+        self.positions = np.array(positions, dtype=float).reshape(-1, 2)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to find all indexed points within radius of each query point
+    # Returns (query_index, point_index, distance_sq) arrays
+    def query_radius_batch(self, query_points, radius):
+        return brute_force_radius_pairs(query_points, self.positions, radius)
+
+
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+# ┃---------------------- # SpatialHashGrid Class # ---------------------------┃ #
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+
+class SpatialHashGrid(NeighborIndex):
+    # Initialize the SpatialHashGrid.
+    # Parameters:
+    #       - cell_size (float): side length of each cell, best set to the largest query radius.
+    def __init__(self, cell_size):
+        self.cell_size = float(cell_size)
+
+        self.positions = np.zeros((0, 2))           # Nx2 positions of the indexed points
+        self.cell_keys = np.zeros(0, dtype=np.int64)  # cell key of every point
+
+        # Points sorted by cell key, so every occupied cell is one contiguous slice of sorted_index
+        self.sorted_index = np.zeros(0, dtype=np.int64)
+        self.occupied_keys = np.zeros(0, dtype=np.int64)    # sorted keys of occupied cells
+        self.cell_starts = np.zeros(0, dtype=np.int64)      # start of each occupied cell in sorted_index
+        self.cell_stops = np.zeros(0, dtype=np.int64)       # stop of each occupied cell in sorted_index
+
+        self.rebuild_count = 0                      # number of times the cell order had to be rebuilt
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to compute the cell key of every point
+    def keys_of(self, points):
+        cells = np.floor(points / self.cell_size).astype(np.int64)
+        return cells[:, 0] * KEY_STRIDE + (cells[:, 1] + KEY_OFFSET)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to rebuild the grid from scratch
+    # Parameters:
+    #       - positions (array Nx2): positions of all points.
+    def rebuild(self, positions):
+        self.positions = np.array(positions, dtype=float).reshape(-1, 2)
+        self.cell_keys = self.keys_of(self.positions)
+
+        self.sorted_index = np.argsort(self.cell_keys, kind='stable')
+        sorted_keys = self.cell_keys[self.sorted_index]
+        self.occupied_keys, self.cell_starts, counts = np.unique(sorted_keys, return_index=True, return_counts=True)
+        self.cell_stops = self.cell_starts + counts
+        self.rebuild_count += 1
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to update the grid for the next tick.
+    # Boids move much less than a cell per tick, so usually no point changes cell and only the
+    # positions are refreshed. The cell order is rebuilt only when a point moved to another cell.
+    # Parameters:
+    #       - positions (array Nx2): new positions of all points, in the same order as before.
+    def update(self, positions):
+        positions = np.array(positions, dtype=float).reshape(-1, 2)
+        if len(positions) != len(self.positions):
+            self.rebuild(positions)
+            return
+
+        new_keys = self.keys_of(positions)
+        if np.array_equal(new_keys, self.cell_keys):
+            self.positions = positions
+        else:
+            self.rebuild(positions)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to find all indexed points within radius of each query point
+    # Parameters:
+    #       - query_points (array Mx2): the points to search around.
+    #       - radius (float): the search radius.
+    # Returns (query_index, point_index, distance_sq) arrays, one entry per (query, point) pair in range
+    def query_radius_batch(self, query_points, radius):
+        query_points = np.asarray(query_points, dtype=float).reshape(-1, 2)
+        empty = np.zeros(0, dtype=np.int64)
+        if len(self.positions) == 0 or len(query_points) == 0:
+            return empty, empty, np.zeros(0)
+
+        # number of cell rings around the query cell that can hold points within radius
+        rings = max(1, int(math.ceil(radius / self.cell_size)))
+        query_keys = self.keys_of(query_points)
+
+        query_parts, point_parts = [], []
+        for dx in range(-rings, rings + 1):
+            for dy in range(-rings, rings + 1):
+                # locate the neighbor cell of every query point among the occupied cells
+                keys = query_keys + dx * KEY_STRIDE + dy
+                slot = np.searchsorted(self.occupied_keys, keys)
+                slot_clipped = np.minimum(slot, len(self.occupied_keys) - 1)
+                found = self.occupied_keys[slot_clipped] == keys
+                if not found.any():
+                    continue
+
+                owner, sorted_slot = expand_ranges(self.cell_starts[slot_clipped[found]], self.cell_stops[slot_clipped[found]])
+                query_parts.append(np.nonzero(found)[0][owner])
+                point_parts.append(self.sorted_index[sorted_slot])
+
+        if not query_parts:
+            return empty, empty, np.zeros(0)
+
+        query_index = np.concatenate(query_parts)
+        point_index = np.concatenate(point_parts)
+        diff = query_points[query_index] - self.positions[point_index]
+        distance_sq = diff[:, 0]**2 + diff[:, 1]**2
+
+        in_range = distance_sq <= radius * radius * (1 + RADIUS_TOLERANCE)
+        return query_index[in_range], point_index[in_range], distance_sq[in_range]
+
+
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+# ┃-------------------------- # KDTree Class # --------------------------------┃ #
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+
+# Static KD-tree, rebuilt every tick. The tree is kept as flat node arrays over one permutation of
+# the points (every node is a contiguous slice of order), so there is no Python object per point.
+# Queries walk the tree one level at a time for all query points together.
+class KDTree(NeighborIndex):
+    # Initialize the KDTree.
+    # Parameters:
+    #       - leaf_size (int): maximum number of points in a leaf node.
+    def __init__(self, leaf_size=16):
+        self.leaf_size = leaf_size
+        self.rebuild(np.zeros((0, 2)))
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to build the tree
+    # Parameters:
+    #       - positions (array Nx2): positions of all points.
+    def rebuild(self, positions):
+        self.positions = np.array(positions, dtype=float).reshape(-1, 2)
+        self.order = np.arange(len(self.positions))     # point indexes, every node is a slice of it
+
+        starts, stops, lefts, box_mins, box_maxs = [], [], [], [], []
+        nodes = [(0, len(self.positions))]
+        node = 0
+        # split the nodes breadth first, the two children of a node get consecutive ids
+        while node < len(nodes):
+            start, stop = nodes[node]
+            points = self.positions[self.order[start:stop]]
+            box_min = points.min(axis=0) if stop > start else np.full(2, np.inf)
+            box_max = points.max(axis=0) if stop > start else np.full(2, -np.inf)
+
+            left = -1
+            if stop - start > self.leaf_size:
+                # split the widest side of the bounding box at the median
+                dim = int(np.argmax(box_max - box_min))
+                mid = (start + stop) // 2
+                part = np.argpartition(points[:, dim], mid - start)
+                self.order[start:stop] = self.order[start:stop][part]
+                left = len(nodes)
+                nodes.append((start, mid))
+                nodes.append((mid, stop))
+
+            starts.append(start)
+            stops.append(stop)
+            lefts.append(left)
+            box_mins.append(box_min)
+            box_maxs.append(box_max)
+            node += 1
+
+        self.starts = np.array(starts, dtype=np.int64)      # start of each node in order
+        self.stops = np.array(stops, dtype=np.int64)        # stop of each node in order
+        self.lefts = np.array(lefts, dtype=np.int64)        # left child of each node (right is left + 1), -1 for leaves
+        self.box_mins = np.array(box_mins).reshape(-1, 2)   # bounding box of each node
+        self.box_maxs = np.array(box_maxs).reshape(-1, 2)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to find all indexed points within radius of each query point
+    # Parameters:
+    #       - query_points (array Mx2): the points to search around.
+    #       - radius (float or array M): the search radius, or one radius per query point.
+    # Returns (query_index, point_index, distance_sq) arrays, one entry per (query, point) pair in range
+    def query_radius_batch(self, query_points, radius):
+        query_points = np.asarray(query_points, dtype=float).reshape(-1, 2)
+        radius_sq = np.broadcast_to(np.asarray(radius, dtype=float)**2 * (1 + RADIUS_TOLERANCE), (len(query_points),))
+        empty = np.zeros(0, dtype=np.int64)
+        if len(self.positions) == 0 or len(query_points) == 0:
+            return empty, empty, np.zeros(0)
+
+        # (query, node) pairs still to visit, every query starts at the root
+        active_query = np.arange(len(query_points))
+        active_node = np.zeros(len(query_points), dtype=np.int64)
+        query_parts, point_parts = [], []
+
+        while len(active_query):
+            # drop the nodes whose bounding box is further than radius from the query point
+            points = query_points[active_query]
+            gap = np.maximum(self.box_mins[active_node] - points, 0) + np.maximum(points - self.box_maxs[active_node], 0)
+            near = gap[:, 0]**2 + gap[:, 1]**2 <= radius_sq[active_query]
+            active_query, active_node = active_query[near], active_node[near]
+
+            # leaves hand out their points as candidates
+            leaf = self.lefts[active_node] < 0
+            owner, slot = expand_ranges(self.starts[active_node[leaf]], self.stops[active_node[leaf]])
+            query_parts.append(active_query[leaf][owner])
+            point_parts.append(self.order[slot])
+
+            # inner nodes pass the query on to both children
+            inner_query, inner_node = active_query[~leaf], active_node[~leaf]
+            active_query = np.concatenate((inner_query, inner_query))
+            active_node = np.concatenate((self.lefts[inner_node], self.lefts[inner_node] + 1))
+
+        query_index = np.concatenate(query_parts)
+        point_index = np.concatenate(point_parts)
+        diff = query_points[query_index] - self.positions[point_index]
+        distance_sq = diff[:, 0]**2 + diff[:, 1]**2
+
+        in_range = distance_sq <= radius_sq[query_index]
+        return query_index[in_range], point_index[in_range], distance_sq[in_range]
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to find the k nearest indexed points of each query point
+    # Parameters:
+    #       - query_points (array Mx2): the points to search around.
+    #       - k (int): the number of neighbors to return.
+    # Returns (point_index, distance_sq) arrays of shape M x min(k, N), nearest first
+    def query_knn(self, query_points, k):
+        query_points = np.asarray(query_points, dtype=float).reshape(-1, 2)
+        k = min(k, len(self.positions))
+        if k == 0 or len(query_points) == 0:
+            return np.zeros((len(query_points), k), dtype=np.int64), np.zeros((len(query_points), k))
+
+        # walk down to the smallest node on the query side that still holds k points,
+        # the k-th nearest of its points is an upper bound of the k-th nearest distance
+        node = np.zeros(len(query_points), dtype=np.int64)
+        while True:
+            left = self.lefts[node]
+            inner = left >= 0
+            right = np.where(inner, left + 1, node)
+            right_gap = np.maximum(self.box_mins[right] - query_points, 0) + np.maximum(query_points - self.box_maxs[right], 0)
+            left_gap = np.maximum(self.box_mins[left] - query_points, 0) + np.maximum(query_points - self.box_maxs[left], 0)
+            child = np.where((right_gap**2).sum(axis=1) < (left_gap**2).sum(axis=1), right, left)
+            move = inner & (self.stops[child] - self.starts[child] >= k)
+            if not move.any():
+                break
+            node = np.where(move, child, node)
+
+        owner, slot = expand_ranges(self.starts[node], self.stops[node])
+        diff = query_points[owner] - self.positions[self.order[slot]]
+        bound_sq = kth_smallest_per_group(owner, diff[:, 0]**2 + diff[:, 1]**2, len(query_points), k)
+
+        # every point inside the bound is a candidate, keep the k nearest of them
+        query_index, point_index, distance_sq = self.query_radius_batch(query_points, np.sqrt(bound_sq))
+        by_distance = np.lexsort((distance_sq, query_index))
+        query_index, point_index, distance_sq = query_index[by_distance], point_index[by_distance], distance_sq[by_distance]
+        keep = rank_in_group(query_index) < k
+        return point_index[keep].reshape(-1, k), distance_sq[keep].reshape(-1, k)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to give every element its rank inside its group, groups must be sorted (ex. [0,0,1,1,1] -> [0,1,0,1,2])
+def rank_in_group(groups):
+    return np.arange(len(groups)) - np.searchsorted(groups, groups)
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to find the k-th smallest value of each group, owner gives the group (0 .. groups-1) of every value
+# Groups with less than k values get inf
+def kth_smallest_per_group(owner, values, groups, k):
+    by_value = np.lexsort((values, owner))
+    owner, values = owner[by_value], values[by_value]
+    is_kth = rank_in_group(owner) == k - 1
+    kth = np.full(groups, np.inf)
+    kth[owner[is_kth]] = values[is_kth]
+    return kth
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Names of the available neighbor indexes, selected with NEIGHBOR_INDEX in inputs_data.json
+NEIGHBOR_INDEX_KINDS = ('brute', 'grid', 'kdtree')
+
+# Function to create a neighbor index by name
+# Parameters:
+#       - kind (str): 'brute', 'grid' or 'kdtree'.
+#       - cell_size (float): side length of the grid cells, best set to the largest query radius.
+def make_neighbor_index(kind, cell_size):
+    if kind == 'brute':
+        return BruteForceIndex()
+    if kind == 'grid':
+        return SpatialHashGrid(cell_size)
+    if kind == 'kdtree':
+        return KDTree()
+    raise ValueError(f"Unknown neighbor index '{kind}', expected one of {NEIGHBOR_INDEX_KINDS}")
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Benchmark: time a whole-swarm neighbor search with every index, for a uniform swarm at a constant density
+# and for a clustered swarm where the boids bunch up in a few flocks, to find the crossover points.
+def benchmark(sizes=(10, 30, 100, 300, 1000, 3000), radius=1.5, boids_per_square_meter=0.5, repeats=5):
+    for layout in ('uniform', 'clustered'):
+        print(f"\n{layout} swarm")
+        print(f"{'N':>6}" + "".join(f"{kind + ' (ms)':>14}" for kind in NEIGHBOR_INDEX_KINDS))
+        for n in sizes:
+            side = math.sqrt(n / boids_per_square_meter)
+            if layout == 'uniform':
+                positions = np.random.uniform(0, side, (n, 2))
+            else:
+                flocks = np.random.uniform(0, side, (4, 2))
+                positions = flocks[np.random.randint(0, len(flocks), n)] + np.random.normal(0, radius, (n, 2))
+
+            times = []
+            for kind in NEIGHBOR_INDEX_KINDS:
+                index = make_neighbor_index(kind, radius)
+                start = time.perf_counter()
+                for _ in range(repeats):
+                    index.rebuild(positions)
+                    index.query_pairs(radius)
+                times.append((time.perf_counter() - start) / repeats * 1000)
+
+            print(f"{n:>6}" + "".join(f"{t:>14.3f}" for t in times))
+
+
+if __name__ == '__main__':
+    benchmark()
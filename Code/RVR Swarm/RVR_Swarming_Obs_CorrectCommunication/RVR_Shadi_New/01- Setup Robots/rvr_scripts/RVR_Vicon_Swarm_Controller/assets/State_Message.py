@@ -0,0 +1,71 @@
+"""
+State Message
+
+The state message every robot sends its neighbors each tick, in a fixed binary layout instead of the text
+"id,x,y,delta_x,delta_y". A message is STATE_SIZE bytes, little-endian and packed:
+version (uint8), robot id (uint16), sequence number (uint32), send time (int64, ns of the sender's monotonic clock,
+the clock of its telemetry records), position x, y and velocity x, y (float32).
+The version comes first so a robot running an older or newer layout is recognised and its messages are ignored.
+decode_states turns many messages into one NumPy structured array (STATE_DTYPE) in one call.
+
+@ version   1.0
+"""
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+import struct                       # for packing and unpacking one message
+import numpy as np                  # for decoding many messages at once
+
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+STATE_VERSION = 1
+
+# The same layout for struct (one message) and NumPy (many messages)
+STATE_STRUCT = struct.Struct("<BHIqffff")
+STATE_DTYPE = np.dtype([
+    ('version', 'u1'),
+    ('id', '<u2'),
+    ('seq', '<u4'),
+    ('t_ns', '<i8'),
+    ('x', '<f4'), ('y', '<f4'),
+    ('v_x', '<f4'), ('v_y', '<f4'),
+])
+STATE_SIZE = STATE_STRUCT.size
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to pack the state of a robot into a message
+# Parameters:
+#       - robot_id (int): id of the sending robot.
+#       - sequence (int): message number of the sender, counts up from 1 (wraps at 2**32).
+#       - t_ns (int): send time, time.monotonic_ns() of the sender.
+#       - x, y (float): position of the sender.
+#       - v_x, v_y (float): velocity of the sender.
+def encode_state(robot_id, sequence, t_ns, x, y, v_x, v_y):
+    return STATE_STRUCT.pack(STATE_VERSION, robot_id, sequence & 0xFFFFFFFF, t_ns, x, y, v_x, v_y)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to unpack one message
+# Returns (robot_id, sequence, t_ns, x, y, v_x, v_y), or None for a message of another size or version
+def decode_state(message):
+    if len(message) != STATE_SIZE or message[0] != STATE_VERSION:
+        return None
+    return STATE_STRUCT.unpack(message)[1:]
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to unpack many messages in one call, messages of another size or version are left out
+# Parameters:
+#       - messages (list): the messages (bytes), ex. the datagrams drained from the socket in one go.
+# Returns (states, kept): a structured array of STATE_DTYPE with one row per valid message, and the index in messages
+# of every row
+def decode_states(messages):
+    kept = [index for index, message in enumerate(messages) if len(message) == STATE_SIZE]
+    states = np.frombuffer(b"".join([messages[index] for index in kept]), dtype=STATE_DTYPE)
+    if len(states) > 0 and (states['version'] != STATE_VERSION).any():
+        valid = states['version'] == STATE_VERSION
+        states = states[valid]
+        kept = [index for index, is_valid in zip(kept, valid.tolist()) if is_valid]
+    return states, kept
@@ -0,0 +1,266 @@
+"""
+Swarm State
+
+The SwarmState class stores a whole swarm as arrays (structure of arrays) instead of one Boid object per robot.
+Positions and velocities are Nx2 arrays and headings, linear and angular velocities are arrays of length N.
+update_velocities applies the same rules as Boid.update_velocity (alignment, cohesion, separation,
+wall avoidance and obstacle avoidance) to all N boids in one call, which makes headless runs with
+thousands of boids fast enough to tune inputs_data.json.
+
+@ version   1.0
+"""
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+import numpy as np                  # for array operations
+
+# Constants must be first import
+from assets import Constants as Cons            # for Constants and Global variables
+from Helper_Functions import *                  # for helper functions ex. normalize_speed_limit_array ...
+from Boids_Rules import obstacle_avoidance_array    # for obstacle avoidance of all boids
+from Spatial_Index import make_neighbor_index, BruteForceIndex    # for neighbor queries
+
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+# ┃------------------------- # SwarmState Class # -----------------------------┃ #
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+
+class SwarmState:
+    # Number of boids handled per block when computing pairwise distances, keeps memory at chunk_size x N
+    chunk_size = 512
+
+    # Initialize the SwarmState.
+    # Parameters:
+    #       - start_positions (array Nx2): start [x, y] of every boid.
+    #       - start_heading_angles (array N): start orientation angle of every boid.
+    #       - obstacles_positions (array Mx2): centers of all obstacles, None if there are no obstacles.
+    #       - obstacles_half_sizes (array Mx2 or [x, y]): half extents of the obstacles (default is Obstacle_half_size).
+    #       - neighbor_index: name of the index used to find neighbors ('brute', 'grid' or 'kdtree'), or an index object.
+    #       - neighbor_mode (str): 'metric' to use every neighbor inside the rule ranges, 'topological' to use only the TOPOLOGICAL_K nearest.
+    def __init__(self, start_positions, start_heading_angles, obstacles_positions=None, obstacles_half_sizes=Cons.Obstacle_half_size,
+                 neighbor_index=Cons.NEIGHBOR_INDEX, neighbor_mode=Cons.NEIGHBOR_MODE):
+
+        self.positions              = np.array(start_positions, dtype=float).reshape(-1, 2)
+        self.heading_angles         = np.array(start_heading_angles, dtype=float).reshape(-1)
+        self.ids                    = np.arange(len(self.positions))
+
+        # Calculate the forward velocity
+        velocities                  = Cons.MAX_LINEAR_SPEED * np.column_stack((np.cos(self.heading_angles), np.sin(self.heading_angles)))
+        self.velocities             = normalize_speed_limit_array(velocities, Cons.MIN_LINEAR_SPEED, Cons.MAX_LINEAR_SPEED)
+
+        self.linear_velocities      = np.full(len(self.positions), float(Cons.MAX_LINEAR_SPEED))
+        self.angular_velocities     = np.zeros(len(self.positions))
+
+        self.obstacles_positions    = obstacles_positions
+        self.obstacles_half_sizes   = obstacles_half_sizes
+        self.neighbor_index         = make_rules_neighbor_index(neighbor_index) if isinstance(neighbor_index, str) else neighbor_index
+        self.neighbor_mode          = neighbor_mode
+
+        # Latest rule forces and neighbor counts, kept for logging and analysis
+        self.alignment_forces       = np.zeros_like(self.positions)
+        self.cohesion_forces        = np.zeros_like(self.positions)
+        self.separation_forces      = np.zeros_like(self.positions)
+        self.obs_avoidance_forces   = np.zeros_like(self.positions)
+        self.neighbor_counts        = np.zeros((len(self.positions), 3), dtype=int)     # n_a, n_c, n_s
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to return the number of boids
+    def __len__(self):
+        return len(self.positions)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to compute the alignment, cohesion and separation forces of all boids
+    # Returns the three Nx2 force arrays and an Nx3 array of neighbor counts (n_a, n_c, n_s)
+    def neighbor_forces(self):
+        if self.neighbor_mode == 'topological':
+            sums = self.topological_neighbor_sums()
+        elif self.neighbor_index is None:
+            sums = self.brute_force_neighbor_sums()
+        else:
+            sums = self.indexed_neighbor_sums()
+        return self.steer_from_sums(*sums)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to sum neighbors velocities and positions inside each range by checking every pair of boids
+    def brute_force_neighbor_sums(self):
+        n = len(self.positions)
+        alignment_sum = np.zeros((n, 2))
+        cohesion_sum = np.zeros((n, 2))
+        separation_sum = np.zeros((n, 2))
+        counts = np.zeros((n, 3), dtype=int)
+
+        # work on blocks of rows so the distance matrix never needs more than chunk_size x N floats
+        for start in range(0, n, self.chunk_size):
+            stop = min(start + self.chunk_size, n)
+            diff = self.positions[start:stop, None, :] - self.positions[None, :, :]
+            distance_sq = diff[:, :, 0]**2 + diff[:, :, 1]**2
+            # a boid is never its own neighbor
+            distance_sq[np.arange(stop - start), np.arange(start, stop)] = np.inf
+
+            for column, (range_sq, values, sums) in enumerate((
+                    (Cons.ALIGNMENT_RANGE_SQ, self.velocities, alignment_sum),
+                    (Cons.COHESION_RANGE_SQ, self.positions, cohesion_sum),
+                    (Cons.SEPARATION_RANGE_SQ, self.positions, separation_sum))):
+                in_range = distance_sq < range_sq
+                sums[start:stop] = in_range @ values
+                counts[start:stop, column] = in_range.sum(axis=1)
+
+        return alignment_sum, cohesion_sum, separation_sum, counts
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to sum neighbors velocities and positions inside each range using the neighbor index
+    def indexed_neighbor_sums(self):
+        # one query with the largest range, then every rule keeps the pairs inside its own range
+        self.neighbor_index.update(self.positions)
+        largest_range = max(Cons.ALIGNMENT_RANGE, Cons.COHESION_RANGE, Cons.SEPARATION_RANGE)
+        return self.pair_sums(*self.neighbor_index.query_pairs(largest_range))
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to sum neighbors velocities and positions inside each range, using only the TOPOLOGICAL_K nearest neighbors of every boid
+    # The k nearest come from a partial selection (argpartition), the rule ranges still apply to them
+    def topological_neighbor_sums(self):
+        n = len(self.positions)
+        k = max(0, min(Cons.TOPOLOGICAL_K, n - 1))
+        index = self.neighbor_index if self.neighbor_index is not None else BruteForceIndex()
+        index.update(self.positions)
+
+        # ask for one more neighbor because every boid also finds itself
+        point_index, distance_sq = index.query_knn(self.positions, k + 1)
+        not_self = point_index != np.arange(n)[:, None]
+        keep = not_self & (np.cumsum(not_self, axis=1) <= k)
+        return self.pair_sums(np.nonzero(keep)[0], point_index[keep], distance_sq[keep])
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to sum neighbors velocities and positions inside each range from (boid, neighbor, distance_sq) pairs
+    def pair_sums(self, boid_index, neighbor_index, distance_sq):
+        n = len(self.positions)
+        alignment_sum = np.zeros((n, 2))
+        cohesion_sum = np.zeros((n, 2))
+        separation_sum = np.zeros((n, 2))
+        counts = np.zeros((n, 3), dtype=int)
+
+        for column, (range_sq, values, sums) in enumerate((
+                (Cons.ALIGNMENT_RANGE_SQ, self.velocities, alignment_sum),
+                (Cons.COHESION_RANGE_SQ, self.positions, cohesion_sum),
+                (Cons.SEPARATION_RANGE_SQ, self.positions, separation_sum))):
+            in_range = distance_sq < range_sq
+            boids, neighbors = boid_index[in_range], neighbor_index[in_range]
+            sums[:, 0] = np.bincount(boids, weights=values[neighbors, 0], minlength=n)
+            sums[:, 1] = np.bincount(boids, weights=values[neighbors, 1], minlength=n)
+            counts[:, column] = np.bincount(boids, minlength=n)
+
+        return alignment_sum, cohesion_sum, separation_sum, counts
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to turn the neighbor sums into steering forces, same steps as alignment_rule, cohesion_rule and separation_rule
+    def steer_from_sums(self, alignment_sum, cohesion_sum, separation_sum, counts):
+        alignment_force = np.zeros_like(self.positions)
+        cohesion_force = np.zeros_like(self.positions)
+        separation_force = np.zeros_like(self.positions)
+
+        has_a, has_c, has_s = (counts > 0).T
+
+        # steering match velocity
+        alignment_force[has_a] = normalize_speed_limit_array(
+            alignment_sum[has_a] / counts[has_a, 0, None] - self.velocities[has_a], Cons.MIN_LINEAR_SPEED, Cons.MAX_LINEAR_SPEED)
+        # steering toward position
+        cohesion_force[has_c] = normalize_speed_limit_array(
+            cohesion_sum[has_c] / counts[has_c, 1, None] - self.positions[has_c], Cons.MIN_LINEAR_SPEED, Cons.MAX_LINEAR_SPEED)
+        # steering away
+        separation_force[has_s] = normalize_speed_limit_array(
+            self.positions[has_s] - separation_sum[has_s] / counts[has_s, 2, None], Cons.MIN_LINEAR_SPEED, Cons.MAX_LINEAR_SPEED)
+
+        return alignment_force, cohesion_force, separation_force, counts
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to compute the wall avoidance force of all boids, same as wall_avoidance_rule
+    def wall_avoidance_forces(self):
+        TURN_FACTOR = 1.5 * Cons.WALL_AVOIDANCE_WEIGHT
+
+        # with an arena geometry the direction away from walls and static obstacles comes from its distance field
+        if Cons.ARENA_GEOMETRY is not None:
+            wall_avoidance = TURN_FACTOR * Cons.ARENA_GEOMETRY.avoidance_directions(self.positions, Cons.WALL_AVOIDANCE_RANGE)
+            return normalize_speed_limit_array(wall_avoidance, Cons.MIN_LINEAR_SPEED, Cons.MAX_LINEAR_SPEED)
+
+        x, y = self.positions[:, 0], self.positions[:, 1]
+
+        wall_avoidance = np.zeros_like(self.positions)
+        wall_avoidance[:, 0] = np.where(x < 0 + Cons.WALL_AVOIDANCE_RANGE, TURN_FACTOR,
+                                        np.where(x > Cons.ARENA_WIDTH - Cons.WALL_AVOIDANCE_RANGE, -TURN_FACTOR, 0))
+        wall_avoidance[:, 1] = np.where(y > Cons.ARENA_LENGTH - Cons.WALL_AVOIDANCE_RANGE, -TURN_FACTOR,
+                                        np.where(y < 0 + Cons.WALL_AVOIDANCE_RANGE, TURN_FACTOR, 0))
+
+        return normalize_speed_limit_array(wall_avoidance, Cons.MIN_LINEAR_SPEED, Cons.MAX_LINEAR_SPEED)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to compute the obstacle avoidance force of all boids, same as Obs_avoidance_rule
+    def obstacle_avoidance_forces(self):
+        if self.obstacles_positions is None:
+            return np.zeros_like(self.positions)
+        return obstacle_avoidance_array(self.positions, self.velocities, self.obstacles_positions, self.obstacles_half_sizes)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to compute next step math for all boids, same steps as Boid.update_velocity
+    def update_velocities(self):
+
+        # Calculate boid forces
+        alignment_force, cohesion_force, separation_force, counts = self.neighbor_forces()
+        wall_avoidance_force = self.wall_avoidance_forces()
+        obs_avoidance_force = self.obstacle_avoidance_forces()
+
+        force = (
+                    Cons.ALIGNMENT_WEIGHT            * alignment_force            +
+                    Cons.COHESION_WEIGHT             * cohesion_force             +
+                    Cons.SEPARATION_WEIGHT           * separation_force           +
+                    Cons.WALL_AVOIDANCE_WEIGHT       * wall_avoidance_force       +
+                    Cons.Obs_Avoid_Likelihood        * obs_avoidance_force
+                )
+
+        # round values to make numbers same in all OS (Windows, Linux)
+        force = np.round(force, 5)
+
+        # Update and normalize boids velocities to limit them in range [MIN_LINEAR_SPEED, MAX_LINEAR_SPEED]
+        self.velocities = normalize_speed_limit_array(self.velocities + force, Cons.MIN_LINEAR_SPEED, Cons.MAX_LINEAR_SPEED)
+
+        desired_angles = np.arctan2(self.velocities[:, 1], self.velocities[:, 0])
+        angle_diff = normalize_angle_diff_array(desired_angles - self.heading_angles)
+
+        # Calculate angular_velocity based on Kp and angle_diff, then normalize it
+        Kp = 5
+        self.angular_velocities = normalize_angular_velocity_array(Kp * angle_diff, Cons.MIN_ANGULAR_SPEED, Cons.MAX_ANGULAR_SPEED)
+
+        # Slow down while turning, move forward at full speed once facing the correct direction
+        ANGLE_THRESHOLD = 0.05
+        slow_temp = np.degrees(np.abs(angle_diff)) / 20 + 1
+        self.linear_velocities = np.where(np.abs(angle_diff) > ANGLE_THRESHOLD,
+                                          np.round(Cons.MAX_LINEAR_SPEED / slow_temp, 5), Cons.MAX_LINEAR_SPEED)
+
+        # keep the latest forces and neighbor counts
+        self.alignment_forces, self.cohesion_forces, self.separation_forces = alignment_force, cohesion_force, separation_force
+        self.obs_avoidance_forces = obs_avoidance_force
+        self.neighbor_counts = counts
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to run one headless simulation step, the same order as Agent.run_agent
+    # Parameters:
+    #       - dt (float): the time step in seconds.
+    def step(self, dt):
+        # update heading_angle by adding current angular_velocity value
+        self.heading_angles = np.round(self.heading_angles + self.angular_velocities, 5)
+
+        self.update_velocities()
+
+        # move every boid forward along its heading
+        self.positions = self.positions + (self.linear_velocities * dt)[:, None] * np.column_stack(
+            (np.cos(self.heading_angles), np.sin(self.heading_angles)))
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to create the neighbor index for the boid rules by name, the grid cells are sized NEIGHBOR_GRID_CELL_SIZE
+# Returns None for 'brute', SwarmState then checks every pair in chunks
+def make_rules_neighbor_index(kind=Cons.NEIGHBOR_INDEX):
+    if kind == 'brute':
+        return None
+    return make_neighbor_index(kind, Cons.NEIGHBOR_GRID_CELL_SIZE)
@@ -0,0 +1,129 @@
+"""
+Telemetry Writer
+
+The TelemetryWriter class takes one record per control tick and writes it to the telemetry file from a background
+thread, so the control loop never waits on the SD card. Records go into a bounded deque (append and popleft need no
+lock), the thread writes everything pending as one batch and flushes the file every FLUSH_INTERVAL seconds.
+When the file cannot keep up and MAX_PENDING records are waiting, new records are dropped and counted instead of
+blocking the tick. A disabled writer opens no file, starts no thread and ignores every record.
+With file_format "binary" the records go to a binary log (Binary_Log.py) instead of text lines, a text log gets a
+sparse index (Log_Index.py) so readers can seek to a time window or robot.
+
+@ version   1.0
+"""
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+import collections                  # for the deque of pending records
+import threading                    # for the background writer thread
+import time                         # for the time of each record
+
+from Binary_Log import BinaryLogWriter, LAYOUT_SEPARATORS     # for the binary telemetry file
+from Log_Index import LogIndexWriter                          # for the index of the text telemetry file
+
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+# ┃---------------------- # TelemetryWriter Class # ---------------------------┃ #
+# ┃━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┃ #
+
+class TelemetryWriter:
+    # Largest number of records waiting to be written, about 100 seconds of ticks at 20 Hz
+    MAX_PENDING = 2000
+    # Seconds between two batches written by the background thread
+    FLUSH_INTERVAL = 0.5
+
+    # Initialize the TelemetryWriter.
+    # Parameters:
+    #       - file_path (str): the telemetry file, created new with the header line.
+    #       - header (str): the header line of the file.
+    #       - enabled (bool): False makes every function a no-op.
+    #       - file_format (str): "text" for comma separated lines, "binary" for a binary log of the rvr layout.
+    #       - inputs_data (dict): the inputs_data.json of the run, kept in the header of a binary log.
+    def __init__(self, file_path=None, header=None, enabled=True, file_format="text", inputs_data=None):
+
+        self.enabled = enabled
+        self.pending = collections.deque()      # records waiting for the background thread
+        self.sequence = 0                       # sequence number of the last record, dropped ones included
+        self.written = 0                        # records written to the file
+        self.dropped = 0                        # records dropped because MAX_PENDING were waiting
+        self.reported_dropped = 0               # dropped records already reported on the console
+
+        self.file = None
+        self.binary_log = None
+        self.index = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        if not self.enabled:
+            return
+
+        if file_format == "binary":
+            self.binary_log = BinaryLogWriter(file_path, 'rvr', inputs_data)
+        else:
+            # "\n" line ends on every platform, the index counts the bytes of each line
+            self.file = open(file_path, "w", newline="\n")
+            print(header, file=self.file)
+            self.index = LogIndexWriter(file_path, len(header.encode()) + 1)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to queue one record, called from the control loop, never blocks
+    # The record gets the monotonic clock time (ns) and a sequence number as its last two fields, the sequence
+    # numbers of dropped records are skipped, so gaps in a log show where records were dropped
+    # Parameters:
+    #       - fields: the values of the record, written comma separated in the given order, the robot name first.
+    def write(self, *fields):
+        if not self.enabled:
+            return
+        self.sequence += 1
+        if len(self.pending) >= self.MAX_PENDING:
+            self.dropped += 1
+            return
+        self.pending.append(fields + (time.monotonic_ns(), self.sequence))
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function run by the background thread, writes a batch every FLUSH_INTERVAL until closed
+    def run(self):
+        while not self.stop_event.wait(self.FLUSH_INTERVAL):
+            self.write_pending()
+        self.write_pending()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to write the pending records as one batch and flush the file, and report new drops
+    def write_pending(self):
+        records = [self.pending.popleft() for _ in range(len(self.pending))]
+        if len(records) > 0:
+            if self.binary_log is not None:
+                self.binary_log.write_rows(records, 'rvr')
+                self.binary_log.flush()
+            else:
+                # same layout as print(field, ",", field, ...)
+                separator = LAYOUT_SEPARATORS['rvr']
+                lines = []
+                for record in records:
+                    lines.append(separator.join(str(field) for field in record) + "\n")
+                    self.index.add(record[-2], str(record[0]), len(lines[-1].encode()))
+                self.file.write("".join(lines))
+                self.file.flush()
+                self.index.flush()
+            self.written += len(records)
+
+        if self.dropped > self.reported_dropped:
+            print(f"Telemetry: {self.dropped - self.reported_dropped} records dropped, the file is not keeping up")
+            self.reported_dropped = self.dropped
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+    # Function to write what is still pending, stop the thread and close the file, safe to call more than once
+    def close(self):
+        if self.thread is None:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        if self.binary_log is not None:
+            self.binary_log.close()
+        else:
+            self.file.close()
+            self.index.close()
@@ -0,0 +1,102 @@
+"""
+Arena Geometry Tests
+
+Checks that arena_avoidance_rule, with the distance field of the rectangle arena built at ARENA_SDF_CELL_SIZE, turns
+the boids away from the walls at the same places and in the same directions as wall_avoidance_rule.
+Run with pytest from this folder or the folder above.
+
+@ version   1.0
+"""
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+import math                         # for the vector lengths
+import os                           # for the import path
+import random                       # for the random boids
+import sys                          # for the import path
+from types import SimpleNamespace   # for a boid with only the fields the rules read
+
+import pytest                       # for the fixture
+
+# the rules import "assets.Constants", so the folder above assets must be on the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Constants must be first import
+from assets import Constants as Cons            # for the arena and the wall avoidance range
+from Arena_Geometry import ArenaGeometry, rectangle_arena
+from Boids_Rules import wall_avoidance_rule, arena_avoidance_rule
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Fixture to use the distance field of the rectangle arena, built in memory (not in arena_cache)
+@pytest.fixture
+def rectangle_geometry(monkeypatch):
+    geometry = ArenaGeometry(rectangle_arena(Cons.ARENA_WIDTH, Cons.ARENA_LENGTH), [], Cons.ARENA_SDF_CELL_SIZE)
+    geometry.build()
+    monkeypatch.setattr(Cons, 'ARENA_GEOMETRY', geometry)
+    return geometry
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to make a boid at (x, y)
+def make_boid(x, y):
+    return SimpleNamespace(x=x, y=y, position=[x, y])
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to compute the distances of a boid to the walls of the rectangle arena, nearest first, negative outside
+def wall_distances(x, y):
+    return sorted((x, Cons.ARENA_WIDTH - x, y, Cons.ARENA_LENGTH - y))
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+def test_cell_size_resolves_the_wall_avoidance_range():
+    assert Cons.ARENA_SDF_CELL_SIZE <= Cons.WALL_AVOIDANCE_RANGE / 2
+    assert Cons.ARENA_SDF_CELL_SIZE <= Cons.CELL_SIZE
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+def test_sdf_rule_matches_wall_rule_along_the_walls(rectangle_geometry):
+    generator = random.Random(3)
+    margin = 2 * Cons.WALL_AVOIDANCE_RANGE
+    checked = 0
+    for case in range(20000):
+        x = generator.uniform(-margin, Cons.ARENA_WIDTH + margin)
+        y = generator.uniform(-margin, Cons.ARENA_LENGTH + margin)
+        near_x = min(x, Cons.ARENA_WIDTH - x) < Cons.WALL_AVOIDANCE_RANGE
+        near_y = min(y, Cons.ARENA_LENGTH - y) < Cons.WALL_AVOIDANCE_RANGE
+        # the rectangle rule pushes diagonally in the corners, the distance field away from the nearest wall
+        if near_x and near_y:
+            continue
+        nearest, second = wall_distances(x, y)[:2]
+        # the interpolated distance may round either way right on the range
+        if abs(nearest - Cons.WALL_AVOIDANCE_RANGE) < 1e-9:
+            continue
+        # the gradient blends the directions of two walls within a cell of where they are equally close
+        if second - nearest < 2 * Cons.ARENA_SDF_CELL_SIZE:
+            continue
+
+        boid = make_boid(x, y)
+        wall_vector = wall_avoidance_rule(boid)
+        arena_vector = arena_avoidance_rule(boid)
+        # normalize_speed_limit rounds to 5 decimals
+        assert arena_vector == pytest.approx(wall_vector, abs=2e-5), (x, y)
+        checked += 1
+
+    assert checked > 10000
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+def test_sdf_rule_turns_back_in_the_corners(rectangle_geometry):
+    generator = random.Random(4)
+    for case in range(5000):
+        # inside the wall avoidance range of two walls, corner by corner
+        corner_x = generator.choice((0, Cons.ARENA_WIDTH))
+        corner_y = generator.choice((0, Cons.ARENA_LENGTH))
+        x = corner_x + generator.uniform(-0.9, 0.9) * Cons.WALL_AVOIDANCE_RANGE
+        y = corner_y + generator.uniform(-0.9, 0.9) * Cons.WALL_AVOIDANCE_RANGE
+
+        boid = make_boid(x, y)
+        wall_vector = wall_avoidance_rule(boid)
+        arena_vector = arena_avoidance_rule(boid)
+        # both push the boid back into the arena, at the same speed
+        assert arena_vector[0] * wall_vector[0] + arena_vector[1] * wall_vector[1] > 0, (x, y)
+        assert math.hypot(*arena_vector) == pytest.approx(math.hypot(*wall_vector), abs=2e-5), (x, y)
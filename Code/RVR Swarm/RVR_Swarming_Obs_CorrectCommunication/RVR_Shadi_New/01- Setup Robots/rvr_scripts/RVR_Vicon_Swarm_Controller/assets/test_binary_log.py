@@ -0,0 +1,63 @@
+"""
+Binary Log Tests
+
+Checks that text_to_binary then binary_to_text gives back the text logs line for line, with every digit of the numbers
+(the RVR telemetry writes them with up to 17 significant digits), for the RVR and the BOLT layouts.
+Run with pytest from this folder or the folder above.
+
+@ version   1.0
+"""
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+import os                           # for the import path and the files
+import random                       # for the random records
+import sys                          # for the import path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Binary_Log import LAYOUT_HEADERS, LAYOUT_SEPARATORS, text_to_binary, binary_to_text, read_log
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to write a text log of random records and convert it to binary and back
+# Returns (the text lines written, the text lines read back)
+def round_trip(tmp_path, layout, make_row, count):
+    generator = random.Random(11)
+    text_path = os.path.join(tmp_path, "log.txt")
+    lines = [LAYOUT_SEPARATORS[layout].join(make_row(generator)) for _ in range(count)]
+    if LAYOUT_HEADERS[layout] is not None:
+        lines.insert(0, LAYOUT_HEADERS[layout])
+    with open(text_path, "w") as text_file:
+        text_file.write("".join(line + "\n" for line in lines))
+
+    text_to_binary(text_path, os.path.join(tmp_path, "log.bin"), layout)
+    binary_to_text(os.path.join(tmp_path, "log.bin"), os.path.join(tmp_path, "back.txt"))
+    with open(os.path.join(tmp_path, "back.txt"), "r") as text_file:
+        return lines, text_file.read().splitlines()
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+def test_rvr_round_trip_keeps_every_digit(tmp_path):
+    def make_row(generator):
+        return ([f"RVR{generator.randint(1, 9)}"] + [repr(generator.uniform(-5, 5)) for _ in range(12)]
+                + [str(generator.randint(0, 9)) for _ in range(3)]
+                + [str(generator.randint(0, 2**62)), str(generator.randint(1, 10**6))])
+
+    lines, back = round_trip(tmp_path, 'rvr', make_row, 500)
+    assert back == lines
+    header, records = read_log(os.path.join(tmp_path, "log.bin"))
+    assert header['layout'] == 'rvr' and len(records) == 500
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+def test_bolt_round_trip_keeps_every_digit(tmp_path):
+    def make_row(generator):
+        return ([str(generator.randint(0, 2**62)), f"SB-{generator.randint(1000, 9999)}",
+                 repr(generator.uniform(-300, 300)), repr(generator.uniform(-300, 300)),
+                 str(generator.randint(0, 255)), str(generator.randint(0, 359))]
+                + [repr(generator.uniform(-1, 1)) for _ in range(6)]
+                + [str(generator.randint(0, 9)) for _ in range(3)])
+
+    lines, back = round_trip(tmp_path, 'bolt', make_row, 500)
+    assert back == lines
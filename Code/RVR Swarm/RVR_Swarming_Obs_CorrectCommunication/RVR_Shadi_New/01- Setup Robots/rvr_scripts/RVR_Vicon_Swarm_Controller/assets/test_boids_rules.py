@@ -0,0 +1,114 @@
+"""
+Boids Rules Tests
+
+Checks that fused_neighbor_rules gives exactly the same (vector, count) tuples as alignment_rule, cohesion_rule and
+separation_rule, on random swarms and on neighbors placed one float step inside, on and outside every range, where the
+squared thresholds of squared_range_threshold have to agree with calculate_distance(...) < range.
+Run with pytest from this folder or the folder above.
+
+@ version   1.0
+"""
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+import math                         # for the boundary distances
+import numpy as np                  # for the neighbor arrays of the control tick
+import os                           # for the import path
+import random                       # for the random swarms
+import sys                          # for the import path
+from types import SimpleNamespace   # for a boid with only the fields the rules read
+
+# the rules import "assets.Constants", so the folder above assets must be on the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Constants must be first import
+from assets import Constants as Cons            # for the ranges
+from Boids_Rules import alignment_rule, cohesion_rule, separation_rule, fused_neighbor_rules, nearest_neighbors
+from Helper_Functions import calculate_distance, squared_range_threshold
+
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+RANGES = [Cons.ALIGNMENT_RANGE, Cons.COHESION_RANGE, Cons.SEPARATION_RANGE]
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to make a boid at (x, y) with velocity (delta_x, delta_y)
+def make_boid(x, y, delta_x, delta_y):
+    return SimpleNamespace(x=x, y=y, position=[x, y], delta_x=delta_x, delta_y=delta_y)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to check the fused rules, on lists and on the Nx2 arrays of the control tick, against the three separate
+# rules, exact tuple equality
+def check_same_result(boid, neighbors_positions, neighbors_velocities):
+    separate = (alignment_rule(boid, neighbors_positions, neighbors_velocities),
+                cohesion_rule(boid, neighbors_positions),
+                separation_rule(boid, neighbors_positions))
+    fused = fused_neighbor_rules(boid, neighbors_positions, neighbors_velocities)
+    assert fused == separate, (boid, neighbors_positions, neighbors_velocities)
+    fused = fused_neighbor_rules(boid, np.array(neighbors_positions).reshape(-1, 2), np.array(neighbors_velocities).reshape(-1, 2))
+    assert fused == separate, (boid, neighbors_positions, neighbors_velocities)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+def test_squared_range_threshold_matches_distance():
+    for range_value in RANGES + [0.1, 0.3, 1.0, 1.7, 2.5]:
+        threshold = squared_range_threshold(range_value)
+        # the threshold is the first float whose sqrt reaches the range
+        assert math.sqrt(threshold) >= range_value
+        assert math.sqrt(math.nextafter(threshold, 0)) < range_value
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+def test_fused_rules_random_swarms():
+    generator = random.Random(1)
+    for case in range(20000):
+        boid = make_boid(generator.uniform(0, 2), generator.uniform(0, 2),
+                         generator.uniform(-0.3, 0.3), generator.uniform(-0.3, 0.3))
+        neighbors = generator.randint(0, 8)
+        neighbors_positions = [[generator.uniform(-1, 3), generator.uniform(-1, 3)] for _ in range(neighbors)]
+        neighbors_velocities = [[generator.uniform(-0.3, 0.3), generator.uniform(-0.3, 0.3)] for _ in range(neighbors)]
+        check_same_result(boid, neighbors_positions, neighbors_velocities)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+def test_fused_rules_on_range_boundaries():
+    generator = random.Random(2)
+    boundary_cases = 0
+    for case in range(5000):
+        boid = make_boid(generator.uniform(0, 2), generator.uniform(0, 2),
+                         generator.uniform(-0.3, 0.3), generator.uniform(-0.3, 0.3))
+        neighbors_positions = []
+        for range_value in RANGES:
+            angle = generator.uniform(-math.pi, math.pi)
+            for distance in (math.nextafter(range_value, 0), range_value, math.nextafter(range_value, math.inf)):
+                neighbors_positions.append([boid.x + distance * math.cos(angle), boid.y + distance * math.sin(angle)])
+        # neighbors exactly on an axis, the distance is then the range itself
+        for range_value in RANGES:
+            neighbors_positions.append([boid.x + range_value, boid.y])
+            neighbors_positions.append([boid.x, boid.y - range_value])
+        neighbors_velocities = [[generator.uniform(-0.3, 0.3), generator.uniform(-0.3, 0.3)] for _ in neighbors_positions]
+
+        # each neighbor on its own, so a wrong in/out decision changes the count
+        for position, velocity in zip(neighbors_positions, neighbors_velocities):
+            check_same_result(boid, [position], [velocity])
+            if calculate_distance(boid.position, position) in RANGES:
+                boundary_cases += 1
+        check_same_result(boid, neighbors_positions, neighbors_velocities)
+
+    # the on-axis neighbors are exactly on the range
+    assert boundary_cases >= 5000 * 6
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+def test_nearest_neighbors_keeps_the_k_nearest_in_order():
+    generator = random.Random(8)
+    for case in range(2000):
+        boid = make_boid(generator.uniform(0, 2), generator.uniform(0, 2), 0, 0)
+        positions = np.array([[generator.uniform(-1, 3), generator.uniform(-1, 3)] for _ in range(generator.randint(0, 12))]).reshape(-1, 2)
+        k = generator.randint(0, 8)
+        nearest = nearest_neighbors(boid, positions, k)
+
+        by_distance = sorted(range(len(positions)), key=lambda i: calculate_distance(boid.position, positions[i]))
+        assert nearest.tolist() == sorted(by_distance[:k])
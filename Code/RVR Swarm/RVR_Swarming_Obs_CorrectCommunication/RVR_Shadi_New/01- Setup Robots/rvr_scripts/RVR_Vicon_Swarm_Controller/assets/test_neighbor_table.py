@@ -0,0 +1,87 @@
+"""
+Neighbor Table Tests
+
+Checks that a batch of messages decoded by decode_states in NeighborTable.on_messages fills the table exactly like the
+same messages passed one at a time to on_message, that broken messages and messages of another version are left out,
+and that the message listener gets the stored row, so NeighborAggregates holds the same neighbors without decoding.
+Run with pytest from this folder or the folder above.
+
+@ version   1.0
+"""
+
+# ⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️⤵️ #
+
+import os                           # for the import path
+import random                       # for the random messages
+import sys                          # for the import path
+
+# the table imports "assets.State_Message", so the folder above assets must be on the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assets.State_Message import STATE_VERSION, encode_state, decode_state
+from assets.Neighbor_Table import NeighborTable
+from assets.Neighbor_Aggregates import NeighborAggregates
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to make random messages of a few senders, with broken ones and ones of another version among them
+def make_messages(generator, count):
+    messages = []
+    for sequence in range(1, count + 1):
+        sender = f"agent{generator.randint(0, 5)}"
+        message = encode_state(generator.randint(0, 5), sequence, generator.randint(0, 2**40),
+                               generator.uniform(0, 2), generator.uniform(0, 2),
+                               generator.uniform(-0.3, 0.3), generator.uniform(-0.3, 0.3))
+        kind = generator.random()
+        if kind < 0.1:
+            message = message[:-1]
+        elif kind < 0.2:
+            message = bytes([STATE_VERSION + 1]) + message[1:]
+        messages.append((sender, message))
+    return messages
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+# Function to read the table without the receive times, they differ between two tables
+def table_contents(table):
+    rows = table.view()
+    return {sender: (int(row['id']), int(row['seq']), int(row['t_ns'])) + tuple(row['position'].tolist())
+            + tuple(row['velocity'].tolist()) for sender, row in zip(table.senders, rows)}
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+def test_batch_matches_one_at_a_time():
+    generator = random.Random(9)
+    for case in range(200):
+        messages = make_messages(generator, generator.randint(0, 30))
+        single = NeighborTable(capacity=2)
+        for sender, message in messages:
+            single.on_message(sender, message)
+        batch = NeighborTable(capacity=2)
+        batch.on_messages(messages)
+
+        assert table_contents(batch) == table_contents(single)
+        # the last valid message of every sender is in the table
+        expected = {}
+        for sender, message in messages:
+            state = decode_state(message)
+            if state is not None:
+                expected[sender] = state
+        assert table_contents(batch) == expected
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ #
+def test_listener_gets_the_stored_row():
+    generator = random.Random(10)
+    aggregates = NeighborAggregates([1, 1])
+    table = NeighborTable(message_listener=aggregates.on_message, eviction_listener=aggregates.remove)
+    table.on_messages(make_messages(generator, 40))
+
+    rows = table.view()
+    assert set(aggregates.neighbors) == set(table.senders)
+    for sender, row in zip(table.senders, rows):
+        neighbor = aggregates.neighbors[sender]
+        assert neighbor['id'] == row['id']
+        assert neighbor['position'] == row['position'].tolist()
+        assert neighbor['velocity'] == row['velocity'].tolist()
+        assert neighbor['received_ns'] == row['received_ns']
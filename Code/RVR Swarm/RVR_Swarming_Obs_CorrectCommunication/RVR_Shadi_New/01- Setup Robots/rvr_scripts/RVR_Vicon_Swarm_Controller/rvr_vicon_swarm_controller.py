@@ -17,6 +17,7 @@ import math
 import time
 import threading
 import signal
+import numpy as np
 
 
 # if we run code from /home/pi/sphero-sdk-raspberrypi-python/projects/ folder use:
@@ -33,13 +34,17 @@ from sphero_sdk import RvrLedGroups             # for LED
 from sphero_sdk import RvrStreamingServices     # For locater handler 
 
 # For Vicon
-from pylsl import resolve_stream, StreamInlet
+from pylsl import resolve_stream, resolve_streams, StreamInlet
 
 # For Swarm
 from assets import Constants as Cons              # for Constants and Global variables
 from assets.Boid import Boid
+from assets.Neighbor_Aggregates import NeighborAggregates
+from assets.Neighbor_Table import NeighborTable
+from assets.Telemetry_Writer import TelemetryWriter
+from assets.State_Message import encode_state
 from assets.Helper_Functions import *             # Import Helper_Functions.py from the parent directory
-from Communication_Handler import Communication_Handler
+from Communication_Handler import Communication_Handler, Async_Communication_Handler, Multicast_Communication_Handler
 
 
 # Define Agent class for controlling the RVR robot.
@@ -52,15 +57,23 @@ class Agent:
     vicon_sr = 100      # simpling rate (how time recive in sec)
     locator_handler_x = None
     locator_handler_y = None
-    obs_name   = 'obstacle'
+    # Obstacle Avoidance: every lsl stream of this type is one obstacle
+    obstacle_stream_type = 'VICON_OBSTACLE'
+    obstacle_resolve_time = 2       # seconds to look for obstacle streams
+    obstacles_positions = np.zeros((0, 2))
     
     # Initializes the Agent instance with the given parameters.
     def __init__(self, start_position, start_heading_angle, robot_size, robot_id, robot_ip, robot_name, all_robtos_ips):
         
         self.robot_name = robot_name
+        self.send_sequence = 0      # number of the last state message sent to the neighbors
+
+        # per tick log written in the background, a no-op when TELEMETRY_ENABLED is false
+        self.telemetry = TelemetryWriter(Cons.TELEMETRY_FILE, Cons.TELEMETRY_HEADER, Cons.TELEMETRY_ENABLED,
+                                         Cons.TELEMETRY_FORMAT, Cons.loaded_data)
 
         # object from boid to compute next linear_velocity and angular_velocity
-        self.boid = Boid(start_position, start_heading_angle, ObsPosition, robot_size, robot_id,self.robot_name)
+        self.boid = Boid(start_position, start_heading_angle, [], robot_size, robot_id,self.robot_name, self.telemetry)
         self.command_time_step = 50 # it mean run command each command_time_step ms
 
         # ANGULAR_SPEED need to divide by (angle_rat), to make change of ANGULAR_SPEED every 100 step correct as target value you want
@@ -91,10 +104,31 @@ class Agent:
             print("Note that robot_neighbors_ips is empty so robot will try to connect to a virtual default ip 0.0.0.0")
             self.robot_neighbors_ips = ["0.0.0.0"]
 
-        # Create a communication_handler instance for Robot
-        self.communication_handler = Communication_Handler(self.robot_name, robot_ip, self.robot_neighbors_ips)
-        # Start communication
-        self.communication_handler.start_communication()
+        # Every neighbor message goes to the neighbor table, which evicts neighbors not heard from for NEIGHBOR_TTL.
+        # In metric mode the neighbor sums are kept up to date as messages arrive,
+        # topological mode needs the k nearest neighbors so it keeps the lists from receive_information
+        self.neighbor_table = NeighborTable(Cons.NEIGHBOR_TTL)
+        if Cons.NEIGHBOR_MODE == 'metric':
+            self.boid.neighbor_aggregates = NeighborAggregates(start_position)
+            self.neighbor_table.message_listener = self.boid.neighbor_aggregates.on_message
+            self.neighbor_table.eviction_listener = self.boid.neighbor_aggregates.remove
+        message_listener = self.neighbor_table.on_message
+
+        # Create a communication_handler instance for Robot and start communication,
+        # in asyncio mode it runs on self.loop between the awaits of run_agent instead of its own threads
+        if Cons.COMMUNICATION_MODE == 'asyncio':
+            self.communication_handler = Async_Communication_Handler(self.robot_name, robot_ip, self.robot_neighbors_ips,
+                                                                     message_listener=message_listener)
+            self.loop.run_until_complete(self.communication_handler.start_communication())
+        elif Cons.COMMUNICATION_MODE == 'multicast':
+            # the datagrams waiting in the socket are decoded and stored as one batch
+            self.communication_handler = Multicast_Communication_Handler(self.robot_name, robot_ip, self.robot_neighbors_ips,
+                                                                         messages_listener=self.neighbor_table.on_messages)
+            self.communication_handler.start_communication()
+        else:
+            self.communication_handler = Communication_Handler(self.robot_name, robot_ip, self.robot_neighbors_ips,
+                                                               message_listener=message_listener)
+            self.communication_handler.start_communication()
         # ----------------------------------------------------------- #
 
         # Handle termination signals (Ctrl+C, etc.)
@@ -157,17 +191,18 @@ class Agent:
     def init_lsl(self):
         print("looking for Vicon lsl stream...")
         streams_robot = resolve_stream('name', self.robot_name)
-        streams_obs    = resolve_stream('name', self.obs_name)
-        # if self.robot_name!="obstacle":
         print(f"Stream found for {self.robot_name}")
         # create a new inlet to read from the stream
         self.inlet = StreamInlet(streams_robot[0])
         threading.Thread(target=self.vicon_locator).start()
-        # else:
-        print(f"Stream found for {self.obs_name}")
-        # create a new inlet to read from the stream
-        self.inletObs = StreamInlet(streams_obs[0])
-        threading.Thread(target=self.vicon_locator_obs).start()
+
+        # Obstacle Avoidance: pick up all obstacle streams, any number of them
+        streams_obs = [stream for stream in resolve_streams(self.obstacle_resolve_time) if stream.type() == self.obstacle_stream_type]
+        print(f"{len(streams_obs)} obstacle streams found")
+        self.obstacle_inlets = [StreamInlet(stream) for stream in streams_obs]
+        self.obstacles_positions = np.full((len(self.obstacle_inlets), 2), np.nan)     # nan until the first sample of the obstacle arrives
+        if len(self.obstacle_inlets) > 0:
+            threading.Thread(target=self.vicon_locator_obs).start()
     # def init_lsl(self):
     #     print("looking for Vicon lsl stream...")
     #     streams = resolve_stream('name', self.robot_name)
@@ -196,19 +231,20 @@ class Agent:
                 pass
             finally:
                 time.sleep(1 / self.vicon_sr)
-    #Obstacle Avoidance: define vicon_locator function for receiving obstacle position and pass it into the agent
+    #Obstacle Avoidance: define vicon_locator function for receiving all obstacles positions and pass them into the agent
     def vicon_locator_obs(self):
         
         while True:
             try:
-                sampleObs, timestampObs = self.inletObs.pull_sample()
+                for i, inlet in enumerate(self.obstacle_inlets):
+                    # take the newest sample of each obstacle without waiting
+                    samplesObs, timestampsObs = inlet.pull_chunk(timeout=0.0)
+                    if not samplesObs:
+                        continue
 
-                with self.vicon_update_lock:
-
-                    self.locator_handler_Ox = sampleObs[0] / 1000               # /1000 to covert from mm to meters
-                    self.locator_handler_Oy = sampleObs[1] / 1000               # /1000 to covert from mm to meters
-                    # round values to make numbers same in all OS (Windows, Linux)
-                    self.locator_handler_Ox , self.locator_handler_Oy = [round(v, 5) for v in [self.locator_handler_Ox, self.locator_handler_Oy] ]
+                    with self.vicon_update_lock:
+                        # /1000 to covert from mm to meters, round values to make numbers same in all OS (Windows, Linux)
+                        self.obstacles_positions[i] = [round(samplesObs[-1][0] / 1000, 5), round(samplesObs[-1][1] / 1000, 5)]
 
             except Exception as e:
                 print(e)
@@ -238,33 +274,32 @@ class Agent:
         robot_position = robot_position[:2]             # we just need x, y and ignore z
         return robot_position
     
-    # Function to Broadcast robot_ID, position, velocity
+    # Function to Broadcast robot_ID, position, velocity as a binary state message (see assets/State_Message.py)
     def send_information(self):
-        data = f"{self.boid.id},{self.boid.x},{self.boid.y},{self.boid.delta_x},{self.boid.delta_y}"
+        self.send_sequence += 1
+        data = encode_state(self.boid.id, self.send_sequence, time.monotonic_ns(),
+                            self.boid.x, self.boid.y, self.boid.delta_x, self.boid.delta_y)
         self.communication_handler.send_message_to_all(data)        # Send information to all connected robots
 
     # Function to Collect neighbor IDs, positions, velocities data by Receiving data from other robots
     def receive_information(self):
 
-        # clear all old neighbors data
-        self.boid.clear_neighbors_data()
- 
-        # Access a list of all last received messages from all senders
-        last_received_messages = self.communication_handler.get_last_received_messages()
-        # print("last_received_message= " ,last_received_messages)
-
-        for sender_ip, last_received_message in last_received_messages:
-            # print(f"Last received message from {sender_ip}: {last_received_message}")
-
-            neighbors_data = last_received_message.split(',')
-            robot_id = int(neighbors_data[0])
-            print(robot_id)
-            position = [float(neighbors_data[1]), float(neighbors_data[2])]
-            velocity = [float(neighbors_data[3]), float(neighbors_data[4])]
-   
-            self.boid.neighbors_IDs.append(robot_id)
-            self.boid.neighbors_positions.append(position)
-            self.boid.neighbors_velocities.append(velocity)
+        # drop the neighbors not heard from for NEIGHBOR_TTL seconds (crashed or disconnected), also from the sums
+        self.neighbor_table.evict()
+
+        # neighbors are already summed by neighbor_aggregates as their messages arrive
+        if self.boid.neighbor_aggregates is not None:
+            return
+
+        # read the neighbors straight from the table, already decoded as they arrived. The view is only valid while
+        # the lock is held, so the rows are copied out in one block (one copy per tick, the receive side is not held
+        # up by the rules) and the arrays of the boid are views of that copy, positions and velocities already Nx2
+        with self.neighbor_table.lock:
+            neighbors = self.neighbor_table.view().copy()
+            self.boid.neighbors_ages = self.neighbor_table.ages()
+        self.boid.neighbors_IDs = neighbors['id']
+        self.boid.neighbors_positions = neighbors['position']
+        self.boid.neighbors_velocities = neighbors['velocity']
 
     # Function Runs the main agent loop, controlling the RVR's movements and behaviors.
     async def run_agent(self):
@@ -291,12 +326,11 @@ class Agent:
                     self.boid.y = self.locator_handler_y
                 
                 self.boid.position = [self.boid.x, self.boid.y]          # boid position as list [x, y]
-                if self.locator_handler_Ox != None and self.locator_handler_Oy != None:
-                    
-                    self.boid.obsX = self.locator_handler_Ox
-                    self.boid.obsY = self.locator_handler_Oy
-                self.boid.obsPosition = [self.boid.obsX,self.boid.obsY]
-                print(self.locator_handler_Ox,self.locator_handler_Oy)
+
+                # Obstacle Avoidance: pass the latest obstacles positions to the boid
+                if self.vicon_enable == True:
+                    with self.vicon_update_lock:
+                        self.boid.obstacles_positions = self.obstacles_positions.copy()
                 # update heading_angle by adding current angular_velocity value
                 self.boid.heading_angle += self.boid.angular_velocity
                 self.boid.heading_angle = round(self.boid.heading_angle, 5)         # round values to make numbers same in all OS (Windows, Linux)
@@ -365,6 +399,7 @@ class Agent:
         """
         print(f"Termination signal received (Signal {signum}). Cleaning up...")
         self.communication_handler.handle_termination()
+        self.telemetry.close()
         self.animate_termination()
         
 
@@ -384,7 +419,6 @@ def main():
         start_heading_angle = 0             # put all robots face alighn with x Axis
         robot_size = Cons.ROBOT_SIZE
         robot_id = 1
-        ObsPosition = [-10000,-10000]
 
         # for Comunications
         # Define the IP address for Robot
@@ -399,7 +433,7 @@ def main():
         # all_robtos_ips = ["192.168.43.192", "192.168.43.200", "192.168.43.116"]
         all_robtos_ips = ["192.168.68.50","192.168.68.57"]
 
-        agent = Agent(start_position, start_heading_angle, ObsPosition, robot_size, robot_id, robot_ip, robot_id_name, all_robtos_ips)
+        agent = Agent(start_position, start_heading_angle, robot_size, robot_id, robot_ip, robot_id_name, all_robtos_ips)
 
         agent.loop.run_until_complete(agent.run_agent())
 
@@ -417,6 +451,9 @@ def main():
 
         agent.loop.run_until_complete(agent.rvr.close())
 
+        # write the telemetry still pending
+        agent.telemetry.close()
+
         print("Program ended.")
 
 if __name__ == '__main__':
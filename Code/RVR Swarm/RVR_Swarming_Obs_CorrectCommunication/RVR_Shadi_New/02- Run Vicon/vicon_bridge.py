@@ -20,6 +20,7 @@ class ViconBridge:
     # lsl params
     srate = 100
     stream_type = 'VICON'
+    obstacle_stream_type = 'VICON_OBSTACLE'     # the robots pick up every stream of this type as an obstacle
 
     # Vicon params
     vicon_sr = 100  # vicon sampling rate per second
@@ -28,19 +29,22 @@ class ViconBridge:
     vicon_server_ip = '192.168.68.54'
     vicon_server_port = '801'
 
-    def __init__(self, robot_names):
+    def __init__(self, robot_names, obstacle_names=()):
         self.vicon_client = None
 
         # Initialise a dict of outlets
         self.outlet = {}
         for r in robot_names:
             self.init_lsl(r)
+        for o in obstacle_names:
+            self.init_lsl(o, self.obstacle_stream_type)
 
         self.init_vicon_streaming()
 
         # threading.Thread(target=self.vicon_locator()).start()
 
-    def init_lsl(self, name):
+    def init_lsl(self, name, stream_type=None):
+        stream_type = stream_type or self.stream_type
         channel_names = ["x", "y"]
         n_channels = len(channel_names)
 
@@ -51,7 +55,7 @@ class ViconBridge:
         #  The last value would be the serial number of the device or some other more or
         #  less locally unique identifier for the stream as far as available (you
         #  could also omit it but interrupted connections wouldn't auto-recover).
-        info = pylsl.StreamInfo(name, self.stream_type, n_channels, self.srate, 'float32', name)
+        info = pylsl.StreamInfo(name, stream_type, n_channels, self.srate, 'float32', name)
 
         # append some meta-data
         # https://github.com/sccn/xdf/wiki/EEG-Meta-Data
@@ -125,6 +129,7 @@ class ViconBridge:
 
 
 if __name__ == '__main__':
-    robot_names = ['rvr2', 'rvr3','obstacle'] #, 'rvr4'
-    vb = ViconBridge(robot_names)
+    robot_names = ['rvr2', 'rvr3'] #, 'rvr4'
+    obstacle_names = ['obstacle']
+    vb = ViconBridge(robot_names, obstacle_names)
     vb.run()